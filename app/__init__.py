@@ -1,36 +1,39 @@
-from flask import Flask, render_template, flash, redirect, url_for, request
-from flask_sqlalchemy import SQLAlchemy
+from flask import Flask, render_template, flash, redirect, url_for, request, Response, stream_with_context, jsonify, g, has_request_context
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import orm
 from flask_migrate import Migrate  # <-- Import Flask-Migrate
-import logging
-from logging.handlers import RotatingFileHandler
+import json
+import click
 import os
+import time
+
+class RoutingSession(SignallingSession):
+    """Session that reads from the 'replica' bind during requests routed to it.
+
+    Flushes always go to the primary. See app.utils.replica for which
+    requests are routed.
+    """
+
+    def get_bind(self, mapper=None, clause=None):
+        if not self._flushing and has_request_context() and g.get('use_replica'):
+            return db.get_engine(self.app, bind='replica')
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
 
 # Initialize extensions
-db = SQLAlchemy()
+db = RoutingSQLAlchemy()
 migrate = Migrate()  # <-- Initialize Migrate
 
 def configure_logging():
+    # Queued, JSON-formatted file logging; set up once per process (see app.utils.logs)
+    from app.utils.logs import configure_logging as configure_queued_logging
     log_folder = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
-    os.makedirs(log_folder, exist_ok=True)
-    
-    # Configure rotating file handler instead of regular file handler
-    file_handler = RotatingFileHandler(
-        os.path.join(log_folder, 'coretext.log'),
-        maxBytes=10485760,  # 10 MB
-        backupCount=5
-    )
-    file_handler.setLevel(logging.INFO)
-    
-    # Configure formatter
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(formatter)
-    
-    # Configure root logger
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    logger.addHandler(file_handler)
-    
-    return logger
+    return configure_queued_logging(log_folder)
 
 def create_default_tags(app):
     with app.app_context():
@@ -58,9 +61,33 @@ def create_default_tags(app):
         
         db.session.commit()
 
-        
+def init_database(app, stamp=False):
+    """
+    Create missing tables and the default tags.
+
+    Args:
+        stamp: Keep the schema under the migrations: a new (empty) database
+            is created from the models and marked as being at the latest
+            revision, and one with migration history is upgraded rather than
+            having tables created alongside the migrations. Safe to run on
+            every deploy.
+    """
+    with app.app_context():
+        tables = db.inspect(db.engine).get_table_names()
+        directory = os.path.join(os.path.dirname(app.root_path), 'migrations')
+        if stamp and 'alembic_version' in tables:
+            import flask_migrate
+            flask_migrate.upgrade(directory=directory)
+        else:
+            db.create_all()
+            if stamp and not tables:
+                import flask_migrate
+                flask_migrate.stamp(directory=directory)
+    create_default_tags(app)
+
 def create_app(config_name='default'):
     """Create and configure the Flask application."""
+    started = time.perf_counter()
     app = Flask(__name__)
 
     # Configure logging
@@ -68,10 +95,15 @@ def create_app(config_name='default'):
     app.logger = logger
     
     # Configuration
-    app.config['SECRET_KEY'] = 'dev-key-for-coretext'
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///coretext.db'
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
+    from app.config import config
+    config_class = config.get(config_name, config['default'])
+    app.config.from_object(config_class)
+    if os.environ.get('DATABASE_URL'):
+        app.config['SQLALCHEMY_DATABASE_URI'] = os.environ['DATABASE_URL']
+    config_class.init_app(app)
+    app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), app.config['UPLOAD_FOLDER'])
+    app.config['DOCUMENTS_PER_PAGE'] = 50
+    app.config['SQL_PROFILER'] = os.environ.get('SQL_PROFILER', '0') == '1'
     
     # Create uploads folder if it doesn't exist
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -79,6 +111,54 @@ def create_app(config_name='default'):
     # Initialize extensions with app
     db.init_app(app)
     migrate.init_app(app, db)  # <-- Initialize migrate after db.init_app
+    
+    # Warm-up for gunicorn's preload mode and resets for forked workers
+    from app.utils.prefork import Prefork
+    Prefork(app)
+    
+    # Correlation ids for log records, echoed in X-Request-ID
+    from app.utils.logs import RequestIds
+    RequestIds(app)
+    
+    # Optional read replica for read-only views
+    from app.utils.replica import ReplicaRouter, read_replica
+    ReplicaRouter(app)
+    
+    # WAL journaling, busy timeout and pooled connections for SQLite
+    from app.utils.sqlite_profile import SQLiteProfile
+    SQLiteProfile(app)
+    
+    # Secrets are fetched on first use, never while the app is created
+    from app.utils.secrets import SecretStore
+    SecretStore(app)
+    
+    # Per-request SQL statistics (opt-in via SQL_PROFILER=1)
+    from app.utils.profiler import SQLProfiler, query_budget
+    SQLProfiler(app)
+    
+    # Search results and rendered listings, keyed by case cache version
+    from app.utils.cache import ResultCache, cached_page
+    ResultCache(app)
+    
+    # Named entity extraction after ingest, off the request path
+    from app.utils.entities import EntityExtractionWorker
+    EntityExtractionWorker(app)
+    
+    # Document views are buffered and written in bulk
+    from app.utils.access import AccessTracker
+    AccessTracker(app)
+    
+    # Shared Google Drive client (or an in-memory fake with DRIVE_BACKEND=fake)
+    from app.utils.drive import DriveClientProvider
+    DriveClientProvider(app)
+    
+    # Incremental Drive syncs, queued from the sync button or on a timer
+    from app.utils.drive_sync import DriveSyncWorker
+    DriveSyncWorker(app)
+    
+    # Imports of selected Drive files: parallel downloads, stamped in order
+    from app.utils.drive_import import DriveImporter
+    DriveImporter(app)
 
     # Add datetime filter
     @app.template_filter('datetime')
@@ -101,6 +181,16 @@ def create_app(config_name='default'):
         except:
             return str(value)
     
+    @app.template_filter('filesize')
+    def format_filesize(value):
+        """Format a byte count for display (e.g., 1.4 MB)."""
+        size = float(value or 0)
+        for unit in ('bytes', 'KB', 'MB', 'GB'):
+            if size < 1024 or unit == 'GB':
+                break
+            size /= 1024
+        return f"{int(size)} {unit}" if unit == 'bytes' else f"{size:.1f} {unit}"
+    
     # Home page
     @app.route('/')
     def index():
@@ -108,9 +198,13 @@ def create_app(config_name='default'):
     
     # List all cases
     @app.route('/cases')
+    @query_budget(2)
+    @read_replica
     def cases():
         from app.models.case import Case
-        cases = Case.query.all()
+        from sqlalchemy.orm import joinedload
+        # Counters are columns on cases, so the whole list is a single query
+        cases = Case.query.options(joinedload(Case.default_prefix)).all()
         return render_template('cases.html', title="All Cases", cases=cases)
     
     # Create a new case
@@ -134,8 +228,7 @@ def create_app(config_name='default'):
             case = Case(
                 case_name=case_name,
                 case_number=case_number,
-                description=description,
-                bates_prefix=bates_prefix  # Temporarily keep setting this
+                description=description
             )
             db.session.add(case)
             db.session.commit()
@@ -158,11 +251,22 @@ def create_app(config_name='default'):
     
     # View case details
     @app.route('/case/<int:case_id>')
+    @query_budget(5)
+    @read_replica
+    @cached_page()
     def view_case(case_id):
         from app.models.case import Case
         from app.models.document import Document
+        from app.utils.pagination import keyset_paginate
         case = Case.query.get_or_404(case_id)
-        documents = Document.query.filter_by(case_id=case_id).all()
+        documents = keyset_paginate(
+            Document.query.filter_by(case_id=case_id).options(*Document.listing_options()),
+            (Document.bates_sequence, Document.id),
+            after=request.args.get('after'),
+            before=request.args.get('before'),
+            per_page=app.config['DOCUMENTS_PER_PAGE'],
+            total=case.document_count
+        )
         return render_template('case.html', title=case.case_name, case=case, documents=documents)
     
     # Upload document to a case
@@ -269,40 +373,182 @@ def create_app(config_name='default'):
     
     # Document details
     @app.route('/document/<int:document_id>')
+    @query_budget(8)
+    @read_replica
     def document_details(document_id):
         from app.models.document import Document
         from app.models.case import Case
+        from app.utils.similarity import similarity_indexes
+        from app.utils.access import record_access
         
         document = Document.query.get_or_404(document_id)
         case = Case.query.get(document.case_id)
+        record_access(document)
+        similar_documents = similarity_indexes.similar_documents(document, k=5)
         
         return render_template('document_details.html', 
                             title=document.original_filename, 
                             document=document, 
-                            case=case)
+                            case=case,
+                            similar_documents=similar_documents)
+    
+    # Documents in the same case with the most similar text
+    @app.route('/document/<int:document_id>/similar.json')
+    @query_budget(5)
+    @read_replica
+    def similar_documents(document_id):
+        from app.models.document import Document
+        from app.utils.similarity import similarity_indexes
+        
+        document = Document.query.get_or_404(document_id)
+        k = min(max(request.args.get('k', 10, type=int), 1), 100)
+        
+        return jsonify({
+            'document_id': document.id,
+            'similar': [
+                {
+                    'id': match.id,
+                    'bates_start': match.bates_start,
+                    'bates_end': match.bates_end,
+                    'original_filename': match.original_filename,
+                    'score': round(score, 4)
+                }
+                for match, score in similarity_indexes.similar_documents(document, k=k)
+            ]
+        })
+    
+    # Look up a document by the Bates number of any page
+    @app.route('/bates/<string:bates_number>')
+    @read_replica
+    def bates_lookup(bates_number):
+        from app.models.case import Case
+        from app.utils.bates import BatesManager
+        
+        bates_manager = BatesManager()
+        result = bates_manager.get_document_by_bates_number(bates_number, case_id=request.args.get('case_id', type=int))
+        
+        if not result:
+            flash(f"Document with Bates number {bates_number} not found", "error")
+            return redirect(url_for('search'))
+        
+        document = result['document']
+        return render_template('document_details.html',
+                            title=f"Bates Number {bates_number}",
+                            document=document,
+                            case=Case.query.get(document.case_id),
+                            page_number=result['page_number'])
     
     # Search documents
     @app.route('/search')
+    @query_budget(8)
+    @read_replica
     def search():
         from app.models.case import Case
+        from app.models.tag import Tag
         from app.utils.bates import BatesManager
         
         query = request.args.get('q', '')
+        text = request.args.get('text', '')
+        mentions = request.args.get('mentions', '')
         case_id = request.args.get('case_id', type=int)
+        tag_ids = request.args.getlist('tag_ids', type=int)
         
         cases = Case.query.all()
         results = []
+        page_hits = []
+        tag_counts = {}
+        bates_manager = BatesManager()
         
-        if query or case_id:
-            bates_manager = BatesManager()
-            results = bates_manager.search_documents(
+        # Default tags, plus the selected case's own tags
+        tag_filter = Tag.is_default == True
+        if case_id:
+            tag_filter = db.or_(tag_filter, Tag.case_id == case_id)
+        tags = Tag.query.filter(tag_filter).order_by(Tag.name).all()
+        
+        if query or mentions or ((case_id or tag_ids) and not text):
+            # The page itself is not cached, since it lists every case; the
+            # results are, per case
+            results, tag_counts = bates_manager.search_page(
                 case_id=case_id,
-                bates_number=query,
-                filename=query
+                term=query,
+                tag_ids=tag_ids,
+                mentions=mentions,
+                after=request.args.get('after'),
+                before=request.args.get('before'),
+                per_page=app.config['DOCUMENTS_PER_PAGE']
             )
+        
+        # Full-text search over page contents
+        if text:
+            page_hits = bates_manager.search_pages(text, case_id=case_id, tag_ids=tag_ids)
     
         return render_template('search.html', title="Search Documents", 
-                            results=results, cases=cases)   
+                            results=results, page_hits=page_hits, cases=cases,
+                            tags=tags, selected_tag_ids=tag_ids, tag_counts=tag_counts)   
+    
+    # Stream search results as JSON
+    @app.route('/api/documents')
+    @read_replica
+    def api_documents():
+        from app.models.document import Document
+        from app.utils.bates import BatesManager
+        from app.utils.pagination import stream_query
+        
+        query = BatesManager().build_search_query(
+            case_id=request.args.get('case_id', type=int),
+            term=request.args.get('q', ''),
+            tag_ids=request.args.getlist('tag_ids', type=int),
+            mentions=request.args.get('mentions', ''),
+            document_type=request.args.get('document_type')
+        ).order_by(Document.bates_sequence, Document.id)
+        
+        # Rows are written out as they are read, so memory use stays flat
+        # however large the case is.
+        def generate():
+            yield '['
+            for i, document in enumerate(stream_query(query)):
+                yield (',' if i else '') + json.dumps(document.to_dict())
+            yield ']'
+        
+        return Response(stream_with_context(generate()), mimetype='application/json')
+    
+    # Tag or classify many documents at once
+    @app.route('/api/documents/bulk', methods=['POST'])
+    def api_bulk_documents():
+        from app.utils.bulk import apply_bulk_operations, BulkOperationError
+        
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return jsonify({'error': 'Expected a JSON object with selection and operations'}), 400
+        
+        try:
+            result = apply_bulk_operations(payload.get('selection') or {}, payload.get('operations') or [])
+        except BulkOperationError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(result)
+    
+    # Apply one bulk operation to every result of a search
+    @app.route('/search/bulk', methods=['POST'])
+    def bulk_search_results():
+        from app.utils.bulk import apply_bulk_operations, BulkOperationError
+        
+        search_args = {
+            'q': request.form.get('q', ''),
+            'mentions': request.form.get('mentions', ''),
+            'case_id': request.form.get('case_id', type=int),
+            'tag_ids': request.form.getlist('tag_ids', type=int),
+        }
+        op = request.form.get('op')
+        operation = {'op': op, 'tag_id': request.form.get('tag_id')}
+        if op == 'set_field':
+            operation = {'op': op, 'field': 'document_type', 'value': request.form.get('document_type')}
+        
+        try:
+            result = apply_bulk_operations({'filter': search_args}, [operation])
+            flash(f"Updated {result['results'][0]['affected']} of {result['selected']} documents", 'success')
+        except BulkOperationError as e:
+            flash(str(e), 'error')
+        return redirect(url_for('search', **search_args))
     
     # Batch upload
     @app.route('/case/<int:case_id>/batch-upload', methods=['GET', 'POST'])
@@ -342,10 +588,18 @@ def create_app(config_name='default'):
     
     # Tag management
     @app.route('/tags')
+    @query_budget(3)
     def list_tags():
+        from app.models.case import Case
         from app.models.tag import Tag
+        from sqlalchemy.orm import joinedload
         default_tags = Tag.query.filter_by(is_default=True).all()
-        custom_tags = Tag.query.filter_by(is_default=False).order_by(Tag.case_id).all()
+        custom_tags = (
+            Tag.query.filter_by(is_default=False)
+            .options(joinedload(Tag.parent_case).load_only(Case.id, Case.case_name))
+            .order_by(Tag.case_id)
+            .all()
+        )
         return render_template('tags.html', title="Manage Tags", 
                             default_tags=default_tags, 
                             custom_tags=custom_tags)
@@ -431,10 +685,7 @@ def create_app(config_name='default'):
             
             # Add selected tags
             if tag_ids:
-                for tag_id in tag_ids:
-                    tag = Tag.query.get(tag_id)
-                    if tag:
-                        document.tags.append(tag)
+                document.tags = Tag.query.filter(Tag.id.in_(tag_ids)).all()
             
             db.session.commit()
             flash('Document tags updated successfully', 'success')
@@ -459,6 +710,7 @@ def create_app(config_name='default'):
     def edit_bates(document_id):
         from app.models.document import Document
         from app.models.case import Case
+        from app.models.bates_prefix import BatesPrefix
         from app.utils.bates import BatesManager
         
         document = Document.query.get_or_404(document_id)
@@ -486,32 +738,42 @@ def create_app(config_name='default'):
                 flash('Invalid Bates number format', 'error')
                 return redirect(url_for('edit_bates', document_id=document_id))
             
-            # Calculate the ending Bates number
+            # The prefix must be one of the case's Bates prefixes
+            prefix_obj = BatesPrefix.query.filter_by(case_id=document.case_id, prefix=prefix).first()
+            if not prefix_obj:
+                flash(f'Prefix "{prefix}" is not defined for this case', 'error')
+                return redirect(url_for('edit_bates', document_id=document_id))
+            
+            # Calculate the Bates range, normalizing the zero padding
             end_sequence = start_sequence + document.page_count - 1
+            new_bates_start = f"{prefix}-{str(start_sequence).zfill(6)}"
             new_bates_end = f"{prefix}-{str(end_sequence).zfill(6)}"
             
-            # Check if the Bates range overlaps with any other document in this case
-            overlap = Document.query.filter(
-                Document.case_id == document.case_id,
-                Document.id != document.id,
-                db.or_(
-                    # Check if any document's bates range overlaps with our new range
-                    db.and_(
-                        # Other doc's start <= our end
-                        db.func.cast(db.func.substr(Document.bates_start.split('-')[-1], 1), db.Integer) <= end_sequence,
-                        # Other doc's end >= our start
-                        db.func.cast(db.func.substr(Document.bates_end.split('-')[-1], 1), db.Integer) >= start_sequence
-                    )
-                )
-            ).first()
+            # Check if the Bates range overlaps with any other document for this prefix
+            bates_manager = BatesManager()
+            overlap = bates_manager.find_overlapping_document(
+                prefix_obj.id,
+                start_sequence,
+                end_sequence,
+                exclude_document_id=document.id
+            )
             
             if overlap:
-                flash(f'Bates number range conflicts with another document', 'error')
+                flash(f'Bates number range conflicts with {overlap.bates_start} to {overlap.bates_end} ({overlap.original_filename})', 'error')
+                return redirect(url_for('edit_bates', document_id=document_id))
+            
+            # Bates numbers are unique per case, including documents without a prefix range
+            duplicate = Document.query.filter(
+                Document.case_id == document.case_id,
+                Document.bates_number == new_bates_start,
+                Document.id != document.id
+            ).first()
+            if duplicate:
+                flash(f'Bates number {new_bates_start} is already used by {duplicate.original_filename}', 'error')
                 return redirect(url_for('edit_bates', document_id=document_id))
             
             # Only re-stamp PDF if it's a PDF file and the Bates start has changed
             if document.file_extension.lower() == '.pdf' and document.bates_start != new_bates_start:
-                bates_manager = BatesManager()
                 try:
                     # Re-stamp the PDF with sequential Bates numbers starting from the new start
                     stamped_file_path = bates_manager._stamp_pdf_sequential(
@@ -531,7 +793,19 @@ def create_app(config_name='default'):
             document.bates_start = new_bates_start
             document.bates_end = new_bates_end
             document.bates_sequence = start_sequence
+            document.prefix_id = prefix_obj.id
+            document.start_seq = start_sequence
+            document.end_seq = end_sequence
             
+            # Re-index the stamped pages
+            bates_manager.index_document_pages(
+                document,
+                bates_manager.sequential_page_labels(prefix, start_sequence, document.page_count)
+            )
+
+            # Ranges per prefix must never overlap, so ingest may not issue these numbers again
+            bates_manager.advance_sequence(prefix_obj.id, end_sequence)
+
             db.session.commit()
             
             flash(f'Bates number range updated from {old_bates_start} to {new_bates_start}-{new_bates_end}', 'success')
@@ -591,6 +865,7 @@ def create_app(config_name='default'):
     def renumber_case_bates(case_id):
         from app.models.case import Case
         from app.models.document import Document
+        from app.models.bates_prefix import BatesPrefix
         from app.utils.bates import BatesManager
         
         case = Case.query.get_or_404(case_id)
@@ -603,31 +878,50 @@ def create_app(config_name='default'):
                 flash('Starting number must be an integer', 'error')
                 return redirect(url_for('renumber_case_bates', case_id=case_id))
             
+            prefix = BatesPrefix.query.filter_by(case_id=case_id, is_default=True).first()
+            if not prefix:
+                flash('You need to define a default Bates prefix for this case', 'error')
+                return redirect(url_for('case_prefixes', case_id=case_id))
+            
             # Get all documents in case, sorted by original bates sequence
             documents = Document.query.filter_by(case_id=case_id).order_by(Document.bates_sequence).all()
             
+            # Bates numbers are unique per case, so moving them in place could
+            # collide with a document not yet renumbered. Park every document
+            # on a placeholder first, then assign the final numbers.
+            for doc in documents:
+                doc.bates_number = f"renumbering-{doc.id}"
+            db.session.flush()
+            
             # Renumber all documents
             bates_manager = BatesManager()
             for i, doc in enumerate(documents):
                 new_sequence = start_number + i
-                new_bates = f"{case.bates_prefix}-{str(new_sequence).zfill(6)}"
+                new_bates = f"{prefix.prefix}-{str(new_sequence).zfill(6)}"
                 
                 # Update PDF if needed
                 if doc.file_extension.lower() == '.pdf':
+                    page_labels = bates_manager.suffixed_page_labels(new_bates, doc.page_count)
                     try:
                         stamped_path = bates_manager._stamp_pdf(doc.local_path, new_bates, doc.page_count)
                         doc.local_path = stamped_path
                     except Exception as e:
                         flash(f'Error re-stamping document {doc.original_filename}: {str(e)}', 'warning')
+                else:
+                    page_labels = bates_manager.sequential_page_labels(prefix.prefix, new_sequence, doc.page_count)
                 
                 # Update document record
                 doc.bates_number = new_bates
                 doc.bates_start = new_bates
                 doc.bates_end = new_bates
                 doc.bates_sequence = new_sequence
+                doc.prefix_id = prefix.id
+                doc.start_seq = new_sequence
+                doc.end_seq = new_sequence
+                bates_manager.index_document_pages(doc, page_labels)
             
-            # Update case sequence
-            case.current_sequence = start_number + len(documents)
+            # Update the default prefix sequence
+            prefix.current_sequence = start_number + len(documents)
             db.session.commit()
             
             flash(f'Successfully renumbered {len(documents)} documents', 'success')
@@ -729,6 +1023,116 @@ def create_app(config_name='default'):
         flash(f'"{prefix.prefix}" is now the default prefix', 'success')
         return redirect(url_for('case_prefixes', case_id=case_id))
 
+    # Browse the case's Google Drive folder tree
+    @app.route('/case/<int:case_id>/browse-google-drive', methods=['GET', 'POST'])
+    def browse_google_drive(case_id):
+        from app.models.case import Case
+        from app.utils.drive import get_drive_manager, get_drive_folder_cache
+        
+        case = Case.query.get_or_404(case_id)
+        if not case.google_drive_enabled:
+            flash("Google Drive is not enabled for this case", "error")
+            return redirect(url_for('view_case', case_id=case_id))
+        
+        # Browsing starts at the case's folder of original documents
+        root_folder_id = case.drive_original_folder_id
+        if not root_folder_id:
+            flash("Original documents folder not found in Google Drive", "error")
+            return redirect(url_for('view_case', case_id=case_id))
+        
+        folder_id = request.args.get('folder_id') or root_folder_id
+        
+        if request.method == 'POST':
+            selected_files = request.form.getlist('selected_files')
+            if not selected_files:
+                flash("No files selected", "warning")
+                return redirect(url_for('browse_google_drive', case_id=case_id, folder_id=folder_id))
+            
+            # Downloads and stamping run on the importer's threads; the page
+            # polls drive_import_progress for the job
+            document_type = request.form.get('document_type')
+            job = app.extensions['drive_import'].start(case_id, selected_files, document_type)
+            flash(f"Importing {len(selected_files)} files from Google Drive", "info")
+            return redirect(url_for('browse_google_drive', case_id=case_id, folder_id=folder_id, import_job=job.id))
+        
+        try:
+            drive_manager = get_drive_manager()
+            folder_cache = get_drive_folder_cache(case_id)
+            # Folder contents (every page of the listing) and the breadcrumb
+            # path above them; both come from the case's folder cache, so only
+            # folders not seen recently cost a call
+            contents = folder_cache.children(drive_manager, folder_id)
+            parent_folders = folder_cache.breadcrumbs(drive_manager, folder_id, root_folder_id)
+        except Exception as e:
+            flash(f"Error accessing Google Drive: {str(e)}", "error")
+            return redirect(url_for('view_case', case_id=case_id))
+        
+        document_types = []
+        if case.document_types:
+            try:
+                document_types = json.loads(case.document_types)
+            except ValueError:
+                document_types = []
+        
+        return render_template(
+            'browse_google_drive.html',
+            title=f'Browse Google Drive for {case.case_name}',
+            case=case,
+            folder_id=folder_id,
+            root_folder_id=root_folder_id,
+            contents=contents,
+            parent_folders=parent_folders,
+            document_types=document_types,
+            import_job=request.args.get('import_job')
+        )
+
+    @app.route('/case/<int:case_id>/drive-imports/<job_id>')
+    def drive_import_progress(case_id, job_id):
+        job = app.extensions['drive_import'].get(job_id)
+        if job is None or job.case_id != case_id:
+            return jsonify({'error': 'Import not found'}), 404
+        return jsonify(job.to_dict())
+
+    # Import new files from the case's Bates folder in Drive
+    @app.route('/case/<int:case_id>/sync-with-drive', methods=['POST'])
+    def sync_with_drive(case_id):
+        from app.models.case import Case
+        from app.utils.drive import get_drive_manager
+        from app.utils.drive_sync import sync_case, DriveSyncConflict
+        
+        case = Case.query.get_or_404(case_id)
+        if not case.google_drive_enabled:
+            flash("Google Drive is not enabled for this case", "error")
+            return redirect(url_for('view_case', case_id=case_id))
+        if not case.drive_bates_folder_id:
+            flash("Bates labeled folder not found in Google Drive", "error")
+            return redirect(url_for('view_case', case_id=case_id))
+        
+        # Queued for the sync thread unless DRIVE_SYNC is 'inline'; either way
+        # only changes since the last sync are read (see app.utils.drive_sync)
+        sync_worker = app.extensions['drive_sync']
+        if sync_worker.enabled:
+            sync_worker.submit(case_id)
+            flash("Synchronization with Google Drive started; new documents will appear shortly", "info")
+            return redirect(url_for('view_case', case_id=case_id))
+        
+        try:
+            result = sync_case(case, get_drive_manager())
+        except DriveSyncConflict:
+            flash("Google Drive is already being synchronized for this case", "info")
+            return redirect(url_for('view_case', case_id=case_id))
+        except Exception as e:
+            flash(f"Error synchronizing with Google Drive: {str(e)}", "error")
+            return redirect(url_for('view_case', case_id=case_id))
+        
+        if result['errors']:
+            flash(f"Imported {result['imported']} files with {len(result['errors'])} errors", "warning")
+        elif not result['imported'] and not result['linked']:
+            flash("No new files found in Google Drive", "info")
+        else:
+            flash(f"Successfully imported {result['imported']} files from Google Drive", "success")
+        return redirect(url_for('view_case', case_id=case_id))
+
     # Error handlers
     @app.errorhandler(404)
     def page_not_found(e):
@@ -738,14 +1142,111 @@ def create_app(config_name='default'):
     def internal_server_error(e):
         return render_template('500.html', title='Server Error'), 500
     
-    # Create database tables
-    with app.app_context():
-        # Import models here to avoid circular imports
-        from app.models.case import Case
+    @app.cli.command('repair-counters')
+    def repair_counters_command():
+        """Recompute the case and prefix document counters from the documents table."""
+        from app.models.counters import repair_counters
+        
+        updated = repair_counters()
+        for table, count in updated.items():
+            print(f"Recomputed counters for {count} rows in {table}")
+    
+    @app.cli.command('extract-entities')
+    @click.option('--processes', default=1, show_default=True, help='spaCy worker processes (n_process).')
+    @click.option('--batch-size', default=64, show_default=True, help='Pages per nlp.pipe batch.')
+    @click.option('--all', 'reextract', is_flag=True, help='Re-extract documents that were already processed.')
+    def extract_entities(processes, batch_size, reextract):
+        """Extract people, organizations, dates and amounts from stored page text."""
         from app.models.document import Document
-        from app.models.tag import Tag
-        from app.models.bates_prefix import BatesPrefix
-        db.create_all()
-        create_default_tags(app)
+        from app.utils.entities import EntityExtractor, ExtractionUnavailable
+        
+        if reextract:
+            Document.query.update({Document.entities_extracted_at: None}, synchronize_session=False)
+            db.session.commit()
+        
+        extractor = EntityExtractor(
+            model=app.config['SPACY_MODEL'],
+            batch_size=batch_size,
+            n_process=processes
+        )
+        try:
+            processed = extractor.run_pending()
+        except ExtractionUnavailable as e:
+            print(f"FAIL {e}")
+            raise SystemExit(1)
+        print(f"Extracted entities for {processed} documents")
+    
+    @app.cli.command('index-text')
+    def index_text():
+        """Extract page text for documents indexed before full-text search."""
+        from app.models.document import Document
+        from app.models.document_page import DocumentPage
+        from app.utils.bates import BatesManager
+        
+        bates_manager = BatesManager()
+        documents = Document.query.filter(
+            Document.pages.any(DocumentPage.text.is_(None))
+        ).all()
+        
+        updated = 0
+        for document in documents:
+            try:
+                updated += bates_manager.refresh_page_text(document)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                app.logger.error("Error indexing text for document %s: %s", document.id, e)
+        
+        print(f"Indexed text for {updated} pages in {len(documents)} documents")
+    
+    @app.cli.command('sync-drive')
+    @click.option('--case-id', type=int, help='Sync only this case.')
+    @click.option('--full', is_flag=True, help='List the whole Bates folder instead of reading the changes feed.')
+    def sync_drive(case_id, full):
+        """Import new files from the Bates folders of Drive-enabled cases (for cron or Cloud Scheduler)."""
+        from app.models.case import Case
+        from app.utils.drive import get_drive_manager
+        from app.utils.drive_sync import sync_case, syncable_cases
+        
+        if case_id:
+            cases = [case for case in [Case.query.get(case_id)] if case is not None]
+            if not cases:
+                print(f"FAIL  case {case_id}: not found")
+                raise SystemExit(1)
+        else:
+            cases = syncable_cases()
+        failed = False
+        for case in cases:
+            try:
+                result = sync_case(case, get_drive_manager(), full=full)
+            except Exception as e:
+                failed = True
+                print(f"FAIL  case {case.id}: {str(e)}")
+                continue
+            print(
+                f"OK    case {case.id}: {result['imported']} imported, {result['linked']} linked, "
+                f"{result['skipped']} already synced, {len(result['errors'])} errors "
+                f"({'full listing' if result['full'] else 'changes feed'}, {result['examined']} files examined)"
+            )
+            for error in result['errors']:
+                print(f"      {error}")
+        if failed:
+            raise SystemExit(1)
+    
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create the tables of a new database, or migrate an existing one, and add the default tags."""
+        init_database(app, stamp=True)
+        print(f"Initialized {db.engine.url.render_as_string(hide_password=True)}")
+    
+    # Development convenience; deployed workers leave the schema to `flask init-db`
+    if app.config['AUTO_INIT_DB']:
+        init_database(app, stamp=True)
+    
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if elapsed_ms > app.config['STARTUP_BUDGET_MS']:
+        app.logger.warning("Application created in %.0f ms, over the %s ms budget", elapsed_ms, app.config['STARTUP_BUDGET_MS'])
+    else:
+        app.logger.info("Application created in %.0f ms", elapsed_ms)
     
     return app
\ No newline at end of file
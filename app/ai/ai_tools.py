@@ -1,11 +1,20 @@
 # ai/ai_utils.py
 
-import pdfplumber
-from openai import OpenAI
+import os
 
-client = OpenAI(api_key='YOUR_API_KEY')
+_client = None
+
+def get_client():
+    """Create the OpenAI client on first use rather than at import."""
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(api_key=os.environ.get('OPENAI_API_KEY', 'YOUR_API_KEY'))
+    return _client
 
 def extract_text(pdf_path, max_pages=5):
+    import pdfplumber
+    
     text = ""
     with pdfplumber.open(pdf_path) as pdf:
         for page in pdf.pages[:5]:  # Limit to first 5 pages
@@ -25,10 +34,8 @@ def detect_bates_with_ai(pdf_text):
     - Answer clearly with "Yes" or "No".
     - If "Yes", specify the exact Bates numbering pattern detected.
     """
-    
-    client = OpenAI(api_key='YOUR_API_KEY')
 
-    response = client.chat.completions.create(
+    response = get_client().chat.completions.create(
         model='gpt-4-turbo',
         messages=[{'role': 'user', 'content': prompt}],
         temperature=0,
@@ -1,41 +1,48 @@
 import os
-from google.cloud import secretmanager
-
-def get_secret(secret_id, version="latest"):
-    """Get secret from Secret Manager."""
-    project_id = os.environ.get("GOOGLE_CLOUD_PROJECT", "coretext-452113")
-    client = secretmanager.SecretManagerServiceClient()
-    name = f"projects/{project_id}/secrets/{secret_id}/versions/{version}"
-    try:
-        response = client.access_secret_version(name=name)
-        return response.payload.data.decode('UTF-8')
-    except Exception:
-        return None
 
 class Config:
     """Base configuration."""
     APP_NAME = "CoreText"
-    SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-key-for-testing-only'
+    SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-key-for-coretext'
     GOOGLE_CLIENT_SECRETS_FILE = os.environ.get('GOOGLE_CLIENT_SECRETS_FILE') or 'credentials.json'
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER') or 'uploads'
-    
+
     # Database configuration
     DB_USER = os.environ.get('DB_USER') or 'tryan'
-    DB_PASSWORD = os.environ.get('DB_PASSWORD') or get_secret("coretext-db-password")
     DB_NAME = os.environ.get('DB_NAME') or 'coretext_db'
     DB_HOST = os.environ.get('DB_HOST') or 'localhost'
-    
+
     # For Cloud SQL with proxy
     CLOUD_SQL_CONNECTION_NAME = os.environ.get('CLOUD_SQL_CONNECTION_NAME') or 'coretext-452113:us-central1:coretext-db'
-    
+
+    # Optional read replica; read-only views are routed to it (see app.utils.replica)
+    SQLALCHEMY_REPLICA_URI = os.environ.get('REPLICA_DATABASE_URL')
+
     # SQLAlchemy
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Create missing tables and default tags when the app is created. Off by
+    # default so workers start without touching the database; deployments run
+    # `flask init-db` before starting gunicorn instead (see the Dockerfile).
+    AUTO_INIT_DB = os.environ.get('AUTO_INIT_DB', '0') == '1'
+
+    # Warn when creating the app takes longer than this
+    STARTUP_BUDGET_MS = int(os.environ.get('STARTUP_BUDGET_MS', 1500))
+    # tests/test_import_time.py fails when importing app and its views takes longer
+    IMPORT_BUDGET_MS = int(os.environ.get('IMPORT_BUDGET_MS', 1000))
+
+    @classmethod
+    def init_app(cls, app):
+        """Finish configuration that depends on the environment at startup."""
+        pass
+
 class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
-    # Local development SQLite database
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///coretext_dev.db'
+    # Local development SQLite database (relative to the app package)
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///coretext.db'
+    # `python app.py` sets up (or migrates) the local database itself
+    AUTO_INIT_DB = os.environ.get('AUTO_INIT_DB', '1') == '1'
 
 class TestingConfig(Config):
     """Testing configuration."""
@@ -45,9 +52,63 @@ class TestingConfig(Config):
 class ProductionConfig(Config):
     """Production configuration."""
     DEBUG = False
-    
-    # Format for Cloud SQL Proxy
-    SQLALCHEMY_DATABASE_URI = f"postgresql://{Config.DB_USER}:{Config.DB_PASSWORD}@{Config.DB_HOST}/{Config.DB_NAME}?host=/cloudsql/{Config.CLOUD_SQL_CONNECTION_NAME}"
+
+    # Gunicorn process model; each worker process gets its own pool
+    GUNICORN_WORKERS = int(os.environ.get('GUNICORN_WORKERS', 1))
+    GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', 8))
+
+    # Cloud SQL closes idle connections, so pooled ones are checked before use
+    # and replaced well before the server-side idle limit
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 10))
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+    DB_CONNECT_TIMEOUT = int(os.environ.get('DB_CONNECT_TIMEOUT', 10))
+
+    @classmethod
+    def init_app(cls, app):
+        # Sessions must not be signed with the development key
+        if not os.environ.get('SECRET_KEY'):
+            raise RuntimeError("SECRET_KEY must be set in production")
+
+        # Format for Cloud SQL Proxy. Without DB_PASSWORD the password comes
+        # from the secret store when the first connection is opened, so
+        # creating the app makes no network calls (see app.utils.secrets).
+        password = os.environ.get('DB_PASSWORD')
+        if password is None:
+            app.config.setdefault('DATABASE_PASSWORD_SECRET', 'coretext-db-password')
+        credentials = f"{cls.DB_USER}:{password}" if password is not None else cls.DB_USER
+        app.config.setdefault(
+            'SQLALCHEMY_DATABASE_URI',
+            f"postgresql://{credentials}@{cls.DB_HOST}/{cls.DB_NAME}?host=/cloudsql/{cls.CLOUD_SQL_CONNECTION_NAME}"
+        )
+        options = app.config['SQLALCHEMY_ENGINE_OPTIONS'] = production_engine_options(app.config)
+        app.logger.info(
+            "Database pool: %s+%s connections per worker, up to %s across %s workers",
+            options['pool_size'], options['max_overflow'],
+            cls.GUNICORN_WORKERS * (options['pool_size'] + options['max_overflow']), cls.GUNICORN_WORKERS
+        )
+
+def production_engine_options(config):
+    """
+    Build Postgres engine options sized to the gunicorn process model.
+
+    One pooled connection per request thread, plus a little overflow for
+    background work (entity extraction, CLI commands run in-process). The
+    total a deployment can open is workers * (pool_size + max_overflow),
+    which must stay below the Cloud SQL instance's max_connections.
+    """
+    threads = config['GUNICORN_THREADS']
+    return {
+        'pool_size': threads,
+        'max_overflow': max(2, threads // 4),
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True,
+        'connect_args': {
+            'connect_timeout': config['DB_CONNECT_TIMEOUT'],
+            'options': f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}",
+        },
+    }
 
 config = {
     'development': DevelopmentConfig,
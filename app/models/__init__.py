@@ -1,2 +1,9 @@
 from app.models.case import Case
 from app.models.document import Document
+from app.models.document_page import DocumentPage
+from app.models.document_entity import DocumentEntity
+from app.models.tag import Tag
+from app.models.bates_prefix import BatesPrefix
+
+# Registers the listeners that maintain the Case/BatesPrefix counters
+from app.models import counters
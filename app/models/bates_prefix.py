@@ -3,6 +3,9 @@ from datetime import datetime
 
 class BatesPrefix(db.Model):
     __tablename__ = 'bates_prefixes'
+    __table_args__ = (
+        db.Index('ix_bates_prefixes_case_default', 'case_id', 'is_default'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     case_id = db.Column(db.Integer, db.ForeignKey('cases.id'), nullable=False)
@@ -10,6 +13,13 @@ class BatesPrefix(db.Model):
     description = db.Column(db.String(200))
     is_default = db.Column(db.Boolean, default=False)
     current_sequence = db.Column(db.Integer, default=1)
+    
+    # Denormalized usage counters, maintained by app.models.counters
+    document_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    page_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    total_bytes = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+    last_activity_at = db.Column(db.DateTime)
+    
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
@@ -1,48 +1,33 @@
 # File: app/models/case.py
 from app import db
 from datetime import datetime
+from sqlalchemy.orm import attributes
 from app.models.document_tag import DocumentTag
+from app.models.bates_prefix import BatesPrefix
 
-prefixes = db.relationship('BatesPrefix', backref='case', lazy='dynamic', cascade='all, delete-orphan')
-
-
-
-@property
-def current_sequence(self):
-    default_prefix = self.prefixes.filter_by(is_default=True).first()
-    return default_prefix.current_sequence if default_prefix else 1
-
-@current_sequence.setter
-def current_sequence(self, value):
-    """Set the current sequence on the default prefix."""
-    default_prefix = self.prefixes.filter_by(is_default=True).first()
-    if default_prefix:
-        default_prefix.current_sequence = value
 
 class Case(db.Model):
     """Case model for CoreText document management system."""
-    
+
     __tablename__ = 'cases'
-    
+
     id = db.Column(db.Integer, primary_key=True)
-    
+
     case_name = db.Column(db.String(100), nullable=False)
     case_number = db.Column(db.String(50))
 
-
-
-    #bates_prefix = db.Column(db.String(20), nullable=False)
-    bates_prefix = db.Column(db.String(50), nullable=True)
-    current_sequence = db.Column(db.Integer, default=1)
+    # Legacy column superseded by the default BatesPrefix. It stays mapped
+    # because the table still has it, but is no longer read or written.
+    _current_sequence = db.Column('current_sequence', db.Integer, default=1)
     description = db.Column(db.Text)
-    
+
     custom_tags = db.relationship(
-        'Tag', 
-        back_populates='parent_case', 
+        'Tag',
+        back_populates='parent_case',
         overlaps="case_tags",
         lazy='dynamic'
     )
-    
+
     google_drive_enabled = db.Column(db.Boolean, default=False)
     gdrive_root_folder = db.Column(db.String(255))
     gdrive_original_path = db.Column(db.String(255), default='Documents/Original')
@@ -50,56 +35,82 @@ class Case(db.Model):
     document_types = db.Column(db.Text)  # JSON string
     drive_original_folder_id = db.Column(db.String(255))
     drive_bates_folder_id = db.Column(db.String(255))
+    # Drive changes feed position reached by the last sync (see app.utils.drive_sync)
+    drive_changes_token = db.Column(db.String(255))
 
     # Add relationship to BatesPrefix
     prefixes = db.relationship(
-        'BatesPrefix', 
-        backref='case', 
-        lazy='dynamic', 
+        'BatesPrefix',
+        backref='case',
+        lazy='dynamic',
         cascade='all, delete-orphan'
     )
-    
+
+    # The default prefix, loaded at most once per instance. Because the session
+    # is scoped to the request, every read of bates_prefix, current_sequence
+    # and next_bates_number during a request shares this single load; list
+    # views can fetch it for all cases up front with selectinload().
+    default_prefix = db.relationship(
+        'BatesPrefix',
+        primaryjoin='and_(Case.id == BatesPrefix.case_id, BatesPrefix.is_default == True)',
+        uselist=False,
+        viewonly=True
+    )
+
+    # Denormalized counters, maintained by app.models.counters
+    document_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    page_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    total_bytes = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+    last_activity_at = db.Column(db.DateTime)
+
+    # Bumped on every write to the case's documents, tags or prefixes; part of
+    # every result cache key for the case
+    cache_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    
+
     # Relationships
     documents = db.relationship(
-        'Document', 
+        'Document',
         backref='case',
         cascade='all, delete-orphan'
     )
-    
+
     def __repr__(self):
         return f'<Case {self.case_name}>'
-    
 
     @property
     def bates_prefix(self):
-        default_prefix = self.prefixes.filter_by(is_default=True).first()
-        return default_prefix.prefix if default_prefix else ""
+        """Get the prefix string of the default Bates prefix."""
+        return self.default_prefix.prefix if self.default_prefix else ""
 
+    @bates_prefix.setter
     def bates_prefix(self, value):
-        default_prefix = self.prefixes.filter_by(is_default=True).first()
-        if default_prefix:
-            default_prefix.prefix = value
+        if self.default_prefix:
+            self.default_prefix.prefix = value
         else:
             # If no default prefix exists, create one explicitly
             new_prefix = BatesPrefix(
-                case_id=self.id,
                 prefix=value,
                 is_default=True
             )
-            db.session.add(new_prefix)
+            self.prefixes.append(new_prefix)
+            attributes.set_committed_value(self, 'default_prefix', new_prefix)
 
     @property
-    def document_count(self):
-        """Get the number of documents in this case."""
-        return len(self.documents)
-    
+    def current_sequence(self):
+        """Get the next sequence number of the default Bates prefix."""
+        return self.default_prefix.current_sequence if self.default_prefix else 1
+
+    @current_sequence.setter
+    def current_sequence(self, value):
+        """Set the current sequence on the default prefix."""
+        if self.default_prefix:
+            self.default_prefix.current_sequence = value
+
     @property
     def next_bates_number(self):
         """Get the next formatted Bates number that will be assigned."""
-        return f"{self.bates_prefix}{str(self.current_sequence).zfill(6)}"
-
-    
\ No newline at end of file
+        return f"{self.bates_prefix}-{str(self.current_sequence).zfill(6)}"
@@ -0,0 +1,219 @@
+# File: app/models/counters.py
+from datetime import datetime
+from itertools import chain
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app import db
+from app.models.case import Case
+from app.models.bates_prefix import BatesPrefix
+from app.models.document import Document
+from app.models.document_page import DocumentPage
+from app.models.tag import Tag
+
+# Denormalized counters on cases and bates_prefixes, keyed by the document
+# column that points at the owning row.
+COUNTER_OWNERS = (
+    (Case.__table__, 'case_id'),
+    (BatesPrefix.__table__, 'prefix_id'),
+)
+
+
+def _adjust(connection, table, row_id, documents=0, pages=0, size=0):
+    """Apply counter deltas to one row as an in-place UPDATE."""
+    if row_id is None:
+        return
+    connection.execute(
+        table.update()
+        .where(table.c.id == row_id)
+        .values(
+            document_count=table.c.document_count + documents,
+            page_count=table.c.page_count + pages,
+            total_bytes=table.c.total_bytes + size,
+            last_activity_at=datetime.utcnow()
+        )
+    )
+
+
+def _previous(state, key):
+    """Return the value an attribute had when the document was loaded."""
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return None
+
+
+# The listeners run inside the flush, on the flush's own connection, so the
+# counters commit or roll back together with the document rows themselves.
+
+@event.listens_for(Document, 'after_insert')
+def _document_inserted(mapper, connection, target):
+    for table, key in COUNTER_OWNERS:
+        _adjust(connection, table, getattr(target, key),
+                1, target.page_count or 0, target.file_size or 0)
+
+
+@event.listens_for(Document, 'after_delete')
+def _document_deleted(mapper, connection, target):
+    state = inspect(target)
+    for table, key in COUNTER_OWNERS:
+        _adjust(connection, table, _previous(state, key),
+                -1, -(_previous(state, 'page_count') or 0), -(_previous(state, 'file_size') or 0))
+
+
+# Document attributes the counters depend on; other updates (entity
+# extraction, tagging, bulk edits) are not activity and leave them alone
+COUNTED_ATTRIBUTES = ('page_count', 'file_size') + tuple(key for _, key in COUNTER_OWNERS)
+
+
+@event.listens_for(Document, 'after_update')
+def _document_updated(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[key].history.has_changes() for key in COUNTED_ATTRIBUTES):
+        return
+
+    old_pages = _previous(state, 'page_count') or 0
+    old_size = _previous(state, 'file_size') or 0
+    new_pages = target.page_count or 0
+    new_size = target.file_size or 0
+
+    for table, key in COUNTER_OWNERS:
+        old_owner = _previous(state, key)
+        new_owner = getattr(target, key)
+        if old_owner == new_owner:
+            if new_pages == old_pages and new_size == old_size:
+                continue
+            # Restamped or re-uploaded in place: adjust by the difference
+            _adjust(connection, table, new_owner, 0, new_pages - old_pages, new_size - old_size)
+        else:
+            # Moved to another case or prefix
+            _adjust(connection, table, old_owner, -1, -old_pages, -old_size)
+            _adjust(connection, table, new_owner, 1, new_pages, new_size)
+
+
+# Cache versions. Writes are collected per flush and each affected case is
+# bumped once, after the flush, in the same transaction as the writes.
+
+# Objects whose writes change what a case's listings and searches return
+VERSIONED_MODELS = (Case, Document, DocumentPage, BatesPrefix, Tag)
+
+# Document bookkeeping columns that no listing or search shows; updates
+# that only touch these (e.g., the entity worker marking documents as
+# extracted) keep the case's cached pages and similarity index
+UNVERSIONED_ATTRIBUTES = frozenset({'entities_extracted_at', 'last_accessed'})
+
+# Marker for writes that affect every case (e.g., default tags)
+ALL_CASES = object()
+
+
+def _bookkeeping_only(obj):
+    """Return whether a dirty document changed nothing but bookkeeping columns."""
+    state = inspect(obj)
+    changed = {attr.key for attr in state.attrs if attr.history.has_changes()}
+    return changed <= UNVERSIONED_ATTRIBUTES
+
+
+def _owning_case_ids(obj):
+    """Return the ids of the cases an object belongs to, before and after changes."""
+    if isinstance(obj, Case):
+        return {obj.id}
+
+    state = inspect(obj)
+    ids = {obj.case_id, _previous(state, 'case_id')}
+    # Objects attached through a relationship only get case_id during the flush
+    owner = obj.parent_case if isinstance(obj, Tag) else getattr(obj, 'case', None)
+    if owner is not None:
+        ids.add(owner.id)
+    if isinstance(obj, Tag) and obj.is_default:
+        ids.add(ALL_CASES)
+    return ids
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_changed_cases(session, flush_context, instances):
+    changed = session.info.setdefault('changed_case_ids', set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, VERSIONED_MODELS):
+            continue
+        # Tagging a document also dirties the tag's collection; the document
+        # side already accounts for it, so a default tag there is no global change
+        if isinstance(obj, Tag) and obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+        if isinstance(obj, Document) and obj in session.dirty and _bookkeeping_only(obj):
+            continue
+        changed.update(_owning_case_ids(obj))
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_cache_versions(session, flush_context):
+    changed = session.info.pop('changed_case_ids', None)
+    if not changed:
+        return
+
+    cases = Case.__table__
+    statement = cases.update().values(cache_version=cases.c.cache_version + 1)
+    if ALL_CASES not in changed:
+        # New cases have no id yet and nothing cached, so None is skipped
+        ids = {case_id for case_id in changed if case_id is not None}
+        if not ids:
+            return
+        statement = statement.where(cases.c.id.in_(ids))
+    session.connection().execute(statement)
+
+
+def bump_cache_versions(case_ids, session=None):
+    """
+    Bump the cache version of the given cases.
+
+    Bulk Core statements (INSERT ... SELECT, set-based UPDATE and DELETE)
+    bypass the flush listeners above, so their callers bump the affected
+    cases explicitly, in the same transaction.
+
+    Args:
+        case_ids: Iterable of case ids, or a select of them
+    """
+    session = session or db.session
+    cases = Case.__table__
+    session.execute(
+        cases.update()
+        .where(cases.c.id.in_(case_ids))
+        .values(cache_version=cases.c.cache_version + 1)
+    )
+
+
+def repair_counters(session=None):
+    """
+    Recompute every counter from the documents table.
+
+    Runs one correlated UPDATE per counter table, so the work stays in the
+    database regardless of how many cases or documents there are.
+
+    Returns:
+        dict: Number of rows updated per table
+    """
+    session = session or db.session
+    documents = Document.__table__
+    updated = {}
+
+    for table, key in COUNTER_OWNERS:
+        owned = documents.c[key] == table.c.id
+
+        def aggregate(expression):
+            return db.select(expression).where(owned).scalar_subquery()
+
+        result = session.execute(
+            table.update().values(
+                document_count=aggregate(db.func.count(documents.c.id)),
+                page_count=aggregate(db.func.coalesce(db.func.sum(documents.c.page_count), 0)),
+                total_bytes=aggregate(db.func.coalesce(db.func.sum(documents.c.file_size), 0)),
+                last_activity_at=db.func.coalesce(
+                    aggregate(db.func.max(documents.c.upload_date)),
+                    table.c.last_activity_at
+                )
+            )
+        )
+        updated[table.name] = result.rowcount
+
+    session.commit()
+    return updated
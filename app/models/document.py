@@ -1,13 +1,26 @@
 # File: app/models/document.py
 from app import db
 from datetime import datetime
+from sqlalchemy.orm import joinedload, load_only
 from app.models.document_tag import DocumentTag
+from app.models.document_page import DocumentPage
+from app.models.document_entity import DocumentEntity
 
 
 class Document(db.Model):
     """Document model for CoreText document management system."""
     
     __tablename__ = 'documents'
+    __table_args__ = (
+        db.Index('ix_documents_prefix_range', 'prefix_id', 'start_seq', 'end_seq'),
+        db.Index('ix_documents_case_sequence', 'case_id', 'bates_sequence', 'id'),
+        db.Index('ix_documents_case_upload_date', 'case_id', 'upload_date'),
+        db.Index('ix_documents_case_filename', 'case_id', 'original_filename'),
+        db.Index('ix_documents_bates_number', 'bates_number'),
+        db.Index('ix_documents_case_document_type', 'case_id', 'document_type'),
+        db.Index('ix_documents_case_gdrive_file', 'case_id', 'gdrive_file_id'),
+        db.UniqueConstraint('case_id', 'bates_number', name='uq_documents_case_bates_number'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     case_id = db.Column(db.Integer, db.ForeignKey('cases.id'), nullable=False)
@@ -26,6 +39,23 @@ class Document(db.Model):
         overlaps="tags,documents"
     )
     
+    # Page-level Bates index (one row per stamped page)
+    pages = db.relationship(
+        'DocumentPage',
+        backref='document',
+        cascade='all, delete-orphan',
+        order_by='DocumentPage.page_index'
+    )
+    
+    # Named entities found in the page text
+    entities = db.relationship(
+        'DocumentEntity',
+        backref='document',
+        cascade='all, delete-orphan',
+        lazy='dynamic'
+    )
+    entities_extracted_at = db.Column(db.DateTime)          # None until extraction has run
+    
     # File information
     original_filename = db.Column(db.String(255), nullable=False)
     file_extension = db.Column(db.String(10), nullable=False)
@@ -36,19 +66,63 @@ class Document(db.Model):
     bates_sequence = db.Column(db.Integer, nullable=False)   # Sequence number in case
     bates_start = db.Column(db.String(50), nullable=False)   # First page Bates (e.g., ABC000001-001)
     bates_end = db.Column(db.String(50), nullable=False)     # Last page Bates (e.g., ABC000001-042)
+    prefix_id = db.Column(db.Integer, db.ForeignKey('bates_prefixes.id'))  # Prefix the range was issued from
+    start_seq = db.Column(db.Integer)                        # First page number in the range
+    end_seq = db.Column(db.Integer)                          # Last page number in the range
     page_count = db.Column(db.Integer, default=1)            # Number of pages
     existing_bates = db.Column(db.Boolean, default=False)
     bates_note = db.Column(db.String(255))
     
+    # Classification (one of the case's document types, e.g., Email)
+    document_type = db.Column(db.String(50))
+    
     # Storage information
     local_path = db.Column(db.String(255))                   # Local file path
+    gdrive_file_id = db.Column(db.String(255))               # Stamped copy in the case's Drive folder
     
     # Timestamps
     upload_date = db.Column(db.DateTime, default=datetime.utcnow)
+    last_accessed = db.Column(db.DateTime)                   # Buffered, see app.utils.access
     
     def __repr__(self):
         return f'<Document {self.bates_number} - {self.original_filename}>'
     
+    @classmethod
+    def listing_options(cls, with_case=False):
+        """
+        Loader options for document listings.
+        
+        Only the columns the listing templates show are selected. With
+        with_case, the owning case's name is joined into the same query so
+        rendering doc.case does not issue one query per row.
+        """
+        from app.models.case import Case
+        
+        options = [load_only(
+            cls.id, cls.case_id, cls.original_filename, cls.file_extension,
+            cls.bates_number, cls.bates_sequence, cls.bates_start, cls.bates_end,
+            cls.page_count, cls.upload_date
+        )]
+        if with_case:
+            options.append(joinedload(cls.case).load_only(Case.id, Case.case_name))
+        return options
+    
+    def to_dict(self):
+        """Return the listing fields of the document as a JSON-serializable dict."""
+        return {
+            'id': self.id,
+            'case_id': self.case_id,
+            'original_filename': self.original_filename,
+            'file_extension': self.file_extension,
+            'file_size': self.file_size,
+            'bates_number': self.bates_number,
+            'bates_start': self.bates_start,
+            'bates_end': self.bates_end,
+            'page_count': self.page_count,
+            'document_type': self.document_type,
+            'upload_date': self.upload_date.isoformat() if self.upload_date else None
+        }
+    
     @property
     def file_type_icon(self):
         """Return an appropriate icon class based on file extension."""
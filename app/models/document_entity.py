@@ -0,0 +1,34 @@
+# File: app/models/document_entity.py
+import re
+from app import db
+
+
+def normalize_entity(text):
+    """Build the lookup key for an entity mention (case and spacing insensitive)."""
+    return re.sub(r'\s+', ' ', text or '').strip().lower()
+
+
+class DocumentEntity(db.Model):
+    """Named entity mentioned on a document page.
+
+    Rows are written by the entity extraction stage from stored page text, so
+    searches such as "documents mentioning Fred Pollard" are an index lookup
+    on the normalized mention instead of a scan over page text.
+    """
+
+    __tablename__ = 'document_entities'
+    __table_args__ = (
+        db.Index('ix_document_entities_normalized', 'normalized', 'case_id', 'label'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    document_id = db.Column(db.Integer, db.ForeignKey('documents.id'), nullable=False, index=True)
+    case_id = db.Column(db.Integer, db.ForeignKey('cases.id'), nullable=False)
+    page_index = db.Column(db.Integer, nullable=False)      # Zero-based page the mention is on
+
+    label = db.Column(db.String(20), nullable=False)        # PERSON, ORG, DATE or MONEY
+    text = db.Column(db.String(255), nullable=False)        # Mention as written
+    normalized = db.Column(db.String(255), nullable=False)  # Lookup key, see normalize_entity
+
+    def __repr__(self):
+        return f'<DocumentEntity {self.label} {self.text!r}>'
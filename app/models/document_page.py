@@ -0,0 +1,69 @@
+# File: app/models/document_page.py
+from app import db
+from sqlalchemy import DDL, event
+
+
+class DocumentPage(db.Model):
+    """Page-level Bates index for CoreText documents.
+
+    One row is stored per stamped page so that any page's Bates number can be
+    resolved with a single index lookup on (prefix, sequence).
+    """
+
+    __tablename__ = 'document_pages'
+    __table_args__ = (
+        db.Index('ix_document_pages_prefix_sequence', 'prefix', 'sequence'),
+        db.Index('ix_document_pages_case_document', 'case_id', 'document_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    document_id = db.Column(db.Integer, db.ForeignKey('documents.id'), nullable=False, index=True)
+    case_id = db.Column(db.Integer, db.ForeignKey('cases.id'), nullable=False)
+
+    # Bates label stamped on the page, split for indexed lookups
+    prefix = db.Column(db.String(50), nullable=False)        # e.g., Jones-Pltf
+    sequence = db.Column(db.Integer, nullable=False)         # e.g., 57
+    bates_number = db.Column(db.String(60), nullable=False)  # e.g., Jones-Pltf-000057
+    page_index = db.Column(db.Integer, nullable=False)       # Zero-based page within the document
+
+    # Per-page metadata
+    width = db.Column(db.Float)                              # Points
+    height = db.Column(db.Float)                             # Points
+    rotation = db.Column(db.Integer, default=0)              # Degrees
+    text = db.Column(db.Text)                                # Extracted page text
+
+    def __repr__(self):
+        return f'<DocumentPage {self.bates_number} (page {self.page_number})>'
+
+    @property
+    def page_number(self):
+        """Return the one-based page number within the document."""
+        return self.page_index + 1
+
+
+# Full-text index over page text. On SQLite an FTS5 external-content table is
+# kept in sync by triggers; on Postgres a GIN expression index is maintained by
+# the database itself. Either way every insert, restamp (delete + insert) and
+# delete of page rows updates the index incrementally.
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS document_pages_fts USING fts5("
+    "text, content='document_pages', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS document_pages_fts_insert AFTER INSERT ON document_pages BEGIN "
+    "INSERT INTO document_pages_fts(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS document_pages_fts_delete AFTER DELETE ON document_pages BEGIN "
+    "INSERT INTO document_pages_fts(document_pages_fts, rowid, text) VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER IF NOT EXISTS document_pages_fts_update AFTER UPDATE OF text ON document_pages BEGIN "
+    "INSERT INTO document_pages_fts(document_pages_fts, rowid, text) VALUES ('delete', old.id, old.text); "
+    "INSERT INTO document_pages_fts(rowid, text) VALUES (new.id, new.text); END",
+]
+
+POSTGRES_FTS_DDL = [
+    "CREATE INDEX IF NOT EXISTS ix_document_pages_text_fts ON document_pages "
+    "USING gin (to_tsvector('english', coalesce(text, '')))",
+]
+
+for statement in SQLITE_FTS_DDL:
+    event.listen(DocumentPage.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+
+for statement in POSTGRES_FTS_DDL:
+    event.listen(DocumentPage.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
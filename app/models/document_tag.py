@@ -2,6 +2,11 @@ from app import db
 
 class DocumentTag(db.Model):
     __tablename__ = 'document_tags'
+    __table_args__ = (
+        # The primary key leads with document_id; tag filters and facet
+        # counts look documents up by tag instead
+        db.Index('ix_document_tags_tag_document', 'tag_id', 'document_id'),
+    )
 
     document_id = db.Column(db.Integer, db.ForeignKey('documents.id'), primary_key=True)
     tag_id = db.Column(db.Integer, db.ForeignKey('tags.id'), primary_key=True)
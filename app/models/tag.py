@@ -23,7 +23,7 @@ class Tag(db.Model):
         overlaps="documents,tags"
     )
 
-    case_id = db.Column(db.Integer, db.ForeignKey('cases.id'))
+    case_id = db.Column(db.Integer, db.ForeignKey('cases.id'), index=True)
     parent_case = db.relationship(
         'Case',
         back_populates='custom_tags',
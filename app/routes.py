@@ -1,7 +1,9 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, jsonify, send_file, session
 from app import db
 from app.models import Case, Document, Tag
-from app.utils import BatesManager, GoogleDriveManager
+from app.utils import BatesManager
+from app.utils.drive import get_drive_manager, get_drive_folder_cache
+from app.utils.drive_sync import sync_case, DriveSyncConflict
 import os
 from datetime import datetime
 from werkzeug.utils import secure_filename
@@ -66,7 +68,7 @@ def new_case():
             try:
                 credentials_path = current_app.config['GOOGLE_CLIENT_SECRETS_FILE']
                 if os.path.exists(credentials_path):
-                    drive_manager = GoogleDriveManager(credentials_path=credentials_path)
+                    drive_manager = get_drive_manager()
                     
                     # Create or ensure folder structure exists
                     folder_structure = drive_manager.create_or_verify_folder_structure(
@@ -273,250 +275,6 @@ def upload_document(case_id):
             )
             
             flash(f"Document uploaded and assigned Bates numbers: {result['bates_start']} to {result['bates_end']}")
-            else:
-                flash(f"{len(results)} documents imported successfully")
-        else:
-            flash(f"Some documents could not be imported. {sum(1 for r in results if r['success'])} succeeded, {sum(1 for r in results if not r['success'])} failed.")
-        
-        return redirect(url_for('main.case', case_id=case_id))
-    
-    # List files in the folder
-    try:
-        credentials_path = current_app.config['GOOGLE_CLIENT_SECRETS_FILE']
-        drive_manager = GoogleDriveManager(credentials_path=credentials_path)
-        
-        # Get folder contents
-        contents = drive_manager.list_folder_contents(folder_id)
-        
-        # Get folder path/breadcrumbs
-        if not parent_folders and folder_id != case.drive_folder_id:
-            # Try to reconstruct path
-            current_id = folder_id
-            path = []
-            
-            while current_id and current_id != case.drive_folder_id:
-                folder_info = drive_manager.get_folder_info(current_id)
-                if folder_info:
-                    path.insert(0, {
-                        'id': current_id,
-                        'name': folder_info.get('name', 'Unknown Folder')
-                    })
-                    parents = folder_info.get('parents', [])
-                    current_id = parents[0] if parents else None
-                else:
-                    break
-            
-            # Add root folder
-            if case.drive_folder_id:
-                root_info = drive_manager.get_folder_info(case.drive_folder_id)
-                parent_folders = [{
-                    'id': case.drive_folder_id,
-                    'name': root_info.get('name', case.case_name) if root_info else case.case_name
-                }] + path[:-1]  # Exclude current folder from breadcrumbs
-        
-        # Parse document types for display
-        document_types = []
-        if case.document_types:
-            try:
-                document_types = json.loads(case.document_types)
-            except:
-                document_types = []
-                
-        return render_template(
-            'browse_google_drive.html',
-            title=f'Browse Google Drive for {case.case_name}',
-            case=case,
-            folder_id=folder_id,
-            contents=contents,
-            parent_folders=parent_folders,
-            document_types=document_types
-        )
-    except Exception as e:
-        flash(f"Error accessing Google Drive: {str(e)}", "error")
-        return redirect(url_for('main.case', case_id=case_id))
-
-@main_bp.route('/case/<int:case_id>/sync-with-drive', methods=['POST'])
-def sync_with_drive(case_id):
-    """Synchronize database with Google Drive."""
-    case = Case.query.get_or_404(case_id)
-    
-    if not case.google_drive_enabled:
-        flash("Google Drive is not enabled for this case", "error")
-        return redirect(url_for('main.case', case_id=case_id))
-    
-    try:
-        credentials_path = current_app.config['GOOGLE_CLIENT_SECRETS_FILE']
-        drive_manager = GoogleDriveManager(credentials_path=credentials_path)
-        bates_manager = BatesManager()
-        
-        # Check for new files in Google Drive
-        bates_folder_id = case.drive_bates_folder_id
-        if not bates_folder_id:
-            flash("Bates labeled folder not found in Google Drive", "error")
-            return redirect(url_for('main.case', case_id=case_id))
-        
-        # Get all files in the Bates folder and subfolders
-        drive_files = drive_manager.list_all_files_in_folder(bates_folder_id, recursive=True)
-        
-        # Get existing documents in the database
-        existing_docs = Document.query.filter_by(case_id=case_id).all()
-        existing_file_ids = [doc.gdrive_file_id for doc in existing_docs if doc.gdrive_file_id]
-        
-        # Find new files
-        new_files = [f for f in drive_files if f['id'] not in existing_file_ids]
-        
-        if not new_files:
-            flash("No new files found in Google Drive", "info")
-            return redirect(url_for('main.case', case_id=case_id))
-        
-        # Process new files
-        imported_count = 0
-        errors = []
-        
-        for file in new_files:
-            try:
-                # Extract Bates number from filename if possible
-                filename = file['name']
-                bates_number = None
-                
-                # Simple pattern matching for Bates numbers - might need refinement
-                if case.bates_prefix and filename.startswith(case.bates_prefix):
-                    # Try to extract Bates number from filename
-                    bates_part = filename.split('.')[0]  # Remove extension
-                    if bates_part and bates_part.startswith(case.bates_prefix):
-                        bates_number = bates_part
-                
-                if not bates_number:
-                    # Skip files without recognizable Bates numbers
-                    errors.append(f"Could not extract Bates number from {filename}")
-                    continue
-                
-                # Create document record
-                document = Document(
-                    case_id=case_id,
-                    bates_number=bates_number,
-                    original_filename=filename,
-                    gdrive_file_id=file['id'],
-                    gdrive_file_url=file.get('webViewLink', ''),
-                    file_extension=os.path.splitext(filename)[1],
-                    upload_date=datetime.utcnow()
-                )
-                
-                # Try to parse Bates sequence number
-                if case.bates_prefix and bates_number.startswith(case.bates_prefix):
-                    num_part = bates_number[len(case.bates_prefix):]
-                    try:
-                        document.bates_sequence = int(num_part)
-                    except ValueError:
-                        pass
-                
-                db.session.add(document)
-                imported_count += 1
-            except Exception as e:
-                errors.append(f"Error importing {file['name']}: {str(e)}")
-        
-        db.session.commit()
-        
-        if errors:
-            flash(f"Imported {imported_count} files with {len(errors)} errors", "warning")
-        else:
-            flash(f"Successfully imported {imported_count} files from Google Drive", "success")
-        
-        return redirect(url_for('main.case', case_id=case_id))
-    except Exception as e:
-        flash(f"Error synchronizing with Google Drive: {str(e)}", "error")
-        return redirect(url_for('main.case', case_id=case_id))
-
-# Mobile-specific routes
-@main_bp.route('/mobile/case/<int:case_id>')
-def mobile_case_view(case_id):
-    """Mobile-optimized view for a case."""
-    if not is_mobile():
-        return redirect(url_for('main.case', case_id=case_id))
-    
-    case = Case.query.get_or_404(case_id)
-    
-    # Simplified pagination with fewer results per page
-    page = request.args.get('page', 1, type=int)
-    per_page = 10  # Smaller number for mobile
-    
-    # Simple filtering
-    bates_number = request.args.get('bates_number', '')
-    
-    # Build query
-    query = Document.query.filter_by(case_id=case_id)
-    
-    if bates_number:
-        query = query.filter(
-            db.or_(
-                Document.bates_number.ilike(f'%{bates_number}%'),
-                Document.bates_start.ilike(f'%{bates_number}%'),
-                Document.bates_end.ilike(f'%{bates_number}%')
-            )
-        )
-    
-    # Default sorting
-    query = query.order_by(Document.bates_sequence.desc())
-    
-    # Execute query with pagination
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-    documents = pagination.items
-    
-    return render_template(
-        'mobile/case.html', 
-        title=case.case_name,
-        case=case, 
-        documents=documents, 
-        pagination=pagination
-    )
-
-@main_bp.route('/mobile/document/<int:document_id>')
-def mobile_document_details(document_id):
-    """Mobile-optimized view for document details."""
-    if not is_mobile():
-        return redirect(url_for('main.document_details', document_id=document_id))
-    
-    document = Document.query.get_or_404(document_id)
-    case = Case.query.get(document.case_id)
-    
-    # Update last accessed time
-    document.last_accessed = datetime.utcnow()
-    db.session.commit()
-    
-    return render_template(
-        'mobile/document_details.html', 
-        title=document.original_filename, 
-        document=document, 
-        case=case
-    )
-
-@main_bp.route('/mobile/case/<int:case_id>/upload', methods=['GET', 'POST'])
-def mobile_upload_document(case_id):
-    """Mobile-optimized view for document upload."""
-    if not is_mobile():
-        return redirect(url_for('main.upload_document', case_id=case_id))
-    
-    case = Case.query.get_or_404(case_id)
-    
-    # Handle POST same as regular upload_document
-    if request.method == 'POST':
-        return upload_document(case_id)
-    
-    # For GET, show mobile-optimized upload form
-    document_types = []
-    if case.document_types:
-        try:
-            document_types = json.loads(case.document_types)
-        except:
-            document_types = []
-            
-    return render_template(
-        'mobile/upload_document.html',
-        title=f'Upload to {case.case_name}',
-        case=case,
-        document_types=document_types
-    )
-)
             
             # Apply default tags if any
             document_id = result.get('document_id')
@@ -583,7 +341,7 @@ def case_settings(case_id):
                 try:
                     credentials_path = current_app.config['GOOGLE_CLIENT_SECRETS_FILE']
                     if os.path.exists(credentials_path):
-                        drive_manager = GoogleDriveManager(credentials_path=credentials_path)
+                        drive_manager = get_drive_manager()
                         
                         for doc_type in new_types:
                             if case.drive_original_folder_id:
@@ -631,7 +389,7 @@ def test_google_drive(case_id):
                 'message': 'Google Drive credentials not found'
             })
         
-        drive_manager = GoogleDriveManager(credentials_path=credentials_path)
+        drive_manager = get_drive_manager()
         
         # Test connection and folder existence
         result = drive_manager.test_connection(
@@ -683,8 +441,7 @@ def download_document(document_id):
     elif document.gdrive_file_id:
         try:
             # Download from Google Drive
-            credentials_path = current_app.config['GOOGLE_CLIENT_SECRETS_FILE']
-            drive_manager = GoogleDriveManager(credentials_path=credentials_path)
+            drive_manager = get_drive_manager()
             
             # Create temp directory for download
             temp_dir = tempfile.mkdtemp()
@@ -907,85 +664,188 @@ def browse_google_drive(case_id):
         flash("Google Drive is not enabled for this case", "error")
         return redirect(url_for('main.case', case_id=case_id))
     
-    # Initialize parameters
     folder_id = request.args.get('folder_id') or case.drive_folder_id
-    parent_folders = request.args.get('parents', '[]')
-    
-    try:
-        parent_folders = json.loads(parent_folders)
-    except:
-        parent_folders = []
     
     if request.method == 'POST':
         # Process selected files
         selected_files = request.form.getlist('selected_files')
         if not selected_files:
             flash("No files selected", "error")
-            return redirect(url_for('main.browse_google_drive', case_id=case_id, folder_id=folder_id, parents=json.dumps(parent_folders)))
+            return redirect(url_for('main.browse_google_drive', case_id=case_id, folder_id=folder_id))
         
         # Get document type if provided
         document_type = request.form.get('document_type', '')
         
-        # Process each selected file
-        results = []
-        credentials_path = current_app.config['GOOGLE_CLIENT_SECRETS_FILE']
-        drive_manager = GoogleDriveManager(credentials_path=credentials_path)
-        bates_manager = BatesManager()
+        # Download and stamp in the background; the page polls the job's progress
+        job = current_app.extensions['drive_import'].start(case_id, selected_files, document_type)
+        flash(f"Importing {len(selected_files)} files from Google Drive")
+        return redirect(url_for('main.browse_google_drive', case_id=case_id, folder_id=folder_id, import_job=job.id))
+    
+    # List files in the folder
+    try:
+        drive_manager = get_drive_manager()
+        
+        folder_cache = get_drive_folder_cache(case_id)
         
-        for file_id in selected_files:
+        # Folder contents and the breadcrumb path above them; both come from
+        # the case's folder cache, so only folders not seen recently cost a call
+        contents = folder_cache.children(drive_manager, folder_id)
+        parent_folders = folder_cache.breadcrumbs(drive_manager, folder_id, case.drive_folder_id)
+        
+        # Parse document types for display
+        document_types = []
+        if case.document_types:
             try:
-                # Download file to temp location
-                file_info = drive_manager.get_file_info(file_id)
-                filename = file_info.get('name', 'unknown.pdf')
-                
-                temp_dir = tempfile.mkdtemp()
-                local_path = os.path.join(temp_dir, filename)
-                
-                drive_manager.download_file(file_id, local_path)
-                
-                # Process with Bates manager
-                upload_folder = current_app.config['UPLOAD_FOLDER']
-                
-                google_drive_params = {
-                    'root_folder': case.gdrive_root_folder,
-                    'original_path': case.gdrive_original_path,
-                    'bates_path': case.gdrive_bates_path,
-                    'document_type': document_type,
-                    'folder_id': case.drive_folder_id,
-                    'original_folder_id': case.drive_original_folder_id,
-                    'bates_folder_id': case.drive_bates_folder_id,
-                    'source_file_id': file_id
-                }
-                
-                result = bates_manager.process_document(
-                    case_id, 
-                    local_path, 
-                    filename, 
-                    upload_folder,
-                    document_type=document_type,
-                    google_drive_params=google_drive_params
-                )
-                
-                results.append({
-                    'filename': filename,
-                    'success': True,
-                    'bates_start': result['bates_start'],
-                    'bates_end': result['bates_end']
-                })
+                document_types = json.loads(case.document_types)
+            except:
+                document_types = []
                 
-                # Clean up temp file
-                if os.path.exists(local_path):
-                    os.remove(local_path)
-                if os.path.exists(temp_dir):
-                    os.rmdir(temp_dir)
-            except Exception as e:
-                results.append({
-                    'filename': filename if 'filename' in locals() else 'Unknown file',
-                    'success': False,
-                    'error': str(e)
-                })
-        
-        # Display results
-        if all(r['success'] for r in results):
-            if len(results) == 1:
-                flash(f"Document imported and assigned Bates numbers: {results[0]['bates_start']} to {results[0]['bates_
\ No newline at end of file
+        return render_template(
+            'browse_google_drive.html',
+            title=f'Browse Google Drive for {case.case_name}',
+            case=case,
+            folder_id=folder_id,
+            contents=contents,
+            parent_folders=parent_folders,
+            document_types=document_types,
+            import_job=request.args.get('import_job')
+        )
+    except Exception as e:
+        flash(f"Error accessing Google Drive: {str(e)}", "error")
+        return redirect(url_for('main.case', case_id=case_id))
+
+@main_bp.route('/case/<int:case_id>/drive-imports/<job_id>')
+def drive_import_progress(case_id, job_id):
+    """Per-file progress of a Google Drive import, as JSON."""
+    job = current_app.extensions['drive_import'].get(job_id)
+    if job is None or job.case_id != case_id:
+        return jsonify({'error': 'Import not found'}), 404
+    return jsonify(job.to_dict())
+
+@main_bp.route('/case/<int:case_id>/sync-with-drive', methods=['POST'])
+def sync_with_drive(case_id):
+    """Synchronize database with Google Drive."""
+    case = Case.query.get_or_404(case_id)
+    
+    if not case.google_drive_enabled:
+        flash("Google Drive is not enabled for this case", "error")
+        return redirect(url_for('main.case', case_id=case_id))
+    
+    if not case.drive_bates_folder_id:
+        flash("Bates labeled folder not found in Google Drive", "error")
+        return redirect(url_for('main.case', case_id=case_id))
+    
+    # Only changes since the last sync are read (see app.utils.drive_sync)
+    sync_worker = current_app.extensions['drive_sync']
+    if sync_worker.enabled:
+        sync_worker.submit(case_id)
+        flash("Synchronization with Google Drive started; new documents will appear shortly", "info")
+        return redirect(url_for('main.case', case_id=case_id))
+    
+    try:
+        result = sync_case(case, get_drive_manager())
+    except DriveSyncConflict:
+        flash("Google Drive is already being synchronized for this case", "info")
+        return redirect(url_for('main.case', case_id=case_id))
+    except Exception as e:
+        flash(f"Error synchronizing with Google Drive: {str(e)}", "error")
+        return redirect(url_for('main.case', case_id=case_id))
+    
+    if result['errors']:
+        flash(f"Imported {result['imported']} files with {len(result['errors'])} errors", "warning")
+    elif not result['imported'] and not result['linked']:
+        flash("No new files found in Google Drive", "info")
+    else:
+        flash(f"Successfully imported {result['imported']} files from Google Drive", "success")
+    
+    return redirect(url_for('main.case', case_id=case_id))
+
+# Mobile-specific routes
+@main_bp.route('/mobile/case/<int:case_id>')
+def mobile_case_view(case_id):
+    """Mobile-optimized view for a case."""
+    if not is_mobile():
+        return redirect(url_for('main.case', case_id=case_id))
+    
+    case = Case.query.get_or_404(case_id)
+    
+    # Simplified pagination with fewer results per page
+    page = request.args.get('page', 1, type=int)
+    per_page = 10  # Smaller number for mobile
+    
+    # Simple filtering
+    bates_number = request.args.get('bates_number', '')
+    
+    # Build query
+    query = Document.query.filter_by(case_id=case_id)
+    
+    if bates_number:
+        query = query.filter(
+            db.or_(
+                Document.bates_number.ilike(f'%{bates_number}%'),
+                Document.bates_start.ilike(f'%{bates_number}%'),
+                Document.bates_end.ilike(f'%{bates_number}%')
+            )
+        )
+    
+    # Default sorting
+    query = query.order_by(Document.bates_sequence.desc())
+    
+    # Execute query with pagination
+    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    documents = pagination.items
+    
+    return render_template(
+        'mobile/case.html', 
+        title=case.case_name,
+        case=case, 
+        documents=documents, 
+        pagination=pagination
+    )
+
+@main_bp.route('/mobile/document/<int:document_id>')
+def mobile_document_details(document_id):
+    """Mobile-optimized view for document details."""
+    if not is_mobile():
+        return redirect(url_for('main.document_details', document_id=document_id))
+    
+    document = Document.query.get_or_404(document_id)
+    case = Case.query.get(document.case_id)
+    
+    # Update last accessed time
+    document.last_accessed = datetime.utcnow()
+    db.session.commit()
+    
+    return render_template(
+        'mobile/document_details.html', 
+        title=document.original_filename, 
+        document=document, 
+        case=case
+    )
+
+@main_bp.route('/mobile/case/<int:case_id>/upload', methods=['GET', 'POST'])
+def mobile_upload_document(case_id):
+    """Mobile-optimized view for document upload."""
+    if not is_mobile():
+        return redirect(url_for('main.upload_document', case_id=case_id))
+    
+    case = Case.query.get_or_404(case_id)
+    
+    # Handle POST same as regular upload_document
+    if request.method == 'POST':
+        return upload_document(case_id)
+    
+    # For GET, show mobile-optimized upload form
+    document_types = []
+    if case.document_types:
+        try:
+            document_types = json.loads(case.document_types)
+        except:
+            document_types = []
+            
+    return render_template(
+        'mobile/upload_document.html',
+        title=f'Upload to {case.case_name}',
+        case=case,
+        document_types=document_types
+    )
@@ -1,2 +1,20 @@
-from app.utils.bates import BatesManager
-from app.utils.drive import GoogleDriveManager
+# BatesManager (PyPDF2, reportlab) and GoogleDriveManager (Google client
+# libraries) are imported on first access, so importing a sibling module such
+# as app.utils.replica does not pull in the PDF and Drive stacks.
+_LAZY_ATTRIBUTES = {
+    'BatesManager': 'app.utils.bates',
+    'GoogleDriveManager': 'app.utils.drive',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+__all__ = list(_LAZY_ATTRIBUTES)
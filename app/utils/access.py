@@ -0,0 +1,131 @@
+import atexit
+import logging
+import threading
+from datetime import datetime
+from app import db
+from app.models.document import Document
+from app.utils.prefork import after_fork
+
+logger = logging.getLogger(__name__)
+
+
+class AccessTracker:
+    """
+    Record document views in memory and write them out periodically.
+
+    Views only update a dict of {document_id: last access time}, so reading
+    a document stays a read-only request. A background thread writes the
+    buffered times every ACCESS_FLUSH_INTERVAL seconds as one executemany
+    UPDATE, and whatever is left is flushed when the process exits.
+
+    The UPDATE only moves last_accessed forward, so workers flushing out of
+    order never move it back. Access times do not affect listings or search
+    results, so case cache versions are not bumped.
+
+    Configuration:
+        ACCESS_TRACKING: 'buffered' (default) or 'off'
+        ACCESS_FLUSH_INTERVAL: Seconds between flushes (0 writes on every view)
+    """
+
+    def __init__(self, app=None):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.thread = None
+        self.app = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ACCESS_TRACKING', 'buffered')
+        app.config.setdefault('ACCESS_FLUSH_INTERVAL', 60)
+        self.app = app
+        app.extensions['access_tracker'] = self
+        atexit.register(self.flush)
+        after_fork(self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        # Views buffered before the fork are the parent's to write
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.thread = None
+
+    @property
+    def enabled(self):
+        return self.app is not None and self.app.config['ACCESS_TRACKING'] == 'buffered'
+
+    def record(self, document_id, accessed_at=None):
+        """Note that a document was viewed."""
+        if not self.enabled:
+            return
+        accessed_at = accessed_at or datetime.utcnow()
+        with self._lock:
+            previous = self._pending.get(document_id)
+            if previous is None or previous < accessed_at:
+                self._pending[document_id] = accessed_at
+
+        if self.app.config['ACCESS_FLUSH_INTERVAL'] <= 0:
+            self.flush()
+        elif self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name='access-tracker', daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.app.config['ACCESS_FLUSH_INTERVAL']):
+            self.flush()
+
+    def flush(self):
+        """
+        Write all buffered access times in one bulk UPDATE.
+
+        Returns:
+            int: Number of documents written
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending or self.app is None:
+            return 0
+
+        documents = Document.__table__
+        accessed_at = db.bindparam('accessed_at')
+        statement = (
+            documents.update()
+            .where(documents.c.id == db.bindparam('document_id'))
+            .values(last_accessed=db.case(
+                (documents.c.last_accessed.is_(None), accessed_at),
+                (documents.c.last_accessed < accessed_at, accessed_at),
+                else_=documents.c.last_accessed
+            ))
+        )
+        rows = [{'document_id': document_id, 'accessed_at': at} for document_id, at in pending.items()]
+
+        # Runs on its own connection so it never joins a request's transaction
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as connection:
+                    connection.execute(statement, rows)
+        except Exception as e:
+            logger.error("Could not write access times for %s documents: %s", len(rows), e)
+            # Keep them for the next flush, unless newer times arrived meanwhile
+            with self._lock:
+                for document_id, at in pending.items():
+                    if document_id not in self._pending or self._pending[document_id] < at:
+                        self._pending[document_id] = at
+            return 0
+
+        logger.debug("Wrote access times for %s documents", len(rows))
+        return len(rows)
+
+    def stop(self):
+        """Stop the flush thread and write what is still buffered."""
+        self._stop.set()
+        self.flush()
+
+
+def record_access(document):
+    """Buffer a view of a document, if access tracking is enabled."""
+    from flask import current_app
+    tracker = current_app.extensions.get('access_tracker')
+    if tracker is not None:
+        tracker.record(document.id)
@@ -2,13 +2,16 @@ import os
 from app import db
 from app.models.case import Case
 from app.models.document import Document
+from app.models.document_page import DocumentPage
+from app.utils.bates_query import parse_bates_query, normalize_prefix
+from app.utils.pagination import KeysetPage, invalidate_counts, keyset_paginate
+from app.utils.tags import filter_by_tags, tag_facet_counts
+from app.utils.cache import get_result_cache
+from app.utils.entities import entity_document_ids, submit_for_extraction
+from sqlalchemy.exc import IntegrityError
 from werkzeug.utils import secure_filename
-import PyPDF2
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
 import logging
+import tempfile
 import io
 
 class BatesManager:
@@ -28,7 +31,7 @@ class BatesManager:
         Returns:
             tuple: (has_bates, detected_bates_numbers)
         """
-        self.logger.info(f"Checking for existing Bates numbers in {pdf_path}")
+        self.logger.info("Checking for existing Bates numbers in %s", pdf_path)
         
         try:
             import re
@@ -76,7 +79,7 @@ class BatesManager:
                             detected_bates.extend(matches)
                         
                     except Exception as e:
-                        self.logger.warning(f"Error extracting text from page {page_num}: {str(e)}")
+                        self.logger.warning("Error extracting text from page %s: %s", page_num, e)
                 
                 # Remove duplicates
                 detected_bates = list(set(detected_bates))
@@ -84,24 +87,30 @@ class BatesManager:
                 has_bates = len(detected_bates) > 0
                 
                 if has_bates:
-                    self.logger.info(f"Detected existing Bates numbers: {', '.join(detected_bates)}")
+                    self.logger.info("Detected existing Bates numbers: %s", ', '.join(detected_bates))
                 else:
                     self.logger.info("No existing Bates numbers detected")
                     
                 return has_bates, detected_bates
                 
         except Exception as e:
-            self.logger.error(f"Error checking for existing Bates numbers: {str(e)}", exc_info=True)
+            self.logger.error("Error checking for existing Bates numbers: %s", e, exc_info=True)
             return False, []
     
     def _stamp_pdf(self, pdf_path, bates_prefix, page_count=None, start_sequence=None, output_path=None):
         """
         Add Bates number to bottom right corner of each PDF page.
         """
+        import PyPDF2
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib import colors
+        from reportlab.pdfgen import canvas
+        from reportlab.lib.units import inch
+        
         if output_path is None:
             output_path = f"{os.path.splitext(pdf_path)[0]}_BATES.pdf"
         
-        self.logger.info(f"Starting PDF stamping: prefix={bates_prefix}, start_sequence={start_sequence}, pages={page_count}")
+        self.logger.info("Starting PDF stamping: prefix=%s, start_sequence=%s, pages=%s", bates_prefix, start_sequence, page_count)
         
         try:
             # Open the original PDF
@@ -123,7 +132,7 @@ class BatesManager:
                 except AttributeError:
                     actual_page_count = pdf_reader.getNumPages()
                 
-                self.logger.info(f"PDF has {actual_page_count} pages")
+                self.logger.info("PDF has %s pages", actual_page_count)
                 
                 if page_count is None:
                     page_count = actual_page_count
@@ -145,7 +154,7 @@ class BatesManager:
                         # Original mode
                         page_bates = f"{bates_prefix}{self.page_separator}{str(page_num+1).zfill(3)}"
                     
-                    self.logger.debug(f"Stamping page {page_num+1} with Bates number: {page_bates}")
+                    self.logger.debug("Stamping page %s with Bates number: %s", page_num+1, page_bates)
                     
                     # Create a watermark with the Bates number
                     packet = io.BytesIO()
@@ -170,12 +179,12 @@ class BatesManager:
                     # Merge the watermark with the page
                     try:
                         page.merge_page(watermark_page)
-                        self.logger.debug(f"Page {page_num+1} merged successfully")
+                        self.logger.debug("Page %s merged successfully", page_num+1)
                     except AttributeError:
                         page.mergePage(watermark_page)
-                        self.logger.debug(f"Page {page_num+1} merged successfully (legacy)")
+                        self.logger.debug("Page %s merged successfully (legacy)", page_num+1)
                     except Exception as e:
-                        self.logger.error(f"Error merging page {page_num+1}: {str(e)}")
+                        self.logger.error("Error merging page %s: %s", page_num+1, e)
                     
                     # Add page to writer
                     try:
@@ -187,15 +196,15 @@ class BatesManager:
                 try:
                     with open(output_path, 'wb') as output_file:
                         pdf_writer.write(output_file)
-                    self.logger.info(f"Stamped PDF saved to {output_path}")
+                    self.logger.info("Stamped PDF saved to %s", output_path)
                 except Exception as e:
-                    self.logger.error(f"Error saving stamped PDF: {str(e)}")
+                    self.logger.error("Error saving stamped PDF: %s", e)
                     return pdf_path  # Return original path on error
             
             return output_path
         except Exception as e:
             import traceback
-            self.logger.error(f"PDF stamping failed: {str(e)}")
+            self.logger.error("PDF stamping failed: %s", e)
             self.logger.error(traceback.format_exc())
             return pdf_path  # Return original path on error
 
@@ -211,30 +220,34 @@ class BatesManager:
         Returns:
             Document object with Bates information
         """
+        import PyPDF2
+        from app.utils.similarity import similarity_indexes
+        
+        reserved = None
         try:
             # Get the case
             case = Case.query.get(case_id)
             if not case:
-                self.logger.error(f"Case with ID {case_id} not found")
+                self.logger.error("Case with ID %s not found", case_id)
                 raise ValueError(f"Case with ID {case_id} not found")
             
             # Get the default Bates prefix
             from app.models.bates_prefix import BatesPrefix
             prefix_obj = BatesPrefix.query.filter_by(case_id=case_id, is_default=True).first()
             if not prefix_obj:
-                self.logger.error(f"No default Bates prefix found for case ID {case_id}")
+                self.logger.error("No default Bates prefix found for case ID %s", case_id)
                 raise ValueError(f"No default Bates prefix found for case ID {case_id}")
             
             # Get file information
             filename = secure_filename(file.filename)
             file_extension = os.path.splitext(filename)[1].lower()
             
-            self.logger.info(f"Processing document: {filename} with prefix {prefix_obj.prefix}")
+            self.logger.info("Processing document: %s with prefix %s", filename, prefix_obj.prefix)
             
             # Get page count for PDFs
             page_count = 1
-            temp_path = os.path.join(upload_folder, "temp_file" + file_extension)
-            file.save(temp_path)
+            page_info = []
+            temp_path = self._save_temp_file(file, upload_folder, file_extension)
             
             if file_extension.lower() == '.pdf':
                 try:
@@ -243,22 +256,24 @@ class BatesManager:
                             pdf_reader = PyPDF2.PdfReader(f)
                             page_count = len(pdf_reader.pages)
                             is_encrypted = getattr(pdf_reader, 'is_encrypted', False)
-                            self.logger.info(f"PDF info: Encrypted={is_encrypted}, Pages={page_count}")
+                            self.logger.info("PDF info: Encrypted=%s, Pages=%s", is_encrypted, page_count)
                         except AttributeError:
                             pdf_reader = PyPDF2.PdfFileReader(f)
                             page_count = pdf_reader.getNumPages()
-                            self.logger.info(f"PDF info: Encrypted={pdf_reader.isEncrypted}, Pages={page_count}")
+                            self.logger.info("PDF info: Encrypted=%s, Pages=%s", pdf_reader.isEncrypted, page_count)
+                        page_info = self._read_page_info(pdf_reader)
                 except Exception as e:
-                    self.logger.error(f"Error getting page count: {str(e)}", exc_info=True)
+                    self.logger.error("Error getting page count: %s", e, exc_info=True)
             
-            # Generate the Bates number range
-            start_sequence = prefix_obj.current_sequence
+            # Claim the Bates range in its own short transaction, before stamping
+            start_sequence = self.reserve_sequence(prefix_obj.id, page_count)
+            reserved = (prefix_obj.id, start_sequence, page_count)
             end_sequence = start_sequence + page_count - 1
             
             bates_start = f"{prefix_obj.prefix}-{str(start_sequence).zfill(6)}"
             bates_end = f"{prefix_obj.prefix}-{str(end_sequence).zfill(6)}"
             
-            self.logger.info(f"Generated Bates range: {bates_start} to {bates_end} for {page_count} pages")
+            self.logger.info("Generated Bates range: %s to %s for %s pages", bates_start, bates_end, page_count)
             
             # Create a unique filename to avoid overwriting
             base_name = os.path.splitext(filename)[0]
@@ -272,7 +287,7 @@ class BatesManager:
             # For PDF files, add Bates stamps with sequential numbering
             if file_extension.lower() == '.pdf':
                 try:
-                    self.logger.info(f"Stamping PDF with sequential Bates numbers, starting at {start_sequence}")
+                    self.logger.info("Stamping PDF with sequential Bates numbers, starting at %s", start_sequence)
                     stamped_file_path = self._stamp_pdf_sequential(
                         file_path,
                         prefix_obj.prefix,
@@ -286,12 +301,12 @@ class BatesManager:
                     
                     if stamped_size <= orig_size + 100:  # If file size barely changed
                         self.logger.warning("Stamping may have failed (no significant file size change)")
-                        self.logger.info("Original size: {}, Stamped size: {}".format(orig_size, stamped_size))
+                        self.logger.info("Original size: %s, Stamped size: %s", orig_size, stamped_size)
                 except Exception as e:
-                    self.logger.error(f"Error stamping PDF: {str(e)}", exc_info=True)
+                    self.logger.error("Error stamping PDF: %s", e, exc_info=True)
                     stamped_file_path = file_path  # Use original if stamping fails
             else:
-                self.logger.info(f"Non-PDF file, skipping Bates stamping")
+                self.logger.info("Non-PDF file, skipping Bates stamping")
                 stamped_file_path = file_path  # For non-PDF files, use original path
             
             # Clean up temp file
@@ -302,11 +317,6 @@ class BatesManager:
             # Get file size
             file_size = os.path.getsize(stamped_file_path)
             
-            # Update prefix current sequence
-            old_sequence = prefix_obj.current_sequence
-            prefix_obj.current_sequence = end_sequence + 1
-            self.logger.info(f"Updated prefix sequence from {old_sequence} to {prefix_obj.current_sequence}")
-            
             # Create document record
             document = Document(
                 case_id=case_id,
@@ -317,36 +327,55 @@ class BatesManager:
                 bates_sequence=start_sequence,
                 bates_start=bates_start,
                 bates_end=bates_end,
+                prefix_id=prefix_obj.id,
+                start_seq=start_sequence,
+                end_seq=end_sequence,
                 page_count=page_count,
                 local_path=stamped_file_path
             )
             
-            self.logger.info(f"Creating document record: {bates_start} to {bates_end}")
+            self.logger.info("Creating document record: %s to %s", bates_start, bates_end)
             db.session.add(document)
+            db.session.flush()
+            
+            # Index every stamped page for direct Bates lookups
+            self.index_document_pages(
+                document,
+                self.sequential_page_labels(prefix_obj.prefix, start_sequence, page_count),
+                page_info
+            )
             db.session.commit()
+            invalidate_counts('case', case_id)
+            submit_for_extraction(document)
+            similarity_indexes.add_document(document)
             
             return document
         except Exception as e:
-            self.logger.error(f"Error processing document: {str(e)}", exc_info=True)
+            self.logger.error("Error processing document: %s", e, exc_info=True)
+            if reserved:
+                self.release_sequence(*reserved, rewind=not isinstance(e, IntegrityError))
             raise
     
     def process_document_with_prefix(self, case_id, file, upload_folder, prefix, force_relabel=False):
+        import PyPDF2
+        from app.utils.similarity import similarity_indexes
+        
+        reserved = None
         try:
             # Get the case
             case = Case.query.get(case_id)
             if not case:
-                self.logger.error(f"Case with ID {case_id} not found")
+                self.logger.error("Case with ID %s not found", case_id)
                 raise ValueError(f"Case with ID {case_id} not found")
             
             # Get file information
             filename = secure_filename(file.filename)
             file_extension = os.path.splitext(filename)[1].lower()
             
-            self.logger.info(f"Processing document: {filename} with prefix {prefix.prefix}")
+            self.logger.info("Processing document: %s with prefix %s", filename, prefix.prefix)
             
             # Save file to get page count first
-            temp_path = os.path.join(upload_folder, "temp_" + filename)
-            file.save(temp_path)
+            temp_path = self._save_temp_file(file, upload_folder, file_extension)
             
             # Check for existing Bates numbers if it's a PDF
             existing_bates_detected = False
@@ -360,6 +389,7 @@ class BatesManager:
             
             # Get page count for PDFs
             page_count = 1
+            page_info = []
             if file_extension.lower() == '.pdf':
                 try:
                     with open(temp_path, 'rb') as f:
@@ -367,22 +397,24 @@ class BatesManager:
                             pdf_reader = PyPDF2.PdfReader(f)
                             page_count = len(pdf_reader.pages)
                             is_encrypted = getattr(pdf_reader, 'is_encrypted', False)
-                            self.logger.info(f"PDF info: Encrypted={is_encrypted}, Pages={page_count}")
+                            self.logger.info("PDF info: Encrypted=%s, Pages=%s", is_encrypted, page_count)
                         except AttributeError:
                             pdf_reader = PyPDF2.PdfFileReader(f)
                             page_count = pdf_reader.getNumPages()
-                            self.logger.info(f"PDF info: Encrypted={pdf_reader.isEncrypted}, Pages={page_count}")
+                            self.logger.info("PDF info: Encrypted=%s, Pages=%s", pdf_reader.isEncrypted, page_count)
+                        page_info = self._read_page_info(pdf_reader)
                 except Exception as e:
-                    self.logger.error(f"Error getting page count: {str(e)}", exc_info=True)
+                    self.logger.error("Error getting page count: %s", e, exc_info=True)
             
-            # Generate the Bates number range
-            start_sequence = prefix.current_sequence
+            # Claim the Bates range in its own short transaction, before stamping
+            start_sequence = self.reserve_sequence(prefix.id, page_count)
+            reserved = (prefix.id, start_sequence, page_count)
             end_sequence = start_sequence + page_count - 1
             
             bates_start = f"{prefix.prefix}-{str(start_sequence).zfill(6)}"
             bates_end = f"{prefix.prefix}-{str(end_sequence).zfill(6)}"
             
-            self.logger.info(f"Generated Bates range: {bates_start} to {bates_end} for {page_count} pages")
+            self.logger.info("Generated Bates range: %s to %s for %s pages", bates_start, bates_end, page_count)
             
             # Create a unique filename to avoid overwriting
             base_name = os.path.splitext(filename)[0]
@@ -396,7 +428,7 @@ class BatesManager:
             # For PDF files, add Bates stamps with sequential numbering only if not skipping
             if file_extension.lower() == '.pdf' and not skip_stamping:
                 try:
-                    self.logger.info(f"Stamping PDF with sequential Bates numbers, starting at {start_sequence}")
+                    self.logger.info("Stamping PDF with sequential Bates numbers, starting at %s", start_sequence)
                     stamped_file_path = self._stamp_pdf_sequential(
                         file_path,
                         prefix.prefix,
@@ -410,15 +442,15 @@ class BatesManager:
                     
                     if stamped_size <= orig_size + 100:  # If file size barely changed
                         self.logger.warning("Stamping may have failed (no significant file size change)")
-                        self.logger.info(f"Original size: {orig_size}, Stamped size: {stamped_size}")
+                        self.logger.info("Original size: %s, Stamped size: %s", orig_size, stamped_size)
                 except Exception as e:
-                    self.logger.error(f"Error stamping PDF: {str(e)}", exc_info=True)
+                    self.logger.error("Error stamping PDF: %s", e, exc_info=True)
                     stamped_file_path = file_path  # Use original if stamping fails
             else:
                 if skip_stamping:
-                    self.logger.info(f"Skipping Bates stamping due to existing Bates numbers: {', '.join(existing_bates_numbers)}")
+                    self.logger.info("Skipping Bates stamping due to existing Bates numbers: %s", ', '.join(existing_bates_numbers))
                 else:
-                    self.logger.info(f"Skipping Bates stamping for non-PDF file")
+                    self.logger.info("Skipping Bates stamping for non-PDF file")
                 stamped_file_path = file_path  # Use original path
             
             # Clean up temp file
@@ -439,26 +471,268 @@ class BatesManager:
                 bates_sequence=start_sequence,
                 bates_start=bates_start,
                 bates_end=bates_end,
+                prefix_id=prefix.id,
+                start_seq=start_sequence,
+                end_seq=end_sequence,
                 page_count=page_count,
                 local_path=stamped_file_path,
                 existing_bates=existing_bates_detected and not force_relabel,
                 bates_note=', '.join(existing_bates_numbers) if existing_bates_detected else None
             )
             
-            self.logger.info(f"Creating document record: {bates_start} to {bates_end}")
+            self.logger.info("Creating document record: %s to %s", bates_start, bates_end)
             db.session.add(document)
+            db.session.flush()
             
-            # Update prefix sequence for next document
-            old_sequence = prefix.current_sequence
-            prefix.current_sequence = end_sequence + 1
-            self.logger.info(f"Updated prefix sequence from {old_sequence} to {prefix.current_sequence}")
+            # Index every page for direct Bates lookups
+            self.index_document_pages(
+                document,
+                self.sequential_page_labels(prefix.prefix, start_sequence, page_count),
+                page_info
+            )
             db.session.commit()
+            invalidate_counts('case', case_id)
+            submit_for_extraction(document)
+            similarity_indexes.add_document(document)
             
             return document
         except Exception as e:
-            self.logger.error(f"Error processing document with prefix: {str(e)}", exc_info=True)
+            self.logger.error("Error processing document with prefix: %s", e, exc_info=True)
+            if reserved:
+                self.release_sequence(*reserved, rewind=not isinstance(e, IntegrityError))
             raise
 
+    def _save_temp_file(self, file, upload_folder, file_extension):
+        """Save an upload to a temporary file of its own, so concurrent uploads never share one."""
+        fd, temp_path = tempfile.mkstemp(prefix='temp_', suffix=file_extension, dir=upload_folder)
+        os.close(fd)
+        file.save(temp_path)
+        return temp_path
+    
+    def reserve_sequence(self, prefix_id, count):
+        """
+        Atomically claim the next free sequence numbers of a Bates prefix.
+        
+        The counter is advanced by a single UPDATE that is committed at once,
+        so concurrent uploads always receive disjoint ranges and the write
+        lock is held for one statement rather than for the whole ingest. If
+        the claimed range is already taken (e.g., by a document numbered
+        before the counter existed), the counter is moved past the occupied
+        numbers and the next range is claimed instead.
+        
+        Args:
+            prefix_id: ID of the BatesPrefix
+            count: Number of sequence numbers (pages) to claim
+            
+        Returns:
+            int: First sequence number of the reserved range
+        """
+        from app.models.bates_prefix import BatesPrefix
+        
+        prefix_filter = BatesPrefix.id == prefix_id
+        while True:
+            BatesPrefix.query.filter(prefix_filter).update(
+                {BatesPrefix.current_sequence: db.func.coalesce(BatesPrefix.current_sequence, 1) + count},
+                synchronize_session=False
+            )
+            prefix = db.session.query(
+                BatesPrefix.current_sequence, BatesPrefix.case_id, BatesPrefix.prefix
+            ).filter(prefix_filter).first()
+            db.session.commit()
+            
+            if prefix is None:
+                raise ValueError(f"Bates prefix with ID {prefix_id} not found")
+            start_sequence = prefix.current_sequence - count
+            end_sequence = prefix.current_sequence - 1
+            
+            occupied_until = self._occupied_until(prefix_id, prefix.case_id, prefix.prefix, start_sequence, end_sequence)
+            if occupied_until is None:
+                break
+            self.logger.warning("Sequence %s to %s of prefix %s is already in use; skipping past %s",
+                                start_sequence, end_sequence, prefix_id, occupied_until)
+            self.advance_sequence(prefix_id, occupied_until)
+            db.session.commit()
+        
+        self.logger.info("Reserved sequence %s to %s of prefix %s", start_sequence, end_sequence, prefix_id)
+        return start_sequence
+    
+    def _occupied_until(self, prefix_id, case_id, prefix, start_sequence, end_sequence):
+        """
+        Check whether any number of a proposed range is already used.
+        
+        Returns:
+            int: Last sequence of the document in the way, or None if the range is free
+        """
+        overlap = self.find_overlapping_document(prefix_id, start_sequence, end_sequence)
+        if overlap is not None:
+            return overlap.end_seq
+        
+        # Bates numbers are unique per case, including documents without a prefix range
+        taken = Document.query.filter_by(
+            case_id=case_id,
+            bates_number=f"{prefix}-{str(start_sequence).zfill(6)}"
+        ).first()
+        if taken is not None:
+            return max(start_sequence, taken.end_seq or start_sequence)
+        return None
+    
+    def advance_sequence(self, prefix_id, last_sequence):
+        """
+        Move a prefix's counter past last_sequence, unless it is already beyond it.
+
+        For ranges assigned without reserve_sequence (e.g., an edited Bates
+        number), so ingest never issues those numbers again. The UPDATE is
+        part of the caller's transaction.
+        """
+        from app.models.bates_prefix import BatesPrefix
+
+        BatesPrefix.query.filter(
+            BatesPrefix.id == prefix_id,
+            db.func.coalesce(BatesPrefix.current_sequence, 1) <= last_sequence
+        ).update({BatesPrefix.current_sequence: last_sequence + 1}, synchronize_session=False)
+
+    def release_sequence(self, prefix_id, start_sequence, count, rewind=True):
+        """
+        Give back a reserved range after a failed ingest.
+        
+        The counter is only rewound if nothing was reserved after this range;
+        otherwise the range is left as a gap rather than handed out twice.
+        
+        Args:
+            rewind: False when the range turned out to be taken (the ingest hit
+                a uniqueness constraint), so the counter is never wound back
+                onto numbers that are in use
+        """
+        from app.models.bates_prefix import BatesPrefix
+        
+        released = 0
+        try:
+            db.session.rollback()
+            if rewind:
+                released = BatesPrefix.query.filter(
+                    BatesPrefix.id == prefix_id,
+                    BatesPrefix.current_sequence == start_sequence + count
+                ).update({BatesPrefix.current_sequence: start_sequence}, synchronize_session=False)
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            self.logger.error("Could not release sequence %s of prefix %s: %s", start_sequence, prefix_id, e)
+            return
+        if not released:
+            self.logger.warning("Sequence %s to %s of prefix %s left unused", start_sequence, start_sequence + count - 1, prefix_id)
+    
+    def _read_page_info(self, pdf_reader):
+        """
+        Collect per-page metadata (size, rotation and text) from an open PDF reader.
+        
+        Args:
+            pdf_reader: PyPDF2 reader for the document
+            
+        Returns:
+            list: One dict per page with width, height, rotation and text
+        """
+        page_info = []
+        try:
+            pages = pdf_reader.pages
+        except AttributeError:
+            pages = [pdf_reader.getPage(i) for i in range(pdf_reader.getNumPages())]
+        
+        for page in pages:
+            try:
+                try:
+                    box = page.mediabox
+                except AttributeError:
+                    box = page.mediaBox
+                info = {
+                    'width': float(box.width) if hasattr(box, 'width') else float(box.getWidth()),
+                    'height': float(box.height) if hasattr(box, 'height') else float(box.getHeight()),
+                    'rotation': int(page.get('/Rotate', 0) or 0)
+                }
+            except Exception as e:
+                self.logger.warning("Could not read page metadata: %s", e)
+                info = {}
+            
+            # Keep the extracted text for the full-text index
+            try:
+                try:
+                    info['text'] = page.extract_text()
+                except AttributeError:
+                    info['text'] = page.extractText()
+            except Exception as e:
+                self.logger.warning("Error extracting page text: %s", e)
+            
+            page_info.append(info)
+        
+        return page_info
+    
+    def sequential_page_labels(self, prefix, start_sequence, page_count):
+        """
+        Build the per-page Bates labels applied by _stamp_pdf_sequential.
+        
+        Returns:
+            list: (prefix, sequence, bates_number) tuples, one per page
+        """
+        return [
+            (prefix, start_sequence + i, f"{prefix}-{str(start_sequence + i).zfill(6)}")
+            for i in range(page_count)
+        ]
+    
+    def suffixed_page_labels(self, bates_number, page_count):
+        """
+        Build the per-page Bates labels applied by _stamp_pdf without a start sequence.
+        
+        Returns:
+            list: (prefix, sequence, bates_number) tuples, one per page
+        """
+        return [
+            (bates_number, i + 1, f"{bates_number}{self.page_separator}{str(i + 1).zfill(3)}")
+            for i in range(page_count)
+        ]
+    
+    def index_document_pages(self, document, page_labels, page_info=None):
+        """
+        Replace the page-level Bates index rows for a document in bulk.
+        
+        Args:
+            document: Document whose pages are being indexed (must have an id)
+            page_labels: (prefix, sequence, bates_number) tuple for each page
+            page_info: Optional per-page metadata dicts; when omitted the
+                metadata already indexed for the document is kept
+                
+        The caller is responsible for committing the session.
+        """
+        if page_info is None:
+            page_info = [
+                {'width': width, 'height': height, 'rotation': rotation, 'text': text}
+                for width, height, rotation, text in db.session.query(
+                    DocumentPage.width, DocumentPage.height, DocumentPage.rotation, DocumentPage.text
+                ).filter_by(document_id=document.id).order_by(DocumentPage.page_index)
+            ]
+        
+        rows = []
+        for page_index, (prefix, sequence, bates_number) in enumerate(page_labels):
+            info = page_info[page_index] if page_index < len(page_info) else {}
+            rows.append({
+                'document_id': document.id,
+                'case_id': document.case_id,
+                'prefix': prefix,
+                'sequence': sequence,
+                'bates_number': bates_number,
+                'page_index': page_index,
+                'width': info.get('width'),
+                'height': info.get('height'),
+                'rotation': info.get('rotation', 0),
+                'text': info.get('text')
+            })
+        
+        DocumentPage.query.filter_by(document_id=document.id).delete(synchronize_session=False)
+        if rows:
+            db.session.bulk_insert_mappings(DocumentPage, rows)
+        db.session.expire(document, ['pages'])
+        
+        self.logger.info("Indexed %s pages for document %s", len(rows), document.id)
+        return len(rows)
+
     def _stamp_pdf_sequential(self, pdf_path, prefix, start_sequence, page_count, output_path=None):
         """
         Add sequential Bates numbers to each page of a PDF.
@@ -470,10 +744,16 @@ class BatesManager:
             page_count: Number of pages in the PDF
             output_path: Path to save the stamped PDF
         """
+        import PyPDF2
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib import colors
+        from reportlab.pdfgen import canvas
+        from reportlab.lib.units import inch
+        
         if output_path is None:
             output_path = f"{os.path.splitext(pdf_path)[0]}_BATES.pdf"
         
-        self.logger.info(f"Starting sequential PDF stamping: prefix={prefix}, start_sequence={start_sequence}, pages={page_count}")
+        self.logger.info("Starting sequential PDF stamping: prefix=%s, start_sequence=%s, pages=%s", prefix, start_sequence, page_count)
         
         try:
             # Open the original PDF
@@ -495,7 +775,7 @@ class BatesManager:
                 except AttributeError:
                     actual_page_count = pdf_reader.getNumPages()
                 
-                self.logger.info(f"PDF has {actual_page_count} actual pages")
+                self.logger.info("PDF has %s actual pages", actual_page_count)
                 
                 # Use the smaller of the two page counts to avoid issues
                 page_count = min(page_count, actual_page_count)
@@ -512,7 +792,7 @@ class BatesManager:
                     current_sequence = start_sequence + page_num
                     page_bates = f"{prefix}-{str(current_sequence).zfill(6)}"
                     
-                    self.logger.debug(f"Stamping page {page_num+1} with Bates number: {page_bates}")
+                    self.logger.debug("Stamping page %s with Bates number: %s", page_num+1, page_bates)
                     
                     packet = io.BytesIO()
                     c = canvas.Canvas(packet, pagesize=letter)
@@ -538,12 +818,12 @@ class BatesManager:
                     # Merge the watermark with the page (handle different PyPDF2 versions)
                     try:
                         page.merge_page(watermark_page)
-                        self.logger.debug(f"Page {page_num+1} merged successfully")
+                        self.logger.debug("Page %s merged successfully", page_num+1)
                     except AttributeError:
                         page.mergePage(watermark_page)
-                        self.logger.debug(f"Page {page_num+1} merged successfully (legacy)")
+                        self.logger.debug("Page %s merged successfully (legacy)", page_num+1)
                     except Exception as e:
-                        self.logger.error(f"Error merging page {page_num+1}: {str(e)}")
+                        self.logger.error("Error merging page %s: %s", page_num+1, e)
                     
                     # Add page to writer (handle different PyPDF2 versions)
                     try:
@@ -555,36 +835,224 @@ class BatesManager:
                 try:
                     with open(output_path, 'wb') as output_file:
                         pdf_writer.write(output_file)
-                    self.logger.info(f"Stamped PDF saved to {output_path}")
+                    self.logger.info("Stamped PDF saved to %s", output_path)
                 except Exception as e:
-                    self.logger.error(f"Error saving stamped PDF: {str(e)}")
+                    self.logger.error("Error saving stamped PDF: %s", e)
                     return pdf_path  # Return original path on error
                 
                 return output_path
         except Exception as e:
             import traceback
-            self.logger.error(f"Sequential PDF stamping failed: {str(e)}")
+            self.logger.error("Sequential PDF stamping failed: %s", e)
             self.logger.error(traceback.format_exc())
             return pdf_path  # Return original path on error
   
-    def search_documents(self, case_id=None, bates_number=None, filename=None, bates_range=None, tag_ids=None):
-        """Search for documents based on criteria."""
+    def bates_range_criterion(self, bates_query, case_id=None):
+        """
+        Build an indexed filter for documents overlapping a parsed Bates range.
+        
+        The prefix is resolved to BatesPrefix ids, then each prefix becomes an
+        equality-plus-range condition on (prefix_id, start_seq), which the
+        ix_documents_prefix_range index answers without a table scan.
+        
+        Args:
+            bates_query: BatesQuery from parse_bates_query
+            case_id: Restrict prefixes to one case
+            
+        Returns:
+            SQL expression, or None if no known prefix matches
+        """
+        from app.models.bates_prefix import BatesPrefix
+        
+        # Narrow the prefixes in SQL (each separator in the key may be any run
+        # of separators), then confirm the exact match on the few candidates
+        pattern = '%'.join(
+            part.replace('\\', '\\\\').replace('%', '\\%') for part in bates_query.prefix_key.split('-')
+        )
+        prefixes = db.session.query(BatesPrefix.id, BatesPrefix.prefix).filter(
+            BatesPrefix.prefix.ilike(pattern + '%', escape='\\')
+        )
+        if case_id:
+            prefixes = prefixes.filter(BatesPrefix.case_id == case_id)
+        prefix_ids = [
+            prefix_id for prefix_id, prefix in prefixes
+            if normalize_prefix(prefix) == bates_query.prefix_key
+        ]
+        if not prefix_ids:
+            return None
+        
+        clauses = []
+        for prefix_id in prefix_ids:
+            # A document that starts before the range may still cover its first page
+            first = self.find_overlapping_document(prefix_id, bates_query.start, bates_query.start)
+            lower = first.start_seq if first else bates_query.start
+            clauses.append(db.and_(
+                Document.prefix_id == prefix_id,
+                Document.start_seq.between(lower, bates_query.end)
+            ))
+        return db.or_(*clauses)
+    
+    def filter_by_bates_number(self, query, bates_number, case_id=None):
+        """
+        Filter a document query by a Bates number, reference or range.
+        
+        Input that parses as a Bates reference (e.g., "Jones-Pltf 100 through 250")
+        runs as an indexed range lookup; anything else falls back to a
+        substring match on the Bates columns.
+        """
+        bates_query = parse_bates_query(bates_number)
+        criterion = self.bates_range_criterion(bates_query, case_id) if bates_query else None
+        if criterion is not None:
+            return query.filter(criterion)
+        
+        # Handle both single and double hyphen cases
+        search_term = bates_number.strip('-')  # Remove trailing hyphens for searching
+        
+        return query.filter(
+            db.or_(
+                Document.bates_number.ilike(f'%{search_term}%'),
+                Document.bates_start.ilike(f'%{search_term}%'),
+                Document.bates_end.ilike(f'%{search_term}%')
+            )
+        )
+    
+    def search_documents(self, case_id=None, bates_number=None, filename=None, bates_range=None, tag_ids=None, term=None, mentions=None, after=None, before=None, per_page=50):
+        """
+        Search for documents based on criteria.
+        
+        Returns:
+            KeysetPage of matching documents; see search_page, which fetches
+            and caches it
+        """
+        page, _ = self.search_page(
+            case_id=case_id,
+            bates_number=bates_number,
+            filename=filename,
+            bates_range=bates_range,
+            tag_ids=tag_ids,
+            term=term,
+            mentions=mentions,
+            after=after,
+            before=before,
+            per_page=per_page
+        )
+        return page
+    
+    def search_page(self, case_id=None, term=None, tag_ids=None, mentions=None, after=None, before=None, per_page=50,
+                    bates_number=None, filename=None, bates_range=None):
+        """
+        Fetch one page of search results, with per-tag counts over every match.
+        
+        Searches within a case are cached as the ids on the page (with its
+        cursors, total and tag counts), keyed by the criteria and the case's
+        cache version, so repeating a search reloads the page by primary key
+        instead of re-running the filters. The cache is checked before the
+        query is built, since building it may look up prefixes.
+        
+        Returns:
+            tuple: (KeysetPage of documents, {tag_id: document count})
+        """
+        tag_ids = sorted(str(tag_id) for tag_id in tag_ids or [])
+        bates_range = list(bates_range) if bates_range else None
+        cache = get_result_cache()
+        key = None
+        # Entity extraction runs in the background without bumping the case's
+        # cache version, so searches by mention are not cached
+        if cache is not None and case_id and not mentions:
+            key = cache.make_key('search_page', case_id, {
+                'term': term,
+                'tag_ids': tag_ids,
+                'bates_number': bates_number,
+                'filename': filename,
+                'bates_range': bates_range,
+                'after': after,
+                'before': before,
+                'per_page': per_page,
+            })
+        
+        if key is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                documents = {
+                    doc.id: doc for doc in
+                    Document.query.filter(Document.id.in_(cached['ids'])).options(*Document.listing_options(with_case=True))
+                }
+                page = KeysetPage(
+                    [documents[doc_id] for doc_id in cached['ids'] if doc_id in documents],
+                    per_page,
+                    next_cursor=cached['next_cursor'],
+                    prev_cursor=cached['prev_cursor'],
+                    total=cached['total']
+                )
+                # JSON-backed caches turn the tag ids into strings
+                return page, {int(tag_id): count for tag_id, count in cached['tag_counts'].items()}
+        
+        query = self.build_search_query(
+            case_id=case_id,
+            bates_number=bates_number,
+            filename=filename,
+            bates_range=bates_range,
+            tag_ids=tag_ids,
+            term=term,
+            mentions=mentions
+        )
+        tag_counts = tag_facet_counts(query)
+        page = keyset_paginate(
+            query.options(*Document.listing_options(with_case=True)),
+            (Document.bates_sequence, Document.id),
+            after=after,
+            before=before,
+            per_page=per_page,
+            count_key=('case', case_id, 'search', term, mentions, tuple(tag_ids),
+                       bates_number, filename, tuple(bates_range or ()))
+        )
+        
+        if key is not None:
+            cache.set(key, {
+                'ids': [doc.id for doc in page],
+                'next_cursor': page.next_cursor,
+                'prev_cursor': page.prev_cursor,
+                'total': page.total,
+                'tag_counts': tag_counts,
+            })
+        return page, tag_counts
+    
+    def build_search_query(self, case_id=None, bates_number=None, filename=None, bates_range=None, tag_ids=None, term=None, mentions=None, document_type=None):
+        """
+        Build the unordered document query behind search_page.
+        
+        Callers that page or stream results apply their own ordering and limits.
+        
+        Args:
+            term: Single search box value; a Bates reference runs as an indexed
+                range lookup, anything else matches Bates numbers or filenames
+            mentions: Entity (person, organization, date or amount) the
+                documents must mention, looked up in the entity index
+            document_type: Only documents classified with this type
+        """
         query = Document.query
         
         if case_id:
             query = query.filter_by(case_id=case_id)
         
         if bates_number:
-            # Handle both single and double hyphen cases
-            search_term = bates_number.strip('-')  # Remove trailing hyphens for searching
-            
-            query = query.filter(
-                db.or_(
-                    Document.bates_number.ilike(f'%{search_term}%'),
-                    Document.bates_start.ilike(f'%{search_term}%'),
-                    Document.bates_end.ilike(f'%{search_term}%')
+            query = self.filter_by_bates_number(query, bates_number, case_id=case_id)
+        
+        if term:
+            bates_query = parse_bates_query(term)
+            criterion = self.bates_range_criterion(bates_query, case_id) if bates_query else None
+            if criterion is not None:
+                query = query.filter(criterion)
+            else:
+                search_term = term.strip('-')
+                query = query.filter(
+                    db.or_(
+                        Document.bates_number.ilike(f'%{search_term}%'),
+                        Document.bates_start.ilike(f'%{search_term}%'),
+                        Document.bates_end.ilike(f'%{search_term}%'),
+                        Document.original_filename.ilike(f'%{search_term}%')
+                    )
                 )
-            )
         
         if filename:
             query = query.filter(Document.original_filename.ilike(f'%{filename}%'))
@@ -593,25 +1061,144 @@ class BatesManager:
             start, end = bates_range
             query = query.filter(Document.bates_sequence.between(int(start), int(end)))
         
-        # Filter by tags if tag_ids provided
+        if mentions:
+            query = query.filter(Document.id.in_(entity_document_ids(mentions, case_id=case_id)))
+        
+        if document_type:
+            query = query.filter(Document.document_type == document_type)
+        
+        # Keep documents carrying every selected tag
         if tag_ids:
-            from app.models.tag import DocumentTag
-            query = query.join(DocumentTag).filter(DocumentTag.tag_id.in_(tag_ids))
+            query = filter_by_tags(query, tag_ids)
+        
+        return query
+        
+    def find_overlapping_document(self, prefix_id, start_seq, end_seq, exclude_document_id=None):
+        """
+        Find a document whose Bates range overlaps [start_seq, end_seq] for a prefix.
+        
+        Ranges issued from one prefix never overlap, so ordering them by
+        start_seq also orders them by end_seq. The only candidate is therefore
+        the range with the greatest start_seq <= end_seq, which a single seek
+        on the (prefix_id, start_seq, end_seq) index finds without scanning.
+        
+        Args:
+            prefix_id: ID of the BatesPrefix the range belongs to
+            start_seq: First page number of the proposed range
+            end_seq: Last page number of the proposed range
+            exclude_document_id: Document to ignore (e.g., the one being edited)
+            
+        Returns:
+            Document that overlaps the range, or None
+        """
+        query = Document.query.filter(
+            Document.prefix_id == prefix_id,
+            Document.start_seq <= end_seq
+        )
+        if exclude_document_id is not None:
+            query = query.filter(Document.id != exclude_document_id)
+        
+        candidate = query.order_by(Document.start_seq.desc()).first()
+        if candidate and candidate.end_seq >= start_seq:
+            return candidate
+        return None
+    
+    def parse_bates_number(self, bates_number):
+        """
+        Split a Bates number into its prefix and numeric sequence.
+        
+        Args:
+            bates_number: Bates number such as "Jones-Pltf-000057"
+            
+        Returns:
+            tuple: (prefix, sequence), or None if it has no numeric suffix
+        """
+        prefix, separator, number = bates_number.strip().rpartition('-')
+        if not separator or not prefix or not number.isdigit():
+            return None
+        return prefix, int(number)
+    
+    def refresh_page_text(self, document):
+        """
+        Re-extract page text for a document that was indexed without it.
+        
+        Args:
+            document: Document whose page rows should receive text
+            
+        Returns:
+            int: Number of pages updated
+        """
+        import PyPDF2
+        
+        if document.file_extension.lower() != '.pdf' or not document.local_path or not os.path.exists(document.local_path):
+            return 0
+        
+        with open(document.local_path, 'rb') as f:
+            try:
+                pdf_reader = PyPDF2.PdfReader(f)
+            except AttributeError:
+                pdf_reader = PyPDF2.PdfFileReader(f)
+            page_info = self._read_page_info(pdf_reader)
         
-        return query.all()
+        updated = 0
+        for page in document.pages:
+            if page.page_index < len(page_info):
+                page.text = page_info[page.page_index].get('text')
+                updated += 1
         
-    def get_document_by_bates_number(self, bates_number):
+        # Entities come from page text, so they need extracting again
+        if updated:
+            document.entities_extracted_at = None
+        return updated
+    
+    def search_pages(self, text, case_id=None, tag_ids=None, limit=50):
+        """
+        Full-text search over extracted page text.
+        
+        Args:
+            text: Words to search for (e.g., "water damage")
+            case_id: Restrict hits to one case
+            tag_ids: Restrict hits to documents carrying all of these tags
+            limit: Maximum number of page hits to return
+            
+        Returns:
+            list: Ranked page hits with Bates-page citations
+        """
+        from app.utils.text_search import TextSearchIndex
+        return TextSearchIndex().search(text, case_id=case_id, tag_ids=tag_ids, limit=limit)
+    
+    def get_document_by_bates_number(self, bates_number, case_id=None):
         """
-        Find a specific document by exact Bates number.
+        Find a specific document by the Bates number of any of its pages.
         
         Args:
             bates_number: The full Bates number to search for (e.g., "ABC-000123")
+            case_id: Restrict the lookup to one case; Bates numbers are only
+                unique within a case
             
         Returns:
             Document information
         """
-        # Find by exact Bates number
-        document = Document.query.filter_by(bates_number=bates_number).first()
+        # Resolve the page through the page-level index
+        parsed = self.parse_bates_number(bates_number)
+        if parsed:
+            prefix, sequence = parsed
+            pages = DocumentPage.query.filter_by(prefix=prefix, sequence=sequence)
+            if case_id:
+                pages = pages.filter_by(case_id=case_id)
+            page = pages.first()
+            if page:
+                return {
+                    'document': page.document,
+                    'page_number': page.page_number,
+                    'is_page_specific': page.page_index > 0
+                }
+        
+        # Fall back to documents that have not been page-indexed
+        documents = Document.query.filter_by(bates_number=bates_number)
+        if case_id:
+            documents = documents.filter_by(case_id=case_id)
+        document = documents.first()
         
         if document:
             return {
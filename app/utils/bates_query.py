@@ -0,0 +1,70 @@
+import re
+from collections import namedtuple
+
+# A parsed Bates reference: prefix as typed (separators tidied), the
+# normalized key used to match BatesPrefix rows, and an inclusive range.
+BatesQuery = namedtuple('BatesQuery', ['prefix', 'prefix_key', 'start', 'end'])
+
+# Unicode hyphens and dashes people paste from Word and PDF viewers
+_DASHES = re.compile('[‐‑‒–—―−]')
+
+# Words and symbols that separate the two ends of a range
+_RANGE_SEPARATOR = re.compile(r'\s+(?:through|thru|to|-)\s+|\s*\.\.\s*', re.IGNORECASE)
+
+# "Jones-Pltf-000100", "Jones-Pltf 100", "JONES PLTF--100", "ABC000100"
+_REFERENCE = re.compile(r'^(?P<prefix>.*?[A-Za-z][^\d]*?)[\s\-_]*(?P<number>\d+)$')
+
+
+def normalize_prefix(prefix):
+    """
+    Build the comparison key for a Bates prefix.
+
+    Case is ignored and any run of hyphens, underscores or spaces counts as a
+    single separator, so "Jones-Pltf", "jones pltf" and "Jones-Pltf-" match.
+    """
+    return re.sub(r'[\s\-_]+', '-', _DASHES.sub('-', prefix or '')).strip('-').lower()
+
+
+def parse_bates_query(text):
+    """
+    Parse search input that looks like a Bates reference or range.
+
+    Examples:
+        "Jones-Pltf-000057"                       -> page 57
+        "Jones-Pltf 100 through 250"              -> pages 100-250
+        "Jones-Pltf-000100 - Jones-Pltf-000250"   -> pages 100-250
+
+    Args:
+        text: Raw search input
+
+    Returns:
+        BatesQuery, or None if the input is not a Bates reference
+    """
+    text = _DASHES.sub('-', text or '').strip()
+    if not text:
+        return None
+
+    parts = _RANGE_SEPARATOR.split(text, maxsplit=1)
+    first = _REFERENCE.match(parts[0].strip())
+    if not first:
+        return None
+
+    prefix = re.sub(r'[\s\-_]+$', '', first.group('prefix')).strip()
+    prefix_key = normalize_prefix(prefix)
+    if not prefix_key:
+        return None
+    start = end = int(first.group('number'))
+
+    if len(parts) == 2:
+        second = parts[1].strip()
+        if second.isdigit():
+            end = int(second)
+        else:
+            match = _REFERENCE.match(second)
+            if not match or normalize_prefix(match.group('prefix')) != prefix_key:
+                return None
+            end = int(match.group('number'))
+        if end < start:
+            start, end = end, start
+
+    return BatesQuery(prefix, prefix_key, start, end)
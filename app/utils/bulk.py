@@ -0,0 +1,202 @@
+import logging
+from app import db
+from app.models.document import Document
+from app.models.document_tag import DocumentTag
+from app.models.tag import Tag
+from app.models.counters import bump_cache_versions
+from app.utils.pagination import invalidate_counts
+
+logger = logging.getLogger(__name__)
+
+# Document columns that may be set in bulk, with their maximum length
+BULK_FIELDS = {
+    'document_type': 50,
+    'bates_note': 255,
+}
+
+# Ids per statement, well under SQLite's bound-parameter limit. A selection
+# of up to this many documents is written with one statement per operation.
+CHUNK_SIZE = 5000
+
+
+class BulkOperationError(ValueError):
+    """Raised for an invalid selection or operation; nothing is written."""
+
+
+def _chunks(ids):
+    for start in range(0, len(ids), CHUNK_SIZE):
+        yield ids[start:start + CHUNK_SIZE]
+
+
+def resolve_selection(selection):
+    """
+    Resolve a bulk selection to document ids.
+
+    The selection is evaluated once, up front, so every operation applies to
+    the same documents even if an earlier one changes what a filter matches.
+
+    Args:
+        selection: {'document_ids': [...]} or {'filter': {...}} with the
+            search parameters case_id (required), q, tag_ids, mentions and
+            document_type
+
+    Returns:
+        dict: {document_id: case_id}
+    """
+    from app.utils.bates import BatesManager
+
+    if selection.get('document_ids') is not None:
+        try:
+            ids = sorted({int(document_id) for document_id in selection['document_ids']})
+        except (TypeError, ValueError):
+            raise BulkOperationError("document_ids must be a list of integers")
+        rows = []
+        for chunk in _chunks(ids):
+            rows.extend(db.session.query(Document.id, Document.case_id).filter(Document.id.in_(chunk)))
+        return dict(rows)
+
+    filters = selection.get('filter')
+    if filters:
+        try:
+            case_id = int(filters.get('case_id'))
+            tag_ids = [int(tag_id) for tag_id in filters.get('tag_ids') or []]
+        except (TypeError, ValueError):
+            raise BulkOperationError("A filter selection needs a numeric case_id (and numeric tag_ids)")
+        query = BatesManager().build_search_query(
+            case_id=case_id,
+            term=filters.get('q') or '',
+            tag_ids=tag_ids,
+            mentions=filters.get('mentions') or '',
+            document_type=filters.get('document_type')
+        )
+        return dict(query.with_entities(Document.id, Document.case_id))
+
+    raise BulkOperationError("Select documents with document_ids or a filter")
+
+
+def _add_tag(tag, ids):
+    """Tag the documents that do not carry the tag yet, with INSERT ... SELECT."""
+    documents = Document.__table__
+    links = DocumentTag.__table__
+    already_tagged = db.exists().where(links.c.document_id == documents.c.id).where(links.c.tag_id == tag.id)
+
+    inserted = 0
+    for chunk in _chunks(ids):
+        candidates = (
+            db.select(documents.c.id, db.literal(tag.id))
+            .where(documents.c.id.in_(chunk))
+            .where(~already_tagged)
+        )
+        if not tag.is_default:
+            # A case's own tags only apply to that case's documents
+            candidates = candidates.where(documents.c.case_id == tag.case_id)
+        result = db.session.execute(links.insert().from_select(['document_id', 'tag_id'], candidates))
+        inserted += result.rowcount
+    return inserted
+
+
+def _remove_tag(tag, ids):
+    links = DocumentTag.__table__
+    deleted = 0
+    for chunk in _chunks(ids):
+        result = db.session.execute(
+            links.delete().where(links.c.tag_id == tag.id).where(links.c.document_id.in_(chunk))
+        )
+        deleted += result.rowcount
+    return deleted
+
+
+def _set_field(field, value, ids):
+    documents = Document.__table__
+    updated = 0
+    for chunk in _chunks(ids):
+        result = db.session.execute(
+            documents.update().where(documents.c.id.in_(chunk)).values({field: value})
+        )
+        updated += result.rowcount
+    return updated
+
+
+def _validate(operation):
+    """Check one operation and resolve what it refers to, before anything is written."""
+    op = operation.get('op')
+    if op in ('add_tag', 'remove_tag'):
+        try:
+            tag = Tag.query.get(int(operation.get('tag_id')))
+        except (TypeError, ValueError):
+            tag = None
+        if tag is None:
+            raise BulkOperationError(f"{op}: unknown tag {operation.get('tag_id')!r}")
+        return op, tag
+
+    if op == 'set_field':
+        field = operation.get('field')
+        if field not in BULK_FIELDS:
+            raise BulkOperationError(f"set_field: field must be one of {', '.join(sorted(BULK_FIELDS))}")
+        value = operation.get('value')
+        value = str(value).strip() if value is not None else ''
+        if len(value) > BULK_FIELDS[field]:
+            raise BulkOperationError(f"set_field: {field} is limited to {BULK_FIELDS[field]} characters")
+        # An empty value clears the field
+        return op, (field, value or None)
+
+    raise BulkOperationError(f"Unknown operation {op!r}; use add_tag, remove_tag or set_field")
+
+
+def apply_bulk_operations(selection, operations):
+    """
+    Apply tag and field operations to a selection of documents.
+
+    Each operation is one set-based statement (per CHUNK_SIZE ids): an
+    INSERT ... SELECT for add_tag, a DELETE for remove_tag and an UPDATE for
+    set_field. All of them, and the cache version bump of the affected
+    cases, commit in one transaction; any failure rolls everything back.
+    Document counters are untouched since no document is added or removed.
+
+    Args:
+        selection: See resolve_selection
+        operations: List of {'op': 'add_tag' | 'remove_tag', 'tag_id': ...}
+            or {'op': 'set_field', 'field': ..., 'value': ...}
+
+    Returns:
+        dict: Number of selected documents and rows affected per operation
+    """
+    if not operations:
+        raise BulkOperationError("No operations given")
+    validated = [_validate(operation) for operation in operations]
+
+    selected = resolve_selection(selection)
+    ids = sorted(selected)
+    case_ids = set(selected.values())
+
+    results = []
+    try:
+        for op, target in validated:
+            if not ids:
+                affected = 0
+            elif op == 'add_tag':
+                affected = _add_tag(target, ids)
+            elif op == 'remove_tag':
+                affected = _remove_tag(target, ids)
+            else:
+                affected = _set_field(target[0], target[1], ids)
+
+            result = {'op': op, 'affected': affected}
+            if op == 'set_field':
+                result['field'] = target[0]
+            else:
+                result['tag_id'] = target.id
+            results.append(result)
+
+        if case_ids:
+            bump_cache_versions(case_ids)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    for case_id in case_ids:
+        invalidate_counts('case', case_id)
+
+    logger.info("Bulk operations on %s documents: %s", len(ids), results)
+    return {'selected': len(ids), 'results': results}
@@ -0,0 +1,233 @@
+import os
+import json
+import time
+import random
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, request, session, make_response
+from app.utils.prefork import after_fork
+
+logger = logging.getLogger(__name__)
+
+
+class NullCacheBackend:
+    """Backend that stores nothing (RESULT_CACHE_BACKEND = 'null')."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def reset_after_fork(self):
+        pass
+
+
+class LRUCacheBackend:
+    """In-process LRU cache; entries are private to one worker process."""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def reset_after_fork(self):
+        # The parent's lock may have been held by one of its threads
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLiteCacheBackend:
+    """
+    Cache shared by every worker on the host through a local SQLite file.
+
+    Values are stored as JSON. Each thread keeps its own connection, and
+    expired rows are purged occasionally on write.
+    """
+
+    PURGE_PROBABILITY = 0.01
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS result_cache "
+                "(key TEXT PRIMARY KEY, expires REAL NOT NULL, value TEXT NOT NULL)"
+            )
+
+    def reset_after_fork(self):
+        # SQLite connections must not be shared with the parent process
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        try:
+            row = self._connect().execute(
+                "SELECT value FROM result_cache WHERE key = ? AND expires > ?",
+                (key, time.time())
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Result cache read failed: %s", e)
+            return None
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        try:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO result_cache (key, expires, value) VALUES (?, ?, ?)",
+                (key, now + ttl, json.dumps(value))
+            )
+            if random.random() < self.PURGE_PROBABILITY:
+                conn.execute("DELETE FROM result_cache WHERE expires <= ?", (now,))
+        except sqlite3.Error as e:
+            logger.warning("Result cache write failed: %s", e)
+
+
+class ResultCache:
+    """
+    Cache for search results and rendered listing pages.
+
+    Keys combine a namespace, the normalized request parameters and the
+    case's cache_version. Any write to a case's documents, tags or prefixes
+    (other than bookkeeping columns such as entities_extracted_at) bumps that
+    version (see app.models.counters), so stale entries are never read again
+    and simply age out; nothing has to be deleted explicitly.
+
+    Configuration:
+        RESULT_CACHE_BACKEND: 'lru' (default), 'sqlite' or 'null'
+        RESULT_CACHE_PATH: SQLite file for the shared backend
+        RESULT_CACHE_TTL: Seconds an entry stays valid
+        RESULT_CACHE_MAX_ENTRIES: Size of the in-process LRU
+    """
+
+    def __init__(self, app=None):
+        self.backend = NullCacheBackend()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RESULT_CACHE_BACKEND', os.environ.get('RESULT_CACHE_BACKEND', 'lru'))
+        app.config.setdefault('RESULT_CACHE_PATH', os.path.join(app.instance_path, 'result_cache.sqlite'))
+        app.config.setdefault('RESULT_CACHE_TTL', 300)
+        app.config.setdefault('RESULT_CACHE_MAX_ENTRIES', 512)
+
+        backend = app.config['RESULT_CACHE_BACKEND']
+        if backend == 'sqlite':
+            self.backend = SQLiteCacheBackend(app.config['RESULT_CACHE_PATH'])
+        elif backend == 'lru':
+            self.backend = LRUCacheBackend(app.config['RESULT_CACHE_MAX_ENTRIES'])
+        else:
+            self.backend = NullCacheBackend()
+
+        self.ttl = app.config['RESULT_CACHE_TTL']
+        app.extensions['result_cache'] = self
+        after_fork(lambda: self.backend.reset_after_fork())
+        logger.info("Result cache backend: %s", backend)
+
+    def case_version(self, case_id):
+        """Return the current cache version of a case, or None if it does not exist."""
+        from app import db
+        from app.models.case import Case
+        return db.session.query(Case.cache_version).filter(Case.id == case_id).scalar()
+
+    def make_key(self, namespace, case_id, params):
+        """
+        Build a cache key for a case-scoped result.
+
+        Returns:
+            str: Key, or None if the case does not exist
+        """
+        version = self.case_version(case_id)
+        if version is None:
+            return None
+        normalized = json.dumps(params, sort_keys=True, default=str)
+        digest = hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+        return f"{namespace}:{case_id}:{version}:{digest}"
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(key, value, ttl or self.ttl)
+
+
+def get_result_cache():
+    """Return the current app's ResultCache, or None outside an app."""
+    try:
+        return current_app.extensions.get('result_cache')
+    except RuntimeError:
+        return None
+
+
+def cached_page(case_arg='case_id'):
+    """
+    Cache the rendered HTML of a case-scoped GET view.
+
+    The case id is taken from the view's URL arguments or the query string.
+    The key only follows the case's cache version, so the page must not show
+    data from other cases (e.g., a list of all cases). Requests without a
+    case, with pending flash messages, or whose response is not a 200 HTML
+    page are never cached.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = get_result_cache()
+            case_id = kwargs.get(case_arg) or request.args.get(case_arg, type=int)
+            if cache is None or not case_id or request.method != 'GET' or session.get('_flashes'):
+                return view(*args, **kwargs)
+
+            key = cache.make_key(f"page:{request.endpoint}", case_id, {
+                'view_args': request.view_args,
+                'args': sorted(request.args.items(multi=True)),
+            })
+            if key is None:
+                return view(*args, **kwargs)
+
+            body = cache.get(key)
+            if body is not None:
+                response = make_response(body)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and response.mimetype == 'text/html':
+                cache.set(key, response.get_data(as_text=True))
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
@@ -1,54 +1,322 @@
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
 import os
+import time
 import pickle
+import logging
+import threading
+from functools import lru_cache
+from app.utils.prefork import after_fork
+
+logger = logging.getLogger(__name__)
+
+# Define the required scopes
+DRIVE_SCOPES = ['https://www.googleapis.com/auth/drive.file']
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+# Fields the folder browser renders; Drive returns only what is asked for
+BROWSE_FIELDS = 'nextPageToken, files(id, name, mimeType, size, modifiedTime)'
+
+# Fields Drive sync reads for a changed or listed file
+SYNC_FILE_FIELDS = 'id, name, mimeType, parents, trashed'
+
+
+@lru_cache(maxsize=None)
+def drive_discovery_document():
+    """Return the Drive v3 discovery document bundled with the client library, read once per process."""
+    from googleapiclient import discovery_cache
+    return discovery_cache.get_static_doc('drive', 'v3')
+
+
+def load_credentials(credentials_path, token_path, scopes=DRIVE_SCOPES):
+    """
+    Load saved OAuth credentials, refreshing or authorizing them if needed.
+
+    Returns:
+        google.oauth2.credentials.Credentials: Valid credentials, saved back
+            to token_path if they changed
+    """
+    # The Google client libraries are slow to import, so only Drive code paths load them
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from google.auth.transport.requests import Request
+    
+    credentials = None
+    
+    # Check if token file exists
+    if os.path.exists(token_path):
+        with open(token_path, 'rb') as token:
+            credentials = pickle.load(token)
+    
+    # If credentials don't exist or are invalid, get new ones
+    if not credentials or not credentials.valid:
+        if credentials and credentials.expired and credentials.refresh_token:
+            credentials.refresh(Request())
+        else:
+            flow = InstalledAppFlow.from_client_secrets_file(credentials_path, scopes)
+            credentials = flow.run_local_server(port=0)
+        
+        # Save the credentials for future use
+        with open(token_path, 'wb') as token:
+            pickle.dump(credentials, token)
+    
+    return credentials
+
+
+class DriveFolderCache:
+    """
+    Short-lived cache of one case's Drive folder tree.
+
+    Keeps each folder's name and parents and each listed folder's children
+    for ttl seconds. Listing a folder also records the names of its
+    subfolders, so walking down the tree and rendering breadcrumbs back up
+    costs one API call per folder not yet seen.
+    """
+
+    # Stop walking up after this many levels (guards against parent cycles)
+    MAX_DEPTH = 50
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._folders = {}
+        self._children = {}
+
+    def _fresh(self, entries, key):
+        entry = entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def folder(self, drive_manager, folder_id):
+        """Return {'id', 'name', 'parents'} for a folder, or None if it cannot be read."""
+        with self._lock:
+            info = self._fresh(self._folders, folder_id)
+        if info is None:
+            info = drive_manager.get_folder_info(folder_id)
+            if info is None:
+                return None
+            info = {'id': folder_id, 'name': info.get('name', 'Unknown Folder'), 'parents': info.get('parents', [])}
+            with self._lock:
+                self._folders[folder_id] = (time.monotonic() + self.ttl, info)
+        return info
+
+    def children(self, drive_manager, folder_id):
+        """Return the folder's contents as listed by GoogleDriveManager.list_folder_contents."""
+        with self._lock:
+            contents = self._fresh(self._children, folder_id)
+        if contents is None:
+            contents = drive_manager.list_folder_contents(folder_id)
+            expires = time.monotonic() + self.ttl
+            with self._lock:
+                self._children[folder_id] = (expires, contents)
+                for item in contents:
+                    if item['type'] == 'folder':
+                        self._folders[item['id']] = (expires, {'id': item['id'], 'name': item['name'], 'parents': [folder_id]})
+        return contents
+
+    def breadcrumbs(self, drive_manager, folder_id, root_id):
+        """
+        Return the path from below root_id down to folder_id.
+
+        Returns:
+            list: [{'id', 'name'}, ...] ending with folder_id; empty for the
+                root itself
+        """
+        path = []
+        current_id = folder_id
+        while current_id and current_id != root_id and len(path) < self.MAX_DEPTH:
+            info = self.folder(drive_manager, current_id)
+            if info is None:
+                break
+            path.insert(0, {'id': current_id, 'name': info['name']})
+            current_id = info['parents'][0] if info['parents'] else None
+        return path
+
+    def invalidate(self, folder_id):
+        """Forget a folder's listing, e.g. after something was added to it."""
+        with self._lock:
+            self._children.pop(folder_id, None)
+
+
+class DriveFolderCaches:
+    """Per-case DriveFolderCache registry, shared by the threads of one process."""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._caches = {}
+
+    def for_case(self, case_id):
+        with self._lock:
+            cache = self._caches.get(case_id)
+            if cache is None:
+                cache = self._caches[case_id] = DriveFolderCache(self.ttl)
+            return cache
+
+    def invalidate(self, folder_id):
+        """Forget a folder's listing in every case that has it."""
+        with self._lock:
+            caches = list(self._caches.values())
+        for cache in caches:
+            cache.invalidate(folder_id)
+
+    def reset(self):
+        self._lock = threading.Lock()
+        self._caches = {}
+
+
+class DriveClientProvider:
+    """
+    Process-wide source of Drive API clients.
+
+    Credentials are loaded once and shared by every thread; they are checked
+    (and refreshed, and saved back to DRIVE_TOKEN_PATH) under a lock each
+    time a client is handed out, so concurrent requests never race to
+    refresh the same token. The API client is built from the cached
+    discovery document once per thread, around an authorized httplib2
+    connection that is kept open and reused by that thread's later requests
+    (httplib2 connections are not thread-safe, so they are not shared).
+
+    With DRIVE_BACKEND = 'fake', every caller gets the same in-memory
+    FakeDriveService instead (see app.utils.drive_fake), available as
+    app.extensions['drive'].fake for seeding files.
+
+    Configuration:
+        DRIVE_BACKEND: 'google' (default) or 'fake'
+        DRIVE_TOKEN_PATH: Saved OAuth token (default token.pickle)
+        DRIVE_HTTP_TIMEOUT: Socket timeout in seconds for API calls
+        DRIVE_FOLDER_CACHE_TTL: Seconds a folder listing is reused by the
+            folder browser (default 60)
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._credentials = None
+        self.fake = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('DRIVE_BACKEND', os.environ.get('DRIVE_BACKEND', 'google'))
+        app.config.setdefault('DRIVE_TOKEN_PATH', os.environ.get('DRIVE_TOKEN_PATH', 'token.pickle'))
+        app.config.setdefault('DRIVE_HTTP_TIMEOUT', 60)
+        app.config.setdefault('DRIVE_FOLDER_CACHE_TTL', 60)
+        self.backend = app.config['DRIVE_BACKEND']
+        self.credentials_path = app.config['GOOGLE_CLIENT_SECRETS_FILE']
+        self.token_path = app.config['DRIVE_TOKEN_PATH']
+        self.timeout = app.config['DRIVE_HTTP_TIMEOUT']
+        self.folder_caches = DriveFolderCaches(app.config['DRIVE_FOLDER_CACHE_TTL'])
+        if self.backend == 'fake':
+            from app.utils.drive_fake import FakeDriveService
+            self.fake = FakeDriveService()
+        app.extensions['drive'] = self
+        after_fork(self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        # Open connections belong to the parent; credentials stay valid
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.folder_caches.reset()
+
+    def credentials(self):
+        """Return the shared credentials, refreshed if they are about to expire."""
+        with self._lock:
+            if self._credentials is None:
+                self._credentials = load_credentials(self.credentials_path, self.token_path)
+            elif not self._credentials.valid and self._credentials.refresh_token:
+                from google.auth.transport.requests import Request
+                self._credentials.refresh(Request())
+                with open(self.token_path, 'wb') as token:
+                    pickle.dump(self._credentials, token)
+                logger.info("Refreshed Google Drive access token")
+            return self._credentials
+
+    def service(self):
+        """Return this thread's Drive API client."""
+        if self.fake is not None:
+            return self.fake
+        
+        credentials = self.credentials()
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            import httplib2
+            from google_auth_httplib2 import AuthorizedHttp
+            from googleapiclient.discovery import build_from_document
+            http = AuthorizedHttp(credentials, http=httplib2.Http(timeout=self.timeout))
+            service = build_from_document(drive_discovery_document(), http=http)
+            self._local.service = service
+        return service
+
+
+def get_drive_manager():
+    """Return a GoogleDriveManager using the current app's shared Drive client."""
+    from flask import current_app
+    provider = current_app.extensions['drive']
+    return GoogleDriveManager(service=provider.service(), folder_caches=provider.folder_caches)
+
+
+def get_drive_folder_cache(case_id):
+    """Return the current app's folder cache for a case."""
+    from flask import current_app
+    return current_app.extensions['drive'].folder_caches.for_case(case_id)
+
 
 class GoogleDriveManager:
     """Handles all Google Drive operations for the CoreText system."""
     
-    # Define the required scopes
-    SCOPES = ['https://www.googleapis.com/auth/drive.file']
+    SCOPES = DRIVE_SCOPES
+    
+    # Bytes per request when downloading
+    DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+    
+    # Files per list request (the API maximum)
+    LIST_PAGE_SIZE = 1000
     
-    def __init__(self, credentials_path='credentials.json', token_path='token.pickle'):
-        """Initialize the Google Drive Manager."""
+    def __init__(self, credentials_path='credentials.json', token_path='token.pickle', service=None, folder_caches=None):
+        """
+        Initialize the Google Drive Manager.
+        
+        Inside the app, use get_drive_manager(), which passes the shared
+        client and folder caches; without a service the manager
+        authenticates on its own.
+        """
         self.credentials_path = credentials_path
         self.token_path = token_path
-        self.service = None
-        self._authenticate()
+        self.service = service
+        self.folder_caches = folder_caches
+        if self.service is None:
+            self._authenticate()
     
     def _authenticate(self):
         """Authenticate with Google Drive API."""
-        credentials = None
-        
-        # Check if token file exists
-        if os.path.exists(self.token_path):
-            with open(self.token_path, 'rb') as token:
-                credentials = pickle.load(token)
-        
-        # If credentials don't exist or are invalid, get new ones
-        if not credentials or not credentials.valid:
-            if credentials and credentials.expired and credentials.refresh_token:
-                credentials.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    self.credentials_path, self.SCOPES)
-                credentials = flow.run_local_server(port=0)
-            
-            # Save the credentials for future use
-            with open(self.token_path, 'wb') as token:
-                pickle.dump(credentials, token)
-        
-        # Build the service
-        self.service = build('drive', 'v3', credentials=credentials)
+        from googleapiclient.discovery import build_from_document
+        
+        credentials = load_credentials(self.credentials_path, self.token_path, self.SCOPES)
+        self.service = build_from_document(drive_discovery_document(), credentials=credentials)
+    
+    def _folder_changed(self, folder_id):
+        if folder_id and self.folder_caches is not None:
+            self.folder_caches.invalidate(folder_id)
+    
+    def _list_all(self, query, fields, order_by=None):
+        """Run a files().list query, following nextPageToken until every page is read."""
+        params = {'q': query, 'spaces': 'drive', 'fields': fields, 'pageSize': self.LIST_PAGE_SIZE}
+        if order_by:
+            params['orderBy'] = order_by
+        
+        files = []
+        while True:
+            results = self.service.files().list(**params).execute()
+            files.extend(results.get('files', []))
+            params['pageToken'] = results.get('nextPageToken')
+            if not params['pageToken']:
+                return files
     
     def create_case_folder(self, case_name, parent_folder_id=None):
         """Create a folder for a case in Google Drive."""
         folder_metadata = {
             'name': case_name,
-            'mimeType': 'application/vnd.google-apps.folder'
+            'mimeType': FOLDER_MIME_TYPE
         }
         
         # Add parent folder if specified
@@ -59,6 +327,7 @@ class GoogleDriveManager:
             body=folder_metadata,
             fields='id,name,webViewLink'
         ).execute()
+        self._folder_changed(parent_folder_id)
         
         return {
             'id': folder.get('id'),
@@ -86,6 +355,8 @@ class GoogleDriveManager:
     
     def upload_file(self, file_path, file_name, folder_id):
         """Upload a file to Google Drive."""
+        from googleapiclient.http import MediaFileUpload
+        
         file_metadata = {
             'name': file_name,
             'parents': [folder_id]
@@ -101,6 +372,7 @@ class GoogleDriveManager:
             media_body=media,
             fields='id,name,webViewLink,mimeType'
         ).execute()
+        self._folder_changed(folder_id)
         
         return {
             'id': file.get('id'),
@@ -116,21 +388,119 @@ class GoogleDriveManager:
             fields='id,name,webViewLink,mimeType,size,createdTime,modifiedTime'
         ).execute()
     
+    def create_folder(self, name, parent_id=None):
+        """Create a folder, optionally inside another one."""
+        return self.create_case_folder(name, parent_id)
+    
+    def get_file_info(self, file_id, num_retries=0):
+        """Get the metadata needed to import a file."""
+        return self.service.files().get(
+            fileId=file_id,
+            fields='id,name,mimeType,size,parents,modifiedTime'
+        ).execute(num_retries=num_retries)
+    
+    def get_folder_info(self, folder_id):
+        """Get a folder's name and parents, or None if it cannot be read."""
+        try:
+            return self.service.files().get(fileId=folder_id, fields='id,name,parents').execute()
+        except Exception as e:
+            logger.warning("Could not read Drive folder %s: %s", folder_id, e)
+            return None
+    
+    def download_file(self, file_id, local_path, num_retries=0):
+        """
+        Stream a file's content to local_path in DOWNLOAD_CHUNK_SIZE requests.
+        
+        With num_retries, requests refused for rate limiting or failed with
+        a server error are retried with exponential backoff.
+        """
+        from googleapiclient.http import MediaIoBaseDownload
+        
+        request = self.service.files().get_media(fileId=file_id)
+        with open(local_path, 'wb') as f:
+            downloader = MediaIoBaseDownload(f, request, chunksize=self.DOWNLOAD_CHUNK_SIZE)
+            done = False
+            while not done:
+                _, done = downloader.next_chunk(num_retries=num_retries)
+        return local_path
+    
     def search_files(self, query):
-        """Search for files in Google Drive."""
-        results = self.service.files().list(
-            q=query,
-            spaces='drive',
-            fields='files(id, name, mimeType, webViewLink)'
-        ).execute()
+        """Search for files in Google Drive, reading every page of results."""
+        return self._list_all(query, 'nextPageToken, files(id, name, mimeType, webViewLink)')
+    
+    def list_folder_contents(self, folder_id):
+        """
+        List a folder for the folder browser, subfolders first, then by name.
         
-        return results.get('files', [])
+        Returns:
+            list: {'id', 'name', 'type' ('folder' or 'file'), 'mime_type',
+                'size', 'modified_time'} for every item not in the trash
+        """
+        files = self._list_all(
+            f"'{folder_id}' in parents and trashed = false",
+            BROWSE_FIELDS,
+            order_by='folder,name'
+        )
+        return [
+            {
+                'id': f['id'],
+                'name': f.get('name'),
+                'type': 'folder' if f.get('mimeType') == FOLDER_MIME_TYPE else 'file',
+                'mime_type': f.get('mimeType'),
+                'size': f.get('size'),
+                'modified_time': f.get('modifiedTime')
+            }
+            for f in files
+        ]
     
     def get_folder_contents(self, folder_id):
         """Get all files and subfolders in a folder."""
         query = f"'{folder_id}' in parents"
         return self.search_files(query)
     
+    def list_files_recursive(self, folder_id):
+        """
+        List every file (not folder) below a folder, at any depth.
+        
+        Costs one paginated list per folder in the tree.
+        """
+        files = []
+        folder_ids = [folder_id]
+        while folder_ids:
+            current_id = folder_ids.pop()
+            for f in self._list_all(f"'{current_id}' in parents and trashed = false", f'nextPageToken, files({SYNC_FILE_FIELDS})'):
+                if f.get('mimeType') == FOLDER_MIME_TYPE:
+                    folder_ids.append(f['id'])
+                else:
+                    files.append(f)
+        return files
+    
+    def get_start_page_token(self):
+        """Return the changes feed position for 'now'."""
+        return self.service.changes().getStartPageToken().execute()['startPageToken']
+    
+    def list_changes(self, page_token):
+        """
+        Read the changes feed from page_token to the end.
+        
+        Returns:
+            tuple: (changes, new_start_page_token) where each change has
+                fileId, removed and, unless removed, file with
+                SYNC_FILE_FIELDS; pass the new token next time
+        """
+        changes = []
+        while True:
+            results = self.service.changes().list(
+                pageToken=page_token,
+                spaces='drive',
+                pageSize=self.LIST_PAGE_SIZE,
+                fields=f'nextPageToken, newStartPageToken, changes(fileId, removed, file({SYNC_FILE_FIELDS}))'
+            ).execute()
+            changes.extend(results.get('changes', []))
+            if results.get('newStartPageToken'):
+                return changes, results['newStartPageToken']
+            page_token = results['nextPageToken']
+    
     def create_file_shortcut(self, file_id, shortcut_name, folder_id):
         """Create a shortcut to a file in another folder."""
         shortcut_metadata = {
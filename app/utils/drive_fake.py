@@ -0,0 +1,287 @@
+import re
+import copy
+import uuid
+import threading
+from datetime import datetime, timezone
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+# Fields Drive returns for a file when the request does not ask for specific ones
+DEFAULT_FILE_FIELDS = ('kind', 'id', 'name', 'mimeType')
+
+_CONDITION = re.compile(
+    r"^(?:'(?P<parent>[^']*)' in parents"
+    r"|(?P<field>name|mimeType) (?P<op>=|!=|contains) '(?P<value>[^']*)'"
+    r"|trashed (?P<trashed_op>=|!=) (?P<trashed>true|false))$"
+)
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def _split_fields(fields):
+    """Split 'a,b(c,d),e' at top-level commas."""
+    parts, depth, current = [], 0, ''
+    for ch in fields:
+        if ch == ',' and depth == 0:
+            parts.append(current.strip())
+            current = ''
+            continue
+        depth += ch == '('
+        depth -= ch == ')'
+        current += ch
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def _project(resource, fields):
+    """Keep only the requested fields, as the Drive API does for the fields parameter."""
+    if not fields or fields == '*':
+        return resource
+    projected = {}
+    for field in _split_fields(fields):
+        if '(' in field:
+            name, nested = field[:-1].split('(', 1)
+            value = resource.get(name.strip())
+            if isinstance(value, list):
+                projected[name.strip()] = [_project(item, nested) for item in value]
+            elif value is not None:
+                projected[name.strip()] = _project(value, nested)
+        elif field in resource:
+            projected[field] = resource[field]
+    return projected
+
+
+def _http_error(status, message):
+    import httplib2
+    from googleapiclient.errors import HttpError
+    response = httplib2.Response({'status': status})
+    response.reason = message
+    return HttpError(response, message.encode('utf-8'))
+
+
+class _FakeRequest:
+    def __init__(self, run):
+        self._run = run
+
+    def execute(self, num_retries=0):
+        return self._run()
+
+
+class _FakeMediaHttp:
+    """Serves ranged GETs the way MediaIoBaseDownload issues them."""
+
+    def __init__(self, content):
+        self.content = content
+
+    def request(self, uri, method='GET', headers=None, **kwargs):
+        import httplib2
+        total = len(self.content)
+        match = re.match(r'bytes=(\d+)-(\d+)', (headers or {}).get('range', ''))
+        if not match:
+            return httplib2.Response({'status': 200, 'content-length': str(total)}), self.content
+        start, end = int(match.group(1)), min(int(match.group(2)), total - 1)
+        if start >= total:
+            return httplib2.Response({'status': 416, 'content-range': f'bytes */{total}'}), b''
+        response = httplib2.Response({'status': 206, 'content-range': f'bytes {start}-{end}/{total}'})
+        return response, self.content[start:end + 1]
+
+
+class _FakeMediaRequest:
+    def __init__(self, content, file_id):
+        self.http = _FakeMediaHttp(content)
+        self.uri = f'fake://drive/files/{file_id}?alt=media'
+        self.headers = {}
+
+    def execute(self, num_retries=0):
+        return self.http.content
+
+
+class _FakeFiles:
+    def __init__(self, drive):
+        self._drive = drive
+
+    def create(self, body=None, media_body=None, fields=None, **kwargs):
+        def run():
+            content = media_body.getbytes(0, media_body.size()) if media_body is not None else b''
+            resource = self._drive.add_file(
+                body.get('name', 'Untitled'),
+                parents=body.get('parents'),
+                mime_type=body.get('mimeType', 'application/octet-stream'),
+                content=content,
+                extra={k: v for k, v in body.items() if k not in ('name', 'parents', 'mimeType')}
+            )
+            return _project(resource, fields) if fields else _project(resource, ','.join(DEFAULT_FILE_FIELDS))
+        return _FakeRequest(run)
+
+    def get(self, fileId, fields=None, **kwargs):
+        def run():
+            resource = self._drive.get(fileId)
+            return _project(resource, fields or ','.join(DEFAULT_FILE_FIELDS))
+        return _FakeRequest(run)
+
+    def get_media(self, fileId, **kwargs):
+        self._drive.get(fileId)
+        return _FakeMediaRequest(self._drive.contents.get(fileId, b''), fileId)
+
+    def list(self, q=None, fields=None, pageSize=100, pageToken=None, orderBy=None, **kwargs):
+        def run():
+            matches = self._drive.query(q)
+            if orderBy:
+                for key in reversed([part.strip() for part in orderBy.split(',')]):
+                    name, _, direction = key.partition(' ')
+                    if name == 'folder':
+                        # Folders before files
+                        matches.sort(key=lambda f: f['mimeType'] != FOLDER_MIME_TYPE, reverse=direction == 'desc')
+                    else:
+                        matches.sort(key=lambda f: f.get(name) or '', reverse=direction == 'desc')
+            start = int(pageToken or 0)
+            page = matches[start:start + min(int(pageSize), 1000)]
+            self._drive.list_calls += 1
+            result = {'kind': 'drive#fileList', 'files': page}
+            if start + len(page) < len(matches):
+                result['nextPageToken'] = str(start + len(page))
+            return _project(result, fields or f"nextPageToken,kind,files({','.join(DEFAULT_FILE_FIELDS)})")
+        return _FakeRequest(run)
+
+    def delete(self, fileId, **kwargs):
+        def run():
+            self._drive.delete(fileId)
+            return ''
+        return _FakeRequest(run)
+
+
+class _FakeChanges:
+    def __init__(self, drive):
+        self._drive = drive
+
+    def getStartPageToken(self, **kwargs):
+        def run():
+            return {'kind': 'drive#startPageToken', 'startPageToken': str(len(self._drive.change_log))}
+        return _FakeRequest(run)
+
+    def list(self, pageToken, pageSize=100, fields=None, **kwargs):
+        def run():
+            with self._drive._lock:
+                log = list(self._drive.change_log)
+                start = int(pageToken)
+                page = []
+                for file_id, time in log[start:start + min(int(pageSize), 1000)]:
+                    resource = self._drive.files_by_id.get(file_id)
+                    change = {'kind': 'drive#change', 'changeType': 'file', 'fileId': file_id, 'removed': resource is None, 'time': time}
+                    if resource is not None:
+                        change['file'] = copy.deepcopy(resource)
+                    page.append(change)
+            self._drive.changes_calls += 1
+            result = {'kind': 'drive#changeList', 'changes': page}
+            if start + len(page) < len(log):
+                result['nextPageToken'] = str(start + len(page))
+            else:
+                result['newStartPageToken'] = str(len(log))
+            return _project(result, fields or 'kind,nextPageToken,newStartPageToken,changes')
+        return _FakeRequest(run)
+
+
+class FakeDriveService:
+    """
+    In-memory stand-in for the Drive v3 API client (DRIVE_BACKEND = 'fake').
+
+    Supports the calls GoogleDriveManager makes: files().create, get,
+    get_media (streamed through MediaIoBaseDownload), list with paging and
+    the simple query forms the app builds ('<id>' in parents, name/mimeType
+    comparisons, trashed), and delete, plus the changes feed
+    (changes().getStartPageToken and list; every add, update and delete is
+    one change). Responses honour the fields parameter. Seed content with
+    add_folder and add_file, and edit it with update.
+    """
+
+    def __init__(self):
+        self.files_by_id = {}
+        self.contents = {}
+        self.change_log = []
+        self.list_calls = 0
+        self.changes_calls = 0
+        self._lock = threading.RLock()
+
+    def files(self):
+        return _FakeFiles(self)
+
+    def changes(self):
+        return _FakeChanges(self)
+
+    def add_folder(self, name, parents=None):
+        return self.add_file(name, parents=parents, mime_type=FOLDER_MIME_TYPE)
+
+    def add_file(self, name, parents=None, mime_type='application/pdf', content=b'', extra=None):
+        """Add a file and return its resource."""
+        with self._lock:
+            file_id = uuid.uuid4().hex[:28]
+            now = _now()
+            resource = {
+                'kind': 'drive#file',
+                'id': file_id,
+                'name': name,
+                'mimeType': mime_type,
+                'parents': list(parents or []),
+                'trashed': False,
+                'createdTime': now,
+                'modifiedTime': now,
+                'webViewLink': f'https://drive.google.com/file/d/{file_id}/view',
+                **(extra or {}),
+            }
+            if mime_type != FOLDER_MIME_TYPE:
+                resource['size'] = str(len(content))
+                self.contents[file_id] = content
+            self.files_by_id[file_id] = resource
+            self.change_log.append((file_id, now))
+            return copy.deepcopy(resource)
+
+    def update(self, file_id, **fields):
+        """Change a file's metadata (e.g., trashed=True or parents=[...]) and return it."""
+        with self._lock:
+            resource = self.files_by_id.get(file_id)
+            if resource is None:
+                raise _http_error(404, f'File not found: {file_id}')
+            now = _now()
+            resource.update(fields, modifiedTime=now)
+            self.change_log.append((file_id, now))
+            return copy.deepcopy(resource)
+
+    def get(self, file_id):
+        with self._lock:
+            resource = self.files_by_id.get(file_id)
+            if resource is None:
+                raise _http_error(404, f'File not found: {file_id}')
+            return copy.deepcopy(resource)
+
+    def delete(self, file_id):
+        with self._lock:
+            if self.files_by_id.pop(file_id, None) is None:
+                raise _http_error(404, f'File not found: {file_id}')
+            self.contents.pop(file_id, None)
+            self.change_log.append((file_id, _now()))
+
+    def _matches(self, resource, condition):
+        match = _CONDITION.match(condition.strip())
+        if match is None:
+            raise ValueError(f"FakeDriveService does not support the query term {condition!r}")
+        if match.group('parent') is not None:
+            return match.group('parent') in resource['parents']
+        if match.group('trashed') is not None:
+            wanted = match.group('trashed') == 'true'
+            return (resource['trashed'] == wanted) == (match.group('trashed_op') == '=')
+        actual, value, op = resource.get(match.group('field'), ''), match.group('value'), match.group('op')
+        if op == 'contains':
+            return value in actual
+        return (actual == value) == (op == '=')
+
+    def query(self, q):
+        """Return copies of the files matching a query of 'and'-ed terms, in creation order."""
+        conditions = re.split(r'\s+and\s+', q.strip(), flags=re.IGNORECASE) if q else []
+        with self._lock:
+            return [
+                copy.deepcopy(resource) for resource in self.files_by_id.values()
+                if all(self._matches(resource, condition) for condition in conditions)
+            ]
@@ -0,0 +1,219 @@
+import os
+import time
+import uuid
+import shutil
+import logging
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.datastructures import FileStorage
+from werkzeug.utils import secure_filename
+from app import db
+from app.utils.prefork import after_fork
+
+logger = logging.getLogger(__name__)
+
+
+class DriveImportJob:
+    """
+    Progress of one import of Drive files into a case.
+
+    Each file moves through queued, downloading, downloaded, stamping and
+    then done (with its Bates range and document id) or failed (with the
+    error).
+    """
+
+    def __init__(self, case_id, file_ids, document_type=None):
+        self.id = uuid.uuid4().hex
+        self.case_id = case_id
+        self.document_type = document_type or None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.files = [
+            {'file_id': file_id, 'name': None, 'status': 'queued', 'bates_start': None,
+             'bates_end': None, 'document_id': None, 'error': None}
+            for file_id in file_ids
+        ]
+        self._lock = threading.Lock()
+
+    def update(self, index, **fields):
+        with self._lock:
+            self.files[index].update(fields)
+
+    @property
+    def finished(self):
+        return self.finished_at is not None
+
+    def to_dict(self):
+        with self._lock:
+            files = [dict(f) for f in self.files]
+        return {
+            'id': self.id,
+            'case_id': self.case_id,
+            'status': 'finished' if self.finished else 'running',
+            'total': len(files),
+            'done': sum(1 for f in files if f['status'] == 'done'),
+            'failed': sum(1 for f in files if f['status'] == 'failed'),
+            'files': files
+        }
+
+
+class DriveImporter:
+    """
+    Imports selected Drive files into a case, off the request thread.
+
+    Downloads run on a process-wide pool of DRIVE_IMPORT_WORKERS threads,
+    so the number of concurrent Drive requests stays bounded however many
+    imports are running, and each thread keeps its own Drive client and
+    connection between files. Requests refused for rate limiting are
+    retried with exponential backoff.
+
+    Files are stamped one at a time, in the order they were selected, as
+    soon as each one's download completes, so Bates numbers follow the
+    selection order while the following files keep downloading. At most
+    DRIVE_IMPORT_PREFETCH downloads run ahead of stamping, which bounds the
+    temporary disk space an import uses.
+
+    Jobs are kept in memory by the process that runs them, for
+    DRIVE_IMPORT_JOB_TTL seconds after they finish.
+
+    Configuration:
+        DRIVE_IMPORT_WORKERS: Concurrent downloads per process (default 4)
+        DRIVE_IMPORT_PREFETCH: Downloads allowed ahead of stamping (default 8)
+        DRIVE_IMPORT_RETRIES: Retries per Drive request (default 5)
+        DRIVE_IMPORT_JOB_TTL: Seconds a finished job's progress is kept
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._executor = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('DRIVE_IMPORT_WORKERS', 4)
+        app.config.setdefault('DRIVE_IMPORT_PREFETCH', 8)
+        app.config.setdefault('DRIVE_IMPORT_RETRIES', 5)
+        app.config.setdefault('DRIVE_IMPORT_JOB_TTL', 3600)
+        self.app = app
+        app.extensions['drive_import'] = self
+        after_fork(self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        # Pool threads and running jobs stay with the parent
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._executor = None
+
+    def _download_pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.app.config['DRIVE_IMPORT_WORKERS'],
+                    thread_name_prefix='drive-download'
+                )
+            return self._executor
+
+    def start(self, case_id, file_ids, document_type=None):
+        """Start importing file_ids into the case in the background and return the job."""
+        job = DriveImportJob(case_id, file_ids, document_type)
+        expired = time.time() - self.app.config['DRIVE_IMPORT_JOB_TTL']
+        with self._lock:
+            for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished_at < expired]:
+                del self._jobs[job_id]
+            self._jobs[job.id] = job
+        threading.Thread(target=self._run, args=(job,), name=f'drive-import-{job.id[:8]}', daemon=True).start()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job):
+        with self.app.app_context():
+            try:
+                self.run(job)
+            except Exception as e:
+                logger.error("Drive import %s failed: %s", job.id, e, exc_info=True)
+            finally:
+                db.session.remove()
+
+    def run(self, job):
+        """Import the job's files, in the calling thread (which needs an app context)."""
+        from app.utils.bates import BatesManager
+
+        bates_manager = BatesManager()
+        pool = self._download_pool()
+        prefetch = max(self.app.config['DRIVE_IMPORT_PREFETCH'], 1)
+        directory = tempfile.mkdtemp(prefix='drive_import_')
+        pending = deque()
+        next_index = 0
+        try:
+            for index in range(len(job.files)):
+                while next_index < len(job.files) and len(pending) < prefetch:
+                    pending.append(pool.submit(self._download, job, next_index, directory))
+                    next_index += 1
+
+                try:
+                    local_path, name = pending.popleft().result()
+                except Exception as e:
+                    logger.warning("Could not download Drive file %s: %s", job.files[index]['file_id'], e)
+                    job.update(index, status='failed', error=str(e))
+                    continue
+
+                job.update(index, status='stamping')
+                try:
+                    document = self._stamp(bates_manager, job, local_path, name)
+                    job.update(index, status='done', document_id=document.id,
+                               bates_start=document.bates_start, bates_end=document.bates_end)
+                except Exception as e:
+                    db.session.rollback()
+                    job.update(index, status='failed', error=str(e))
+                finally:
+                    os.remove(local_path)
+        finally:
+            # After a failure, wait out downloads still writing into the directory
+            for future in pending:
+                future.cancel()
+            for future in pending:
+                if not future.cancelled():
+                    future.exception()
+            shutil.rmtree(directory, ignore_errors=True)
+            job.finished_at = time.time()
+
+        summary = job.to_dict()
+        logger.info("Drive import %s into case %s: %s imported, %s failed", job.id, job.case_id, summary['done'], summary['failed'])
+        return job
+
+    def _download(self, job, index, directory):
+        """Download one file into directory (on a pool thread); returns (local path, file name)."""
+        from app.utils.drive import get_drive_manager
+
+        file_id = job.files[index]['file_id']
+        retries = self.app.config['DRIVE_IMPORT_RETRIES']
+        job.update(index, status='downloading')
+        with self.app.app_context():
+            drive_manager = get_drive_manager()
+            info = drive_manager.get_file_info(file_id, num_retries=retries)
+            name = info.get('name') or f'{file_id}.pdf'
+            job.update(index, name=name)
+            # The index keeps files with the same name apart
+            local_path = os.path.join(directory, f'{index}_{secure_filename(name) or file_id}')
+            drive_manager.download_file(file_id, local_path, num_retries=retries)
+        job.update(index, status='downloaded')
+        return local_path, name
+
+    def _stamp(self, bates_manager, job, local_path, name):
+        with open(local_path, 'rb') as stream:
+            document = bates_manager.process_document(
+                job.case_id,
+                FileStorage(stream=stream, filename=name),
+                self.app.config['UPLOAD_FOLDER']
+            )
+        if job.document_type:
+            document.document_type = job.document_type
+            db.session.commit()
+        return document
@@ -0,0 +1,350 @@
+import os
+import re
+import queue
+import logging
+import threading
+from app import db
+from app.models.case import Case
+from app.models.document import Document
+from app.models.bates_prefix import BatesPrefix
+from app.utils.drive import FOLDER_MIME_TYPE
+from app.utils.prefork import after_fork
+
+logger = logging.getLogger(__name__)
+
+# Values per IN (...) when matching Drive files against stored documents
+MATCH_CHUNK_SIZE = 500
+
+# Stop walking up a file's folders after this many levels
+MAX_FOLDER_DEPTH = 50
+
+
+class DriveSyncConflict(Exception):
+    """Another sync of the same case finished first; this run's work was rolled back."""
+
+
+def _bates_pattern(prefix):
+    # "PFX-000012.pdf", "PFX000012.pdf", or an uploaded file's
+    # "name_PFX-000012_to_PFX-000015.pdf"
+    number = rf'{re.escape(prefix)}[-_ ]?(\d+)'
+    return re.compile(rf'(?:^|_){number}(?:_to_{number})?$')
+
+
+def parse_bates_filename(filename, prefix):
+    """
+    Read the Bates range a stamped file's name carries.
+
+    Returns:
+        tuple: (start_sequence, end_sequence), or None if the name has no
+            Bates number with this prefix
+    """
+    if not prefix:
+        return None
+    match = _bates_pattern(prefix).search(os.path.splitext(filename)[0])
+    if match is None:
+        return None
+    start = int(match.group(1))
+    end = int(match.group(2)) if match.group(2) else start
+    return (start, end) if end >= start else None
+
+
+def _bates_number(prefix, sequence):
+    return f"{prefix}-{str(sequence).zfill(6)}"
+
+
+def _in_chunks(values):
+    values = list(values)
+    for i in range(0, len(values), MATCH_CHUNK_SIZE):
+        yield values[i:i + MATCH_CHUNK_SIZE]
+
+
+def _stored_file_ids(case_id, file_ids):
+    """Return the subset of file_ids already recorded on the case's documents."""
+    stored = set()
+    for chunk in _in_chunks(file_ids):
+        stored.update(
+            file_id for (file_id,) in db.session.query(Document.gdrive_file_id)
+            .filter(Document.case_id == case_id, Document.gdrive_file_id.in_(chunk))
+        )
+    return stored
+
+
+def _documents_by_bates_number(case_id, bates_numbers):
+    documents = {}
+    for chunk in _in_chunks(bates_numbers):
+        for document in Document.query.filter(Document.case_id == case_id, Document.bates_number.in_(chunk)):
+            documents[document.bates_number] = document
+    return documents
+
+
+def _files_in_folder(changes, root_id, drive_manager):
+    """
+    Pick the files below root_id out of a list of changes.
+
+    A file's folders are resolved upwards until the root (inside) or the
+    top of the drive (outside) is reached. Folders that appear in the
+    changes themselves cost nothing; any other folder costs one call, once
+    per sync.
+    """
+    latest = {}
+    for change in changes:
+        latest[change['fileId']] = change
+
+    parents_of = {}
+    for change in latest.values():
+        f = change.get('file')
+        if f and f.get('mimeType') == FOLDER_MIME_TYPE:
+            parents_of[f['id']] = f.get('parents', [])
+
+    inside = {root_id: True}
+
+    def under_root(folder_id):
+        path = []
+        current_id = folder_id
+        while current_id is not None and current_id not in inside and len(path) < MAX_FOLDER_DEPTH:
+            path.append(current_id)
+            if current_id not in parents_of:
+                info = drive_manager.get_folder_info(current_id)
+                parents_of[current_id] = (info or {}).get('parents', [])
+            parents = parents_of[current_id]
+            current_id = parents[0] if parents else None
+        answer = inside.get(current_id, False)
+        for visited_id in path:
+            inside[visited_id] = answer
+        return answer
+
+    files = []
+    for change in latest.values():
+        f = change.get('file')
+        if change.get('removed') or not f or f.get('trashed') or f.get('mimeType') == FOLDER_MIME_TYPE:
+            continue
+        if f.get('parents') and under_root(f['parents'][0]):
+            files.append(f)
+    return files
+
+
+def _import_files(case, files, result):
+    """Add documents for files not yet recorded, linking those whose Bates number is already stored."""
+    stored = _stored_file_ids(case.id, [f['id'] for f in files])
+    new_files = sorted((f for f in files if f['id'] not in stored), key=lambda f: f['name'])
+    result['skipped'] = len(files) - len(new_files)
+    if not new_files:
+        return
+
+    prefix = case.default_prefix
+    if prefix is None:
+        result['errors'].append("Case has no default Bates prefix")
+        return
+
+    ranges = []
+    for f in new_files:
+        bates_range = parse_bates_filename(f['name'], prefix.prefix)
+        if bates_range is None:
+            result['errors'].append(f"Could not extract Bates number from {f['name']}")
+        else:
+            ranges.append((f, bates_range))
+
+    documents = _documents_by_bates_number(case.id, {_bates_number(prefix.prefix, start) for _, (start, _) in ranges})
+    last_sequence = 0
+
+    for f, (start, end) in ranges:
+        document = documents.get(_bates_number(prefix.prefix, start))
+        if document is not None:
+            # Usually the stamped copy of a document uploaded here
+            if document.gdrive_file_id is None:
+                document.gdrive_file_id = f['id']
+                result['linked'] += 1
+            else:
+                result['errors'].append(f"Bates number {document.bates_number} of {f['name']} is already in use")
+            continue
+
+        document = Document(
+            case_id=case.id,
+            original_filename=f['name'],
+            file_extension=os.path.splitext(f['name'])[1],
+            bates_number=_bates_number(prefix.prefix, start),
+            bates_sequence=start,
+            bates_start=_bates_number(prefix.prefix, start),
+            bates_end=_bates_number(prefix.prefix, end),
+            prefix_id=prefix.id,
+            start_seq=start,
+            end_seq=end,
+            page_count=end - start + 1,
+            gdrive_file_id=f['id']
+        )
+        db.session.add(document)
+        documents[document.bates_number] = document
+        result['imported'] += 1
+        last_sequence = max(last_sequence, end)
+
+    # Numbers issued outside the app must not be issued again
+    if last_sequence:
+        BatesPrefix.query.filter(
+            BatesPrefix.id == prefix.id,
+            db.func.coalesce(BatesPrefix.current_sequence, 1) <= last_sequence
+        ).update({BatesPrefix.current_sequence: last_sequence + 1}, synchronize_session=False)
+
+
+def sync_case(case, drive_manager, full=False):
+    """
+    Import the files added to a case's Bates folder in Drive since the last sync.
+
+    The first sync (or one with full=True) lists the folder tree once;
+    later ones read only the Drive changes feed from the position stored in
+    Case.drive_changes_token. Files are matched against the case's documents
+    by Drive file id, in sets, one query per MATCH_CHUNK_SIZE files.
+
+    The new documents and the new feed position are committed together,
+    and only if the stored position is still the one this sync started
+    from, so two syncs of a case running at once cannot both import.
+
+    Returns:
+        dict: Counts of imported, linked (already stored, now with their
+            Drive id) and skipped (already synced) files, the number of
+            files examined, whether the whole folder was listed, and errors
+
+    Raises:
+        DriveSyncConflict: If another sync of the case committed first
+    """
+    folder_id = case.drive_bates_folder_id
+    if not folder_id:
+        raise ValueError("Bates labeled folder not found in Google Drive")
+
+    previous_token = case.drive_changes_token
+    result = {'imported': 0, 'linked': 0, 'skipped': 0, 'examined': 0, 'full': full or previous_token is None, 'errors': []}
+
+    if result['full']:
+        # Take the position first, so changes made during the listing are read next time
+        new_token = drive_manager.get_start_page_token()
+        files = drive_manager.list_files_recursive(folder_id)
+    else:
+        changes, new_token = drive_manager.list_changes(previous_token)
+        files = _files_in_folder(changes, folder_id, drive_manager)
+    result['examined'] = len(files)
+
+    try:
+        _import_files(case, files, result)
+        claimed = Case.query.filter(
+            Case.id == case.id,
+            Case.drive_changes_token == previous_token
+        ).update({Case.drive_changes_token: new_token}, synchronize_session=False)
+        if not claimed:
+            raise DriveSyncConflict(f"Case {case.id} was synced concurrently")
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    logger.info(
+        "Drive sync of case %s: %s imported, %s linked, %s skipped, %s errors (%s)",
+        case.id, result['imported'], result['linked'], result['skipped'], len(result['errors']),
+        'full listing' if result['full'] else 'changes feed'
+    )
+    return result
+
+
+def syncable_cases():
+    """Return the cases with Drive enabled and a Bates folder to sync from."""
+    return Case.query.filter(
+        Case.google_drive_enabled.is_(True),
+        Case.drive_bates_folder_id.isnot(None)
+    ).order_by(Case.id).all()
+
+
+class DriveSyncWorker:
+    """
+    Background thread that runs Drive syncs.
+
+    submit() only queues a case id, so the sync request returns at once.
+    With DRIVE_SYNC_INTERVAL set, the thread also syncs every Drive-enabled
+    case on that period. Each gunicorn worker would run its own timer, so
+    multi-worker deployments should rather leave the interval at 0 and run
+    `flask sync-drive` from cron or Cloud Scheduler; overlapping syncs of a
+    case are safe either way (see sync_case).
+
+    Configuration:
+        DRIVE_SYNC: 'background' (default) or 'inline' (sync in the request)
+        DRIVE_SYNC_INTERVAL: Seconds between syncs of all cases; 0 (default) for none
+    """
+
+    def __init__(self, app=None):
+        self.queue = queue.Queue()
+        self.thread = None
+        self.app = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('DRIVE_SYNC', os.environ.get('DRIVE_SYNC', 'background'))
+        app.config.setdefault('DRIVE_SYNC_INTERVAL', int(os.environ.get('DRIVE_SYNC_INTERVAL', 0)))
+        self.app = app
+        app.extensions['drive_sync'] = self
+        after_fork(self._reset_after_fork)
+        if app.config['DRIVE_SYNC_INTERVAL']:
+            # Started by the first request, i.e. in the worker process rather
+            # than in a preloading master
+            app.before_request(self._ensure_running)
+
+    def _reset_after_fork(self):
+        # The thread did not survive the fork and the queue's locks may be held
+        self.queue = queue.Queue()
+        self.thread = None
+
+    @property
+    def enabled(self):
+        return self.app is not None and self.app.config['DRIVE_SYNC'] == 'background'
+
+    def _ensure_running(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name='drive-sync', daemon=True)
+            self.thread.start()
+
+    def submit(self, case_id):
+        """Queue a sync of one case, starting the thread if needed."""
+        self.queue.put(case_id)
+        self._ensure_running()
+
+    def _run(self):
+        interval = self.app.config['DRIVE_SYNC_INTERVAL'] or None
+        while True:
+            try:
+                case_ids = {self.queue.get(timeout=interval)}
+            except queue.Empty:
+                case_ids = None
+            # Several requests for the same case collapse into one sync
+            while case_ids is not None:
+                try:
+                    case_ids.add(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            with self.app.app_context():
+                try:
+                    if case_ids is None:
+                        cases = syncable_cases()
+                    else:
+                        cases = Case.query.filter(Case.id.in_(case_ids)).order_by(Case.id).all()
+                    self.sync_cases(cases)
+                finally:
+                    db.session.remove()
+
+    def sync_cases(self, cases):
+        """
+        Sync each case in turn, logging (rather than raising) failures.
+
+        Returns:
+            dict: case id -> sync_case result, or the exception it raised
+        """
+        from app.utils.drive import get_drive_manager
+
+        results = {}
+        for case in cases:
+            try:
+                results[case.id] = sync_case(case, get_drive_manager())
+            except DriveSyncConflict as e:
+                logger.info("Skipped Drive sync: %s", e)
+                results[case.id] = e
+            except Exception as e:
+                logger.error("Drive sync of case %s failed: %s", case.id, e, exc_info=True)
+                results[case.id] = e
+        return results
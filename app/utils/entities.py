@@ -0,0 +1,249 @@
+import queue
+import logging
+import threading
+from datetime import datetime
+from app import db
+from app.models.document import Document
+from app.models.document_page import DocumentPage
+from app.models.document_entity import DocumentEntity, normalize_entity
+from app.utils.prefork import after_fork
+
+# Entity types kept in the index
+ENTITY_LABELS = ('PERSON', 'ORG', 'DATE', 'MONEY')
+
+# Pipeline components NER does not need. Excluding them skips both loading
+# and running them, which is most of the per-page cost.
+UNUSED_COMPONENTS = ['tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'senter', 'morphologizer']
+
+# Longest mention stored; longer spans are almost always extraction noise
+MAX_ENTITY_LENGTH = 255
+
+
+class ExtractionUnavailable(RuntimeError):
+    """spaCy or its model cannot be loaded, so no entities can be extracted."""
+
+
+class EntityExtractor:
+    """Extract named entities from stored page text with spaCy."""
+
+    def __init__(self, model='en_core_web_sm', batch_size=64, n_process=1):
+        self.model = model
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self._nlp = None
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def nlp(self):
+        """Load the spaCy pipeline on first use (it takes seconds and a lot of memory)."""
+        if self._nlp is None:
+            self.logger.info("Loading spaCy model %s", self.model)
+            try:
+                import spacy
+                self._nlp = spacy.load(self.model, exclude=UNUSED_COMPONENTS)
+            except (ImportError, OSError) as e:
+                # spacy.load raises OSError when the model package is not installed
+                raise ExtractionUnavailable(f"spaCy model {self.model} cannot be loaded: {e}") from e
+        return self._nlp
+
+    def extract_documents(self, documents):
+        """
+        Replace the entity rows of the given documents from their page text.
+
+        All pages of all documents go through a single nlp.pipe call, so
+        spaCy can batch them (and spread them over n_process workers).
+
+        Args:
+            documents: Documents whose pages already have text
+
+        Returns:
+            int: Number of entity rows written
+        """
+        documents = list(documents)
+        if not documents:
+            return 0
+        document_ids = [document.id for document in documents]
+
+        pages = (
+            db.session.query(DocumentPage.document_id, DocumentPage.case_id,
+                             DocumentPage.page_index, DocumentPage.text)
+            .filter(DocumentPage.document_id.in_(document_ids))
+            .filter(DocumentPage.text.isnot(None))
+            .order_by(DocumentPage.document_id, DocumentPage.page_index)
+        )
+        texts = ((text, (document_id, case_id, page_index)) for document_id, case_id, page_index, text in pages)
+
+        rows = []
+        seen = set()
+        for doc, (document_id, case_id, page_index) in self.nlp.pipe(
+            texts, as_tuples=True, batch_size=self.batch_size, n_process=self.n_process
+        ):
+            for ent in doc.ents:
+                if ent.label_ not in ENTITY_LABELS:
+                    continue
+                text = ent.text.strip()[:MAX_ENTITY_LENGTH]
+                normalized = normalize_entity(text)
+                if not normalized:
+                    continue
+                # One row per mention type per page is enough for lookups
+                key = (document_id, page_index, ent.label_, normalized)
+                if key in seen:
+                    continue
+                seen.add(key)
+                rows.append({
+                    'document_id': document_id,
+                    'case_id': case_id,
+                    'page_index': page_index,
+                    'label': ent.label_,
+                    'text': text,
+                    'normalized': normalized,
+                })
+
+        DocumentEntity.query.filter(DocumentEntity.document_id.in_(document_ids)).delete(synchronize_session=False)
+        db.session.bulk_insert_mappings(DocumentEntity, rows)
+
+        now = datetime.utcnow()
+        for document in documents:
+            document.entities_extracted_at = now
+
+        self.logger.info("Extracted %s entities from %s documents", len(rows), len(documents))
+        return len(rows)
+
+    def pending_documents(self, limit=None):
+        """Return documents with page text whose entities have not been extracted."""
+        query = (
+            Document.query
+            .filter(Document.entities_extracted_at.is_(None))
+            .filter(Document.pages.any(DocumentPage.text.isnot(None)))
+            .order_by(Document.id)
+        )
+        if limit:
+            query = query.limit(limit)
+        return query.all()
+
+    def run_pending(self, chunk_size=50):
+        """
+        Extract entities for every pending document, committing per chunk.
+
+        Returns:
+            int: Number of documents processed
+        """
+        processed = 0
+        while True:
+            documents = self.pending_documents(limit=chunk_size)
+            if not documents:
+                return processed
+            try:
+                self.extract_documents(documents)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            processed += len(documents)
+
+
+class EntityExtractionWorker:
+    """
+    Background thread that extracts entities for newly ingested documents.
+
+    Uploads only enqueue document ids; the thread drains the queue in
+    batches inside an app context, so requests never wait on spaCy. Any
+    documents missed (e.g., queued when the process exited) are picked up by
+    `flask extract-entities`, which processes everything still pending.
+    """
+
+    def __init__(self, app=None):
+        self.queue = queue.Queue()
+        self.thread = None
+        self.app = None
+        self.extractor = None
+        self.logger = logging.getLogger(__name__)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ENTITY_EXTRACTION', 'background')
+        app.config.setdefault('SPACY_MODEL', 'en_core_web_sm')
+        app.config.setdefault('ENTITY_BATCH_SIZE', 64)
+        self.app = app
+        self.extractor = EntityExtractor(
+            model=app.config['SPACY_MODEL'],
+            batch_size=app.config['ENTITY_BATCH_SIZE']
+        )
+        app.extensions['entity_worker'] = self
+        after_fork(self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        # The thread did not survive the fork and the queue's locks may be
+        # held; the thread starts again on the next submit
+        self.queue = queue.Queue()
+        self.thread = None
+
+    @property
+    def enabled(self):
+        return self.app is not None and self.app.config['ENTITY_EXTRACTION'] == 'background'
+
+    def submit(self, document_id):
+        """Queue a document for extraction, starting the thread if needed."""
+        if not self.enabled:
+            return
+        self.queue.put(document_id)
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name='entity-extraction', daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while True:
+            document_ids = [self.queue.get()]
+            # Drain whatever else is waiting so spaCy sees one larger batch
+            while True:
+                try:
+                    document_ids.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            with self.app.app_context():
+                try:
+                    documents = Document.query.filter(Document.id.in_(document_ids)).all()
+                    self.extractor.extract_documents(documents)
+                    db.session.commit()
+                except ExtractionUnavailable as e:
+                    db.session.rollback()
+                    self.logger.error("Entity extraction disabled: %s", e)
+                    self.app.config['ENTITY_EXTRACTION'] = 'off'
+                    return
+                except Exception as e:
+                    db.session.rollback()
+                    self.logger.error("Entity extraction failed for documents %s: %s", document_ids, e, exc_info=True)
+                finally:
+                    db.session.remove()
+
+
+def submit_for_extraction(document):
+    """Queue a document's entities for background extraction, if enabled."""
+    from flask import current_app
+    worker = current_app.extensions.get('entity_worker')
+    if worker is not None:
+        worker.submit(document.id)
+
+
+def entity_document_ids(entity, case_id=None, label=None):
+    """
+    Build a subquery of ids of documents mentioning an entity.
+
+    Args:
+        entity: Mention to look for, e.g. "Fred Pollard"
+        case_id: Restrict to one case
+        label: Restrict to one entity type (PERSON, ORG, DATE, MONEY)
+
+    Returns:
+        Query selecting document_id
+    """
+    query = db.session.query(DocumentEntity.document_id).filter(
+        DocumentEntity.normalized == normalize_entity(entity)
+    )
+    if case_id:
+        query = query.filter(DocumentEntity.case_id == case_id)
+    if label:
+        query = query.filter(DocumentEntity.label == label)
+    return query.distinct()
@@ -1,7 +1,3 @@
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
 import os
 import pickle
 
@@ -13,6 +9,10 @@ class GoogleDriveService:
     
     def authenticate(self):
         """Authenticate with Google Drive"""
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from google.auth.transport.requests import Request
+        from googleapiclient.discovery import build
+        
         if os.path.exists('token.pickle'):
             with open('token.pickle', 'rb') as token:
                 self.creds = pickle.load(token)
@@ -66,6 +66,8 @@ class GoogleDriveService:
     
     def upload_file(self, file_path, folder_id):
         """Upload a file to Google Drive"""
+        from googleapiclient.http import MediaFileUpload
+        
         file_name = os.path.basename(file_path)
         
         file_metadata = {
@@ -0,0 +1,169 @@
+import os
+import re
+import json
+import uuid
+import queue
+import atexit
+import logging
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from flask import g, has_request_context, request
+
+# Set once per process by configure_logging
+_queue_handler = None
+_listener = None
+
+# Accepted incoming request ids; anything else is replaced by a new one
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp each record with the id of the request that logged it ('-' outside requests)."""
+
+    def filter(self, record):
+        record.request_id = g.get('request_id', '-') if has_request_context() else '-'
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', '-'),
+            'process': record.process,
+            'thread': record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _StructuredQueueHandler(QueueHandler):
+    """
+    QueueHandler that keeps the traceback separate from the message.
+
+    The stock prepare() folds the traceback into the message text; this one
+    merges the arguments into the message and renders the traceback into
+    exc_text, so the formatter on the listener side can still emit it as its
+    own field. Both happen on the logging thread, where the arguments and
+    the exception are still valid.
+    """
+
+    def prepare(self, record):
+        message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+def _start_listener(handlers):
+    global _listener
+    log_queue = queue.SimpleQueue()
+    _queue_handler.queue = log_queue
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop_listener():
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def _restart_listener():
+    if _listener is not None and _listener._thread is None:
+        _start_listener(_listener.handlers)
+
+
+def configure_logging(log_folder, level=None, log_format=None):
+    """
+    Route the root logger through a queue to a rotating log file.
+
+    Request threads only put records on a queue; a listener thread formats
+    them and does the file I/O. Calling this again (e.g., create_app called
+    twice in one process) leaves the existing setup in place.
+
+    Args:
+        log_folder: Directory for coretext.log
+        level: Root level name (default LOG_LEVEL or INFO)
+        log_format: 'json' (default LOG_FORMAT or json) or 'text'
+
+    Returns:
+        logging.Logger: The root logger
+    """
+    global _queue_handler
+    logger = logging.getLogger()
+    if _queue_handler is not None:
+        return logger
+
+    level = level or os.environ.get('LOG_LEVEL', 'INFO')
+    log_format = log_format or os.environ.get('LOG_FORMAT', 'json')
+
+    os.makedirs(log_folder, exist_ok=True)
+    file_handler = RotatingFileHandler(
+        os.path.join(log_folder, 'coretext.log'),
+        maxBytes=10485760,  # 10 MB
+        backupCount=5
+    )
+    file_handler.setLevel(level)
+    if log_format == 'json':
+        file_handler.setFormatter(JsonFormatter())
+    else:
+        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'))
+
+    _queue_handler = _StructuredQueueHandler(queue.SimpleQueue())
+    _queue_handler.addFilter(RequestIdFilter())
+    _start_listener([file_handler])
+
+    logger.setLevel(level)
+    logger.addHandler(_queue_handler)
+    atexit.register(_stop_listener)
+    # Drain and stop the listener before forking, so no write to the log file
+    # is in progress (and its buffer lock held) in the child's copy; both
+    # processes then start their own listener
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(before=_stop_listener, after_in_parent=_restart_listener, after_in_child=_restart_listener)
+    return logger
+
+
+class RequestIds:
+    """
+    Give every request an id that is attached to its log records.
+
+    The id is taken from the incoming REQUEST_ID_HEADER when a proxy or
+    caller already set a valid one, otherwise generated, and echoed back in
+    the response so a report can be matched to the log lines.
+
+    Configuration:
+        REQUEST_ID_HEADER: Default 'X-Request-ID'
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('REQUEST_ID_HEADER', 'X-Request-ID')
+        header = app.config['REQUEST_ID_HEADER']
+        app.extensions['request_ids'] = self
+
+        @app.before_request
+        def assign_request_id():
+            incoming = request.headers.get(header, '')
+            g.request_id = incoming if REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex
+
+        @app.after_request
+        def echo_request_id(response):
+            if 'request_id' in g:
+                response.headers[header] = g.request_id
+            return response
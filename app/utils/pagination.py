@@ -0,0 +1,215 @@
+import json
+import time
+import base64
+import logging
+import threading
+from collections import OrderedDict
+from flask import request, url_for
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# Total counts are cached per listing for a short time so that turning pages
+# does not re-run COUNT(*); ingest invalidates the counts for its case.
+COUNT_CACHE_TTL = 60
+
+# Keys include search terms, so the least recently used counts are evicted
+# beyond this many entries
+COUNT_CACHE_SIZE = 1024
+
+_count_cache = OrderedDict()
+_count_cache_lock = threading.Lock()
+
+
+def encode_cursor(values):
+    """Encode the sort key of a row as an opaque, URL-safe cursor."""
+    raw = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Returns:
+        tuple: Sort key values, or None if the cursor is missing or malformed
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        logger.warning("Ignoring malformed pagination cursor: %r", cursor)
+        return None
+    if not isinstance(values, list):
+        return None
+    return tuple(values)
+
+
+def cached_count(query, key, ttl=COUNT_CACHE_TTL):
+    """
+    Count the rows of a query, reusing a recent count for the same key.
+
+    Args:
+        query: Query to count (ordering is ignored)
+        key: Hashable key identifying the listing and its filters
+        ttl: Seconds a count stays valid
+
+    Returns:
+        int: Row count
+    """
+    now = time.monotonic()
+    with _count_cache_lock:
+        cached = _count_cache.get(key)
+        if cached and cached[1] > now:
+            _count_cache.move_to_end(key)
+            return cached[0]
+
+    total = query.order_by(None).count()
+
+    with _count_cache_lock:
+        _count_cache[key] = (total, now + ttl)
+        _count_cache.move_to_end(key)
+        while len(_count_cache) > COUNT_CACHE_SIZE:
+            _count_cache.popitem(last=False)
+    return total
+
+
+def invalidate_counts(*prefix):
+    """Drop cached counts whose key starts with the given values."""
+    with _count_cache_lock:
+        for key in [k for k in _count_cache if k[:len(prefix)] == prefix]:
+            del _count_cache[key]
+
+
+def _seek(columns, values, descending):
+    """
+    Build "row comes after values" for a multi-column sort key.
+
+    Expanded to (a > x) OR (a = x AND b > y) rather than a row-value
+    comparison, so it works on every database and still seeks on an index
+    whose leading columns match the sort key.
+    """
+    clauses = []
+    for i, column in enumerate(columns):
+        step = column < values[i] if descending else column > values[i]
+        equal = [columns[j] == values[j] for j in range(i)]
+        clauses.append(db.and_(*equal, step) if equal else step)
+    return db.or_(*clauses)
+
+
+class KeysetPage:
+    """
+    One page of a keyset (seek) paginated listing.
+
+    Unlike OFFSET pagination the cost of fetching a page does not grow with
+    its depth: each page is a seek on the sort index starting at the last row
+    of the previous page, encoded in next_cursor.
+    """
+
+    def __init__(self, items, per_page, next_cursor=None, prev_cursor=None, total=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def next_url(self):
+        """URL of the following page, keeping the current request's filters."""
+        return self._url('after', self.next_cursor) if self.has_next else None
+
+    def prev_url(self):
+        """URL of the preceding page, keeping the current request's filters."""
+        return self._url('before', self.prev_cursor) if self.has_prev else None
+
+    def _url(self, name, cursor):
+        args = request.args.to_dict(flat=False)
+        args.pop('after', None)
+        args.pop('before', None)
+        args[name] = cursor
+        return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def keyset_paginate(query, columns, after=None, before=None, per_page=50,
+                    descending=False, count_key=None, total=None):
+    """
+    Fetch one page of a query using keyset pagination.
+
+    Args:
+        query: Filtered query without ordering
+        columns: Sort key columns; the last one must be unique (e.g., the id)
+        after: Cursor of the row the page starts after
+        before: Cursor of the row the page ends before (for "previous" links)
+        per_page: Page size
+        descending: Sort newest/highest first
+        count_key: If given, the total is counted once and cached under this key
+        total: Known total (e.g., a counter column); skips counting entirely
+
+    Returns:
+        KeysetPage
+    """
+    columns = list(columns)
+    after_values = decode_cursor(after)
+    before_values = decode_cursor(before) if after_values is None else None
+
+    # Walking backwards from a "before" cursor reads the index in reverse
+    reverse = before_values is not None
+    direction = descending != reverse
+
+    paged = query
+    if after_values is not None and len(after_values) == len(columns):
+        paged = paged.filter(_seek(columns, after_values, descending))
+    elif reverse and len(before_values) == len(columns):
+        paged = paged.filter(_seek(columns, before_values, direction))
+    else:
+        reverse = False
+        direction = descending
+
+    paged = paged.order_by(*[column.desc() if direction else column.asc() for column in columns])
+
+    # Fetch one extra row to learn whether another page exists
+    rows = paged.limit(per_page + 1).all()
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if reverse:
+        rows.reverse()
+
+    def cursor_for(row):
+        return encode_cursor(getattr(row, column.key) for column in columns)
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if more or reverse:
+            next_cursor = cursor_for(rows[-1])
+        if (more and reverse) or after_values is not None:
+            prev_cursor = cursor_for(rows[0])
+
+    if total is None and count_key is not None:
+        total = cached_count(query, count_key)
+
+    return KeysetPage(rows, per_page, next_cursor=next_cursor, prev_cursor=prev_cursor, total=total)
+
+
+def stream_query(query, batch_size=500):
+    """
+    Iterate over a query's rows without loading the whole result.
+
+    Rows are fetched in batches from a server-side cursor where the database
+    supports one (Postgres); on SQLite rows are still read incrementally.
+    """
+    return query.execution_options(stream_results=True).yield_per(batch_size)
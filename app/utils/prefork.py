@@ -0,0 +1,135 @@
+import gc
+import importlib
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+_child_callbacks = []
+
+
+def _run_child_callbacks():
+    for callback in _child_callbacks:
+        try:
+            callback()
+        except Exception as e:
+            logger.error("After-fork reset %s failed: %s", getattr(callback, '__qualname__', callback), e)
+
+
+def after_fork(callback):
+    """
+    Run callback in the child process after every fork.
+
+    Extensions that own threads, locks, queues or connections register a
+    reset here. A forked worker inherits them in whatever state they were in
+    at the moment of the fork (a lock possibly held by a thread that does not
+    exist in the child, a socket shared with the parent), so the child must
+    start from fresh ones.
+    """
+    if not _child_callbacks and hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=_run_child_callbacks)
+    _child_callbacks.append(callback)
+
+
+class Prefork:
+    """
+    Support for gunicorn's preload mode (preload_app = True).
+
+    The master process imports the app once and warms the state that never
+    changes afterwards: the PDF and Google client libraries, reportlab font
+    metrics, the Drive discovery document, compiled patterns and the spaCy
+    model. Workers forked from it share those pages copy-on-write instead
+    of each loading their own copy.
+
+    After a fork, each worker drops the database connections it inherited
+    (without closing them, since the sockets still belong to the master)
+    and every registered extension resets its threads, locks and queues;
+    background threads start again on first use in the worker.
+
+    Configuration:
+        PRELOAD_WARM_UP: Warm the shared state when wsgi.py loads the app;
+            set by gunicorn.conf.py when preload_app is enabled
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PRELOAD_WARM_UP', os.environ.get('PRELOAD_WARM_UP', '0') == '1')
+        self.app = app
+        app.extensions['prefork'] = self
+        after_fork(self.dispose_engines)
+
+    def dispose_engines(self):
+        """Give this process its own connection pools, leaving the parent's connections open."""
+        from app import db
+        with self.app.app_context():
+            binds = [None] + list(self.app.config.get('SQLALCHEMY_BINDS') or {})
+            for bind in binds:
+                db.get_engine(self.app, bind=bind).dispose(close=False)
+
+    def warm_up(self):
+        """
+        Load the shared, read-only state in this (master) process.
+
+        Every step is optional; a library that is not installed is skipped.
+
+        Returns:
+            list: Names of the steps that completed
+        """
+        started = time.perf_counter()
+        warmed = []
+        for name, step in (
+            ('pdf', self._warm_pdf),
+            ('drive', self._warm_drive),
+            ('patterns', self._warm_patterns),
+            ('spacy', self._warm_spacy),
+        ):
+            try:
+                step()
+                warmed.append(name)
+            except Exception as e:
+                logger.info("Skipped warming %s: %s", name, e)
+
+        # Nothing warmed here holds a connection, but make sure no session
+        # or pooled connection is handed down to the workers
+        from app import db
+        with self.app.app_context():
+            db.session.remove()
+        self.dispose_engines()
+
+        # Move everything loaded so far out of the collector's generations, so
+        # collections in the workers do not touch (and copy) the shared pages
+        gc.collect()
+        gc.freeze()
+
+        logger.info("Preloaded %s in %.0f ms", ', '.join(warmed) or 'nothing', (time.perf_counter() - started) * 1000)
+        return warmed
+
+    def _warm_pdf(self):
+        # Importing is the warm-up: the modules stay loaded for the workers
+        for module in ('PyPDF2', 'reportlab.pdfgen.canvas', 'app.utils.bates'):
+            importlib.import_module(module)
+        from reportlab.pdfbase import pdfmetrics
+        # The font BatesManager stamps with; loading it parses the AFM metrics
+        pdfmetrics.getFont('Helvetica')
+
+    def _warm_drive(self):
+        from app.utils.drive import drive_discovery_document
+        for module in ('googleapiclient.discovery', 'google_auth_oauthlib.flow', 'google.auth.transport.requests'):
+            importlib.import_module(module)
+        drive_discovery_document()
+
+    def _warm_patterns(self):
+        # Module-level patterns are compiled on import
+        for module in ('app.utils.bates_query', 'app.utils.similarity', 'app.utils.text_search'):
+            importlib.import_module(module)
+
+    def _warm_spacy(self):
+        worker = self.app.extensions.get('entity_worker')
+        if worker is None or not worker.enabled:
+            raise RuntimeError("entity extraction is off")
+        worker.extractor.nlp
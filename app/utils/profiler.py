@@ -0,0 +1,162 @@
+import json
+import time
+import heapq
+import logging
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Longest statement text kept in logs for a slow query
+STATEMENT_PREVIEW_LENGTH = 300
+
+_listeners_installed = False
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a view issues more queries than its declared budget."""
+
+
+def query_budget(max_queries):
+    """
+    Declare the maximum number of SQL queries a view may issue per request.
+
+    Place it below the route decorator so the registered view carries the
+    budget:
+
+        @app.route('/cases')
+        @query_budget(5)
+        def cases():
+            ...
+    """
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+class RequestStats:
+    """SQL statistics collected for a single request."""
+
+    def __init__(self, slow_count):
+        self.count = 0
+        self.total_time = 0.0
+        self.slow_count = slow_count
+        self._slowest = []  # Min-heap of (duration, sequence, statement)
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.total_time += duration
+        entry = (duration, self.count, statement)
+        if len(self._slowest) < self.slow_count:
+            heapq.heappush(self._slowest, entry)
+        elif duration > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    @property
+    def slowest(self):
+        """Return the slowest statements, slowest first."""
+        return [
+            {'ms': round(duration * 1000, 2), 'statement': statement[:STATEMENT_PREVIEW_LENGTH]}
+            for duration, _, statement in sorted(self._slowest, reverse=True)
+        ]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('query_start_time')
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+
+    # Statements run outside a profiled request (CLI commands, background
+    # threads) are not recorded
+    if has_app_context():
+        stats = g.get('sql_stats')
+        if stats is not None:
+            stats.record(statement, duration)
+
+
+def _install_listeners():
+    """Listen on the Engine class so every engine, including binds, is covered."""
+    global _listeners_installed
+    if _listeners_installed:
+        return
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    _listeners_installed = True
+
+
+class SQLProfiler:
+    """
+    Opt-in per-request SQL instrumentation.
+
+    When SQL_PROFILER is enabled (or the app is TESTING), every request
+    records its query count, total database time and slowest statements.
+    They are returned as X-Query-Count / X-Query-Time-Ms headers and logged
+    as one JSON line. Views may declare a budget with @query_budget; going
+    over it is logged, and raises QueryBudgetExceeded under TESTING or
+    SQL_PROFILER_ENFORCE_BUDGETS, so tests that request a budgeted view
+    fail when it goes over (see tests/test_query_budgets.py).
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SQL_PROFILER', False)
+        app.config.setdefault('SQL_PROFILER_SLOW_QUERIES', 3)
+        app.config.setdefault('SQL_PROFILER_ENFORCE_BUDGETS', app.config.get('TESTING', False))
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def _start_request(self):
+        config = current_app.config
+        if not (config['SQL_PROFILER'] or config.get('TESTING')):
+            return
+
+        # Engine listeners are only added once profiling is actually used, so
+        # a disabled profiler costs nothing per statement
+        _install_listeners()
+        g.sql_stats = RequestStats(config['SQL_PROFILER_SLOW_QUERIES'])
+
+    def _finish_request(self, response):
+        stats = g.pop('sql_stats', None)
+        if stats is None:
+            return response
+
+        db_ms = round(stats.total_time * 1000, 2)
+        response.headers['X-Query-Count'] = str(stats.count)
+        response.headers['X-Query-Time-Ms'] = str(db_ms)
+
+        view = current_app.view_functions.get(request.endpoint)
+        budget = getattr(view, 'query_budget', None)
+        over_budget = budget is not None and stats.count > budget
+
+        logger.log(
+            logging.WARNING if over_budget else logging.INFO,
+            json.dumps({
+                'event': 'sql_profile',
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'queries': stats.count,
+                'db_ms': db_ms,
+                'budget': budget,
+                'slowest': stats.slowest,
+            })
+        )
+
+        if over_budget and current_app.config['SQL_PROFILER_ENFORCE_BUDGETS']:
+            raise QueryBudgetExceeded(
+                f"{request.endpoint} issued {stats.count} queries (budget {budget})"
+            )
+
+        return response
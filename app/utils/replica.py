@@ -0,0 +1,54 @@
+import logging
+from flask import current_app, g, request
+
+logger = logging.getLogger(__name__)
+
+
+def read_replica(view):
+    """
+    Mark a view as read-only so its queries may be served by the read replica.
+
+    Place it below the route decorator, like @query_budget:
+
+        @app.route('/search')
+        @read_replica
+        def search():
+            ...
+    """
+    view.use_replica = True
+    return view
+
+
+class ReplicaRouter:
+    """
+    Route read-only views to an optional read replica.
+
+    When SQLALCHEMY_REPLICA_URI is set it is registered as the 'replica'
+    bind. GET and HEAD requests to views marked with @read_replica then run
+    their queries against it through RoutingSession; everything else, and
+    any flush, uses the primary. Replicas lag slightly behind the primary,
+    so only pages that tolerate a moment of staleness should be marked.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SQLALCHEMY_REPLICA_URI', None)
+        replica_uri = app.config['SQLALCHEMY_REPLICA_URI']
+        if not replica_uri:
+            return
+
+        binds = app.config.get('SQLALCHEMY_BINDS') or {}
+        binds['replica'] = replica_uri
+        app.config['SQLALCHEMY_BINDS'] = binds
+        app.before_request(self._route_request)
+        logger.info("Read-only views are routed to the read replica")
+
+    def _route_request(self):
+        if request.method not in ('GET', 'HEAD'):
+            return
+        view = current_app.view_functions.get(request.endpoint)
+        if getattr(view, 'use_replica', False):
+            g.use_replica = True
@@ -0,0 +1,125 @@
+import logging
+import os
+import threading
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+
+class SecretNotFound(KeyError):
+    """Raised when no configured backend has the secret."""
+
+
+def _env_name(secret_id):
+    """'coretext-db-password' -> 'CORETEXT_DB_PASSWORD'"""
+    return secret_id.upper().replace('-', '_').replace('.', '_')
+
+
+class SecretStore:
+    """
+    Look up secrets on first use and cache them for the life of the process.
+
+    Nothing is fetched when the app is created; the database password, for
+    example, is only looked up when the engine opens its first connection.
+    Backends are tried in the order given by SECRETS_BACKENDS:
+
+        env   An environment variable named after the secret
+              ('coretext-db-password' -> CORETEXT_DB_PASSWORD)
+        file  A file named after the secret in SECRETS_DIR, as mounted by
+              Docker or Kubernetes secrets
+        gcp   Google Secret Manager in GOOGLE_CLOUD_PROJECT (the client
+              library is imported only when this backend is reached)
+
+    Configuration:
+        SECRETS_BACKENDS: Comma-separated backends (default 'env,file,gcp')
+        SECRETS_DIR: Directory for the file backend (default /run/secrets)
+        DATABASE_PASSWORD_SECRET: Secret supplying the database password at
+            connect time, if the URI does not carry one
+    """
+
+    def __init__(self, app=None):
+        self._values = {}
+        self._lock = threading.Lock()
+        self.backends = []
+        self.secrets_dir = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SECRETS_BACKENDS', os.environ.get('SECRETS_BACKENDS', 'env,file,gcp'))
+        app.config.setdefault('SECRETS_DIR', os.environ.get('SECRETS_DIR', '/run/secrets'))
+        app.config.setdefault('DATABASE_PASSWORD_SECRET', None)
+        self.backends = [name.strip() for name in app.config['SECRETS_BACKENDS'].split(',') if name.strip()]
+        self.secrets_dir = app.config['SECRETS_DIR']
+        app.extensions['secrets'] = self
+
+        if app.config['DATABASE_PASSWORD_SECRET']:
+            from app import db
+            with app.app_context():
+                engine = db.get_engine()
+            event.listen(engine, 'do_connect', self._password_injector(app.config['DATABASE_PASSWORD_SECRET']))
+
+    def _password_injector(self, secret_id):
+        def inject_password(dialect, conn_rec, cargs, cparams):
+            cparams['password'] = self.get(secret_id)
+        return inject_password
+
+    def get(self, secret_id):
+        """
+        Return a secret, fetching it on first use.
+
+        Raises:
+            SecretNotFound: If no backend has the secret
+        """
+        value = self._values.get(secret_id)
+        if value is not None:
+            return value
+
+        with self._lock:
+            if secret_id not in self._values:
+                self._values[secret_id] = self._fetch(secret_id)
+            return self._values[secret_id]
+
+    def _fetch(self, secret_id):
+        for backend in self.backends:
+            fetch = getattr(self, f'_from_{backend}', None)
+            if fetch is None:
+                logger.warning("Unknown secrets backend %r", backend)
+                continue
+            value = fetch(secret_id)
+            if value is not None:
+                logger.info("Loaded secret %s from %s", secret_id, backend)
+                return value
+        raise SecretNotFound(f"Secret {secret_id!r} not found in {', '.join(self.backends) or 'any backend'}")
+
+    def _from_env(self, secret_id):
+        return os.environ.get(_env_name(secret_id))
+
+    def _from_file(self, secret_id):
+        path = os.path.join(self.secrets_dir, secret_id)
+        try:
+            with open(path) as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    def _from_gcp(self, secret_id, version='latest'):
+        try:
+            from google.cloud import secretmanager
+        except ImportError:
+            return None
+        project_id = os.environ.get("GOOGLE_CLOUD_PROJECT", "coretext-452113")
+        name = f"projects/{project_id}/secrets/{secret_id}/versions/{version}"
+        try:
+            client = secretmanager.SecretManagerServiceClient()
+            response = client.access_secret_version(name=name)
+            return response.payload.data.decode('UTF-8')
+        except Exception as e:
+            logger.error("Could not read secret %s from Secret Manager: %s", secret_id, e)
+            return None
+
+
+def get_secret(secret_id):
+    """Return a secret through the current app's SecretStore."""
+    from flask import current_app
+    return current_app.extensions['secrets'].get(secret_id)
@@ -0,0 +1,260 @@
+import re
+import logging
+import threading
+from collections import Counter, OrderedDict
+import numpy as np
+from app import db
+from app.models.case import Case
+from app.models.document import Document
+from app.models.document_page import DocumentPage
+from app.utils.pagination import stream_query
+from app.utils.prefork import after_fork
+
+logger = logging.getLogger(__name__)
+
+# Words of three or more characters starting with a letter; shorter tokens and
+# numbers (dates, amounts, Bates numbers) say little about what a document is
+TOKEN_PATTERN = re.compile(r'[a-z][a-z0-9]{2,}')
+
+STOPWORDS = frozenset("""
+    about above after again against all also and any are because been before
+    being below between both but can could did does doing down during each
+    few for from further had has have having her here hers herself him
+    himself his how into its itself just more most myself nor not now off
+    once only other our ours ourselves out over own same she should some
+    such than that the their theirs them themselves then there these they
+    this those through too under until very was were what when where which
+    while who whom why will with would you your yours yourself yourselves
+""".split())
+
+
+def tokenize(text):
+    """Split page text into lowercase terms, dropping stopwords."""
+    return [token for token in TOKEN_PATTERN.findall((text or '').lower()) if token not in STOPWORDS]
+
+
+class SimilarityIndex:
+    """
+    TF-IDF vectors for the documents of one case, stored as a CSR matrix.
+
+    Term frequencies are appended row by row as documents arrive, so adding
+    a document never rebuilds the matrix. IDF weights and row norms depend on
+    the whole collection and are recomputed lazily, in one vectorized pass,
+    the first time the index is queried after a change.
+    """
+
+    def __init__(self, case_id):
+        self.case_id = case_id
+        self.document_ids = []
+        self.rows = {}            # document_id -> row number
+        self.vocabulary = {}      # term -> column number
+        self.signature = {}       # document_id -> pages with text when indexed
+        self.version = None       # Case.cache_version the index was checked against
+
+        # CSR term counts, kept as growable Python lists until queried
+        self._indptr = [0]
+        self._indices = []
+        self._counts = []
+        self._document_frequency = []
+
+        self._weights = None      # (indptr, indices, data, row_ids), rows L2-normalized
+
+    def __len__(self):
+        return len(self.document_ids)
+
+    def add(self, document_id, text, text_pages=0):
+        """Append one document's term counts as a new row."""
+        if document_id in self.rows:
+            return
+
+        counts = Counter(tokenize(text))
+        for term, count in counts.items():
+            column = self.vocabulary.get(term)
+            if column is None:
+                column = self.vocabulary[term] = len(self.vocabulary)
+                self._document_frequency.append(0)
+            self._document_frequency[column] += 1
+            self._indices.append(column)
+            self._counts.append(count)
+
+        self.rows[document_id] = len(self.document_ids)
+        self.document_ids.append(document_id)
+        self.signature[document_id] = text_pages
+        self._indptr.append(len(self._indices))
+        self._weights = None
+
+    def _weighted(self):
+        """Return the L2-normalized TF-IDF matrix, recomputing it if stale."""
+        if self._weights is None:
+            indptr = np.asarray(self._indptr, dtype=np.int64)
+            indices = np.asarray(self._indices, dtype=np.int64)
+            counts = np.asarray(self._counts, dtype=np.float64)
+            document_frequency = np.asarray(self._document_frequency, dtype=np.float64)
+
+            n = len(self.document_ids)
+            row_ids = np.repeat(np.arange(n), np.diff(indptr))
+
+            # Smoothed IDF and sublinear TF, as in most TF-IDF implementations
+            idf = np.log((1.0 + n) / (1.0 + document_frequency)) + 1.0
+            data = (1.0 + np.log(counts)) * idf[indices] if len(counts) else counts
+
+            norms = np.sqrt(np.bincount(row_ids, weights=data * data, minlength=n))
+            norms[norms == 0] = 1.0
+            data = data / norms[row_ids]
+
+            self._weights = (indptr, indices, data, row_ids)
+        return self._weights
+
+    def similar(self, document_id, k=10):
+        """
+        Find the documents most similar to one already in the index.
+
+        Returns:
+            list: (document_id, cosine similarity) pairs, best first
+        """
+        row = self.rows.get(document_id)
+        if row is None or len(self.document_ids) < 2:
+            return []
+
+        indptr, indices, data, row_ids = self._weighted()
+        start, end = indptr[row], indptr[row + 1]
+        if start == end:
+            return []
+
+        # Scatter the query row into a dense vector, then one multiply over the
+        # stored values and a per-row sum give every cosine similarity at once
+        query = np.zeros(len(self.vocabulary))
+        query[indices[start:end]] = data[start:end]
+        scores = np.bincount(row_ids, weights=data * query[indices], minlength=len(self.document_ids))
+        scores[row] = 0.0
+
+        k = min(k, len(scores) - 1)
+        top = np.argpartition(-scores, k - 1)[:k] if k > 0 else []
+        ranked = sorted(top, key=lambda i: -scores[i])
+        return [(self.document_ids[i], float(scores[i])) for i in ranked if scores[i] > 0]
+
+
+class SimilarityIndexRegistry:
+    """
+    Process-wide cache of per-case similarity indexes.
+
+    A lookup costs one primary-key read of the case's cache_version, which
+    every write to the case's documents bumps (see app.models.counters).
+    Only when it has moved is the index compared with the case's documents:
+    new documents, including those ingested by other worker processes, are
+    appended incrementally, and if a document was removed or its page text
+    changed the index is rebuilt.
+
+    At most max_indexes cases are kept, least recently used first out.
+    """
+
+    def __init__(self, max_indexes=16):
+        self.max_indexes = max_indexes
+        self._indexes = OrderedDict()
+        self._lock = threading.RLock()
+        after_fork(self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        # Indexes built in the parent stay valid; only the lock is replaced
+        self._lock = threading.RLock()
+
+    def clear(self):
+        """Drop every loaded index (e.g., after switching databases)."""
+        with self._lock:
+            self._indexes.clear()
+
+    def _text_pages(self, case_id):
+        """Return {document_id: number of pages with text} for a case."""
+        rows = (
+            db.session.query(Document.id, db.func.count(DocumentPage.text))
+            .outerjoin(DocumentPage, DocumentPage.document_id == Document.id)
+            .filter(Document.case_id == case_id)
+            .group_by(Document.id)
+        )
+        return dict(rows)
+
+    def _add_documents(self, index, text_pages, whole_case=False):
+        """Load page text for the given documents and append them to the index."""
+        document_ids = sorted(text_pages)
+        texts = {document_id: [] for document_id in document_ids}
+
+        pages = (
+            db.session.query(DocumentPage.document_id, DocumentPage.text)
+            .filter(DocumentPage.text.isnot(None))
+            .order_by(DocumentPage.document_id, DocumentPage.page_index)
+        )
+        if whole_case:
+            # One streamed query for a full build, however large the case
+            pages = stream_query(pages.filter(DocumentPage.case_id == index.case_id))
+        else:
+            pages = pages.filter(DocumentPage.document_id.in_(document_ids))
+        for document_id, text in pages:
+            if document_id in texts:
+                texts[document_id].append(text)
+
+        for document_id in document_ids:
+            index.add(document_id, '\n'.join(texts[document_id]), text_pages[document_id])
+
+    def get(self, case_id):
+        """Return the up-to-date similarity index for a case."""
+        # Read before the documents, so a write in between leaves the index
+        # behind this version and it is checked again on the next lookup
+        version = db.session.query(Case.cache_version).filter(Case.id == case_id).scalar()
+
+        with self._lock:
+            index = self._indexes.get(case_id)
+            if index is not None:
+                self._indexes.move_to_end(case_id)
+                if index.version == version:
+                    return index
+
+            current = self._text_pages(case_id)
+            stale = index is None or any(
+                current.get(document_id) != pages for document_id, pages in index.signature.items()
+            )
+            if stale:
+                index = SimilarityIndex(case_id)
+                self._add_documents(index, current, whole_case=True)
+                self._indexes[case_id] = index
+                while len(self._indexes) > self.max_indexes:
+                    self._indexes.popitem(last=False)
+                logger.info("Built similarity index for case %s with %s documents", case_id, len(index))
+            else:
+                added = {document_id: pages for document_id, pages in current.items() if document_id not in index.rows}
+                if added:
+                    self._add_documents(index, added)
+            index.version = version
+            return index
+
+    def add_document(self, document):
+        """Append a newly ingested document to its case's index, if that index is loaded."""
+        with self._lock:
+            index = self._indexes.get(document.case_id)
+            if index is None:
+                return
+            text_pages = {document.id: sum(1 for page in document.pages if page.text is not None)}
+            self._add_documents(index, text_pages)
+
+    def similar_documents(self, document, k=10):
+        """
+        Find the documents in the same case most similar to a document.
+
+        Returns:
+            list: (Document, score) pairs, best first
+        """
+        index = self.get(document.case_id)
+        with self._lock:
+            matches = index.similar(document.id, k=k)
+        if not matches:
+            return []
+
+        documents = {
+            doc.id: doc for doc in
+            Document.query.options(*Document.listing_options())
+            .filter(Document.id.in_([document_id for document_id, _ in matches]))
+        }
+        return [(documents[document_id], score) for document_id, score in matches if document_id in documents]
+
+
+# Shared by all requests in this process
+similarity_indexes = SimilarityIndexRegistry()
@@ -0,0 +1,79 @@
+import logging
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteProfile:
+    """
+    Engine settings that let a file-backed SQLite database serve a threaded app.
+
+    Every new connection switches to WAL journaling, so readers work from a
+    snapshot and never wait for a writer (nor a writer for readers), and
+    sets a busy timeout so concurrent writers queue for the lock instead of
+    failing with "database is locked". synchronous=NORMAL is safe under WAL
+    and avoids an fsync per commit; a larger page cache and memory-mapped
+    reads cut I/O for listing and search queries.
+
+    Connections are pooled so the per-connection cache and mapping survive
+    between requests. Writers should keep transactions short: do slow work
+    (PDF stamping, text extraction) before opening the write transaction,
+    as BatesManager does when ingesting documents.
+
+    Configuration:
+        SQLITE_JOURNAL_MODE: Default 'WAL'
+        SQLITE_BUSY_TIMEOUT_MS: How long a writer waits for the lock
+        SQLITE_SYNCHRONOUS: Default 'NORMAL'
+        SQLITE_CACHE_SIZE_KB: Page cache per connection
+        SQLITE_MMAP_SIZE: Bytes of the file mapped into memory
+        SQLITE_POOL_SIZE: Pooled connections, roughly the number of threads
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SQLITE_JOURNAL_MODE', 'WAL')
+        app.config.setdefault('SQLITE_BUSY_TIMEOUT_MS', 5000)
+        app.config.setdefault('SQLITE_SYNCHRONOUS', 'NORMAL')
+        app.config.setdefault('SQLITE_CACHE_SIZE_KB', 65536)
+        app.config.setdefault('SQLITE_MMAP_SIZE', 268435456)
+        app.config.setdefault('SQLITE_POOL_SIZE', 8)
+
+        url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+        if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+            return
+
+        options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        options.setdefault('poolclass', QueuePool)
+        options.setdefault('pool_size', app.config['SQLITE_POOL_SIZE'])
+        options.setdefault('max_overflow', app.config['SQLITE_POOL_SIZE'])
+        connect_args = options.setdefault('connect_args', {})
+        # Pooled connections are handed to whichever request thread checks them out
+        connect_args.setdefault('check_same_thread', False)
+        connect_args.setdefault('timeout', app.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000)
+
+        pragmas = [
+            f"PRAGMA journal_mode={app.config['SQLITE_JOURNAL_MODE']}",
+            f"PRAGMA busy_timeout={int(app.config['SQLITE_BUSY_TIMEOUT_MS'])}",
+            f"PRAGMA synchronous={app.config['SQLITE_SYNCHRONOUS']}",
+            f"PRAGMA cache_size={-int(app.config['SQLITE_CACHE_SIZE_KB'])}",
+            f"PRAGMA mmap_size={int(app.config['SQLITE_MMAP_SIZE'])}",
+        ]
+
+        def set_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for pragma in pragmas:
+                    cursor.execute(pragma)
+            finally:
+                cursor.close()
+
+        from app import db
+        with app.app_context():
+            engine = db.get_engine()
+        event.listen(engine, 'connect', set_pragmas)
+        logger.info("SQLite engine profile: %s", ', '.join(pragmas))
@@ -0,0 +1,69 @@
+from app import db
+from app.models.document import Document
+from app.models.document_tag import DocumentTag
+
+
+def _tag_id_set(tag_ids):
+    """Normalize tag ids from request args, dropping blanks and non-numbers."""
+    ids = set()
+    for tag_id in tag_ids or []:
+        try:
+            ids.add(int(tag_id))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
+def documents_with_all_tags(tag_ids):
+    """
+    Build a subquery of the ids of documents that carry every given tag.
+
+    The intersection is computed in one pass over the (tag_id, document_id)
+    index: rows for the selected tags are grouped per document, and only
+    documents that matched all of them survive the HAVING clause.
+
+    Args:
+        tag_ids: Iterable of tag ids (ints or numeric strings)
+
+    Returns:
+        Query selecting document_id, or None if no tag ids were given
+    """
+    ids = _tag_id_set(tag_ids)
+    if not ids:
+        return None
+
+    return (
+        db.session.query(DocumentTag.document_id)
+        .filter(DocumentTag.tag_id.in_(ids))
+        .group_by(DocumentTag.document_id)
+        .having(db.func.count(DocumentTag.tag_id) == len(ids))
+    )
+
+
+def filter_by_tags(query, tag_ids):
+    """Restrict a document query to documents carrying every given tag."""
+    tagged = documents_with_all_tags(tag_ids)
+    if tagged is None:
+        return query
+    return query.filter(Document.id.in_(tagged))
+
+
+def tag_facet_counts(query):
+    """
+    Count, per tag, how many documents of a filtered query carry it.
+
+    Args:
+        query: Filtered Document query (ordering and limits are ignored)
+
+    Returns:
+        dict: {tag_id: document count} for tags present in the result set
+    """
+    # Wrap rather than rewrite the query so its loader options don't matter
+    filtered = query.order_by(None).subquery()
+    document_ids = db.select(filtered.c.id)
+    rows = (
+        db.session.query(DocumentTag.tag_id, db.func.count(DocumentTag.document_id))
+        .filter(DocumentTag.document_id.in_(document_ids))
+        .group_by(DocumentTag.tag_id)
+    )
+    return dict(rows)
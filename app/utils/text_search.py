@@ -0,0 +1,112 @@
+import re
+import logging
+from markupsafe import Markup, escape
+from sqlalchemy.orm import joinedload
+from app import db
+from app.models.document_page import DocumentPage
+from app.utils.tags import documents_with_all_tags
+
+# Control characters used to delimit highlighted terms in snippets, so that the
+# page text can be HTML-escaped before the highlights are turned into markup.
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+
+
+class TextSearchIndex:
+    """Full-text search over page text (SQLite FTS5 or Postgres tsvector)."""
+
+    def __init__(self, session=None):
+        self.session = session or db.session
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def dialect(self):
+        return db.engine.dialect.name
+
+    def search(self, text, case_id=None, tag_ids=None, limit=50):
+        """
+        Find pages matching the given words, best matches first.
+
+        Args:
+            text: Words to search for; punctuation is ignored
+            case_id: Restrict hits to one case
+            tag_ids: Restrict hits to documents carrying all of these tags
+            limit: Maximum number of page hits to return
+
+        Returns:
+            list: Dicts with page, document, bates_number, page_number,
+                snippet (safe HTML) and rank (higher is better)
+        """
+        terms = re.findall(r'\w+', text or '')
+        if not terms:
+            return []
+
+        if self.dialect == 'postgresql':
+            query = self._postgres_query(' '.join(terms))
+        else:
+            query = self._sqlite_query(terms)
+
+        if case_id:
+            query = query.filter(DocumentPage.case_id == case_id)
+
+        tagged = documents_with_all_tags(tag_ids)
+        if tagged is not None:
+            query = query.filter(DocumentPage.document_id.in_(tagged))
+
+        rows = query.options(joinedload(DocumentPage.document)).limit(limit).all()
+        self.logger.info("Full-text search for %s returned %s pages", terms, len(rows))
+
+        return [
+            {
+                'page': page,
+                'document': page.document,
+                'bates_number': page.bates_number,
+                'page_number': page.page_number,
+                'snippet': self._highlight(snippet),
+                'rank': rank
+            }
+            for page, rank, snippet in rows
+        ]
+
+    def _sqlite_query(self, terms):
+        fts = db.table('document_pages_fts', db.column('rowid'))
+        fts_ref = db.literal_column('document_pages_fts')
+        # Quote each term so user input can never be parsed as FTS5 syntax
+        match = ' '.join('"{}"'.format(term) for term in terms)
+
+        # bm25() is lower for better matches; negate it so higher is better
+        rank = -db.func.bm25(fts_ref)
+        snippet = db.func.snippet(fts_ref, 0, HIGHLIGHT_START, HIGHLIGHT_END, '...', 16)
+
+        return (
+            self.session.query(DocumentPage, rank.label('rank'), snippet.label('snippet'))
+            .select_from(fts)
+            .join(DocumentPage, DocumentPage.id == fts.c.rowid)
+            .filter(fts_ref.op('MATCH')(match))
+            .order_by(db.func.bm25(fts_ref))
+        )
+
+    def _postgres_query(self, text):
+        vector = db.func.to_tsvector('english', db.func.coalesce(DocumentPage.text, ''))
+        tsquery = db.func.plainto_tsquery('english', text)
+        rank = db.func.ts_rank(vector, tsquery)
+        snippet = db.func.ts_headline(
+            'english',
+            db.func.coalesce(DocumentPage.text, ''),
+            tsquery,
+            f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxWords=24, MinWords=8'
+        )
+
+        return (
+            self.session.query(DocumentPage, rank.label('rank'), snippet.label('snippet'))
+            .filter(vector.op('@@')(tsquery))
+            .order_by(rank.desc())
+        )
+
+    def _highlight(self, snippet):
+        """Escape snippet text and wrap highlighted terms in <mark> tags."""
+        return (
+            escape(snippet or '')
+            .replace(HIGHLIGHT_START, Markup('<mark>'))
+            .replace(HIGHLIGHT_END, Markup('</mark>'))
+        )
@@ -0,0 +1,18 @@
+# Gunicorn settings, used by the Dockerfile and app.yaml
+import os
+
+bind = f":{os.environ.get('PORT', '8080')}"
+
+# Each worker gets its own database pool sized to its threads (see
+# production_engine_options in app/config.py)
+workers = int(os.environ.get('GUNICORN_WORKERS', 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+timeout = 0
+
+# Import and warm the app once in the master, then fork the workers from it
+# so they share the loaded libraries copy-on-write. Set GUNICORN_PRELOAD=0 to
+# have every worker import the app itself.
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+# wsgi.py warms the shared state only when it is loaded in the master
+os.environ['PRELOAD_WARM_UP'] = '1' if preload_app else '0'
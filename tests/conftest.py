@@ -0,0 +1,74 @@
+import io
+import pytest
+from reportlab.pdfgen import canvas
+from app import create_app, db, init_database
+from app.config import TestingConfig
+from app.utils.pagination import invalidate_counts
+from app.utils.similarity import similarity_indexes
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """An app on a fresh SQLite database, with every background thread turned off."""
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'coretext_test.db'}")
+    monkeypatch.setattr(TestingConfig, 'AUTO_INIT_DB', False, raising=False)
+    monkeypatch.setattr(TestingConfig, 'UPLOAD_FOLDER', str(tmp_path / 'uploads'), raising=False)
+    monkeypatch.setattr(TestingConfig, 'RESULT_CACHE_BACKEND', 'null', raising=False)
+    monkeypatch.setattr(TestingConfig, 'ENTITY_EXTRACTION', 'off', raising=False)
+    monkeypatch.setattr(TestingConfig, 'ACCESS_TRACKING', 'off', raising=False)
+    monkeypatch.setattr(TestingConfig, 'DRIVE_BACKEND', 'fake', raising=False)
+    monkeypatch.setattr(TestingConfig, 'DRIVE_SYNC', 'inline', raising=False)
+    app = create_app('testing')
+    init_database(app)
+    # Process-wide caches keyed by row ids would carry over from the previous test's database
+    similarity_indexes.clear()
+    invalidate_counts()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_pdf():
+    """Build a PDF with the given page texts."""
+    def make_pdf(*pages):
+        buffer = io.BytesIO()
+        pdf = canvas.Canvas(buffer)
+        for text in pages or ('Page one',):
+            pdf.drawString(72, 720, text)
+            pdf.showPage()
+        pdf.save()
+        return buffer.getvalue()
+    return make_pdf
+
+
+@pytest.fixture
+def case_id(app, client):
+    """A case with the default Bates prefix TEST."""
+    from app.models.case import Case
+    client.post('/case/new', data={'case_name': 'Test Case', 'bates_prefix': 'TEST'})
+    with app.app_context():
+        return Case.query.filter_by(case_name='Test Case').one().id
+
+
+@pytest.fixture
+def upload(client, case_id, make_pdf):
+    """Upload a PDF to the case through the upload view."""
+    def upload(*pages, filename='exhibit.pdf', prefix_id=None):
+        data = {'file': (io.BytesIO(make_pdf(*pages)), filename)}
+        if prefix_id is not None:
+            data['prefix_id'] = str(prefix_id)
+        return client.post(f'/case/{case_id}/upload', data=data, content_type='multipart/form-data')
+    return upload
+
+
+@pytest.fixture
+def drive(app):
+    """The in-memory Drive every Drive client of the app talks to."""
+    return app.extensions['drive'].fake
@@ -0,0 +1,68 @@
+-- Schema created by db.create_all() before the first migration (revision 5ff3f881417b)
+
+CREATE TABLE bates_prefixes (
+	id INTEGER NOT NULL, 
+	case_id INTEGER NOT NULL, 
+	prefix VARCHAR(50) NOT NULL, 
+	description VARCHAR(200), 
+	is_default BOOLEAN, 
+	current_sequence INTEGER, 
+	created_at DATETIME, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(case_id) REFERENCES cases (id)
+);
+
+CREATE TABLE cases (
+	id INTEGER NOT NULL, 
+	case_name VARCHAR(100) NOT NULL, 
+	case_number VARCHAR(50), 
+	current_sequence INTEGER, 
+	description TEXT, 
+	google_drive_enabled BOOLEAN, 
+	gdrive_root_folder VARCHAR(255), 
+	gdrive_original_path VARCHAR(255), 
+	gdrive_bates_path VARCHAR(255), 
+	document_types TEXT, 
+	drive_original_folder_id VARCHAR(255), 
+	drive_bates_folder_id VARCHAR(255), 
+	created_at DATETIME, 
+	updated_at DATETIME, 
+	PRIMARY KEY (id)
+);
+
+CREATE TABLE document_tags (
+	document_id INTEGER NOT NULL, 
+	tag_id INTEGER NOT NULL, 
+	PRIMARY KEY (document_id, tag_id), 
+	FOREIGN KEY(document_id) REFERENCES documents (id), 
+	FOREIGN KEY(tag_id) REFERENCES tags (id)
+);
+
+CREATE TABLE documents (
+	id INTEGER NOT NULL, 
+	case_id INTEGER NOT NULL, 
+	original_filename VARCHAR(255) NOT NULL, 
+	file_extension VARCHAR(10) NOT NULL, 
+	file_size INTEGER, 
+	bates_number VARCHAR(50) NOT NULL, 
+	bates_sequence INTEGER NOT NULL, 
+	bates_start VARCHAR(50) NOT NULL, 
+	bates_end VARCHAR(50) NOT NULL, 
+	page_count INTEGER, 
+	existing_bates BOOLEAN, 
+	bates_note VARCHAR(255), 
+	local_path VARCHAR(255), 
+	upload_date DATETIME, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(case_id) REFERENCES cases (id)
+);
+
+CREATE TABLE tags (
+	id INTEGER NOT NULL, 
+	name VARCHAR(100) NOT NULL, 
+	color VARCHAR(7) NOT NULL, 
+	is_default BOOLEAN, 
+	case_id INTEGER, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(case_id) REFERENCES cases (id)
+);
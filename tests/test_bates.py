@@ -0,0 +1,82 @@
+from app import db
+from app.models.bates_prefix import BatesPrefix
+from app.models.document import Document
+
+
+def documents(app, case_id):
+    with app.app_context():
+        return Document.query.filter_by(case_id=case_id).order_by(Document.id).all()
+
+
+def test_upload_assigns_consecutive_ranges(app, case_id, upload):
+    upload('one', 'two')
+    upload('three')
+
+    first, second = documents(app, case_id)
+    assert (first.bates_start, first.bates_end) == ('TEST-000001', 'TEST-000002')
+    assert second.bates_start == 'TEST-000003'
+
+
+def test_edited_range_is_reserved_against_the_counter(app, client, case_id, upload):
+    upload('one')
+    document, = documents(app, case_id)
+
+    client.post(f'/document/{document.id}/edit-bates', data={'bates_number': 'TEST-000007'})
+
+    with app.app_context():
+        prefix = BatesPrefix.query.filter_by(case_id=case_id).one()
+        assert prefix.current_sequence == 8
+
+    upload('two')
+    edited, uploaded = documents(app, case_id)
+    assert edited.bates_start == 'TEST-000007'
+    assert uploaded.bates_start == 'TEST-000008'
+
+
+def test_editing_below_the_counter_leaves_it_alone(app, client, case_id, upload):
+    upload('one')
+    upload('two')
+    first, second = documents(app, case_id)
+    client.post(f'/document/{first.id}/edit-bates', data={'bates_number': 'TEST-000020'})
+    client.post(f'/document/{first.id}/edit-bates', data={'bates_number': 'TEST-000010'})
+
+    with app.app_context():
+        assert BatesPrefix.query.filter_by(case_id=case_id).one().current_sequence == 21
+
+
+def set_counter(app, case_id, sequence):
+    """Wind the counter back, as for documents numbered before it was kept."""
+    with app.app_context():
+        BatesPrefix.query.filter_by(case_id=case_id).update({BatesPrefix.current_sequence: sequence})
+        db.session.commit()
+
+
+def test_upload_skips_numbers_already_in_use(app, case_id, upload):
+    upload('one', 'two')
+    set_counter(app, case_id, 1)
+
+    upload('three')
+    upload('four')
+
+    first, second, third = documents(app, case_id)
+    assert second.bates_start == 'TEST-000003'
+    assert third.bates_start == 'TEST-000004'
+
+
+def test_collision_does_not_rewind_the_counter(app, case_id, upload, monkeypatch):
+    from app.utils.bates import BatesManager
+
+    upload('one')
+    set_counter(app, case_id, 1)
+    # Let the reservation miss the document in the way, so the insert hits the unique constraint
+    monkeypatch.setattr(BatesManager, '_occupied_until', lambda self, *args: None)
+    upload('two')
+
+    with app.app_context():
+        assert BatesPrefix.query.filter_by(case_id=case_id).one().current_sequence == 2
+    assert len(documents(app, case_id)) == 1
+
+    monkeypatch.undo()
+    upload('three')
+    first, second = documents(app, case_id)
+    assert second.bates_start == 'TEST-000002'
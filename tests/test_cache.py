@@ -0,0 +1,64 @@
+import pytest
+from app.utils.cache import LRUCacheBackend
+
+
+@pytest.fixture
+def cache(app):
+    cache = app.extensions['result_cache']
+    cache.backend = LRUCacheBackend()
+    return cache
+
+
+def query_count(response):
+    return int(response.headers['X-Query-Count'])
+
+
+def test_repeated_search_reuses_cached_results(client, case_id, upload, cache):
+    upload('one', filename='first.pdf')
+    url = f'/search?case_id={case_id}&q=TEST'
+
+    miss = client.get(url)
+    hit = client.get(url)
+    assert query_count(hit) < query_count(miss)
+    assert 'first.pdf' in hit.get_data(as_text=True)
+
+    # A new document bumps the case's cache version
+    upload('two', filename='second.pdf')
+    assert 'second.pdf' in client.get(url).get_data(as_text=True)
+
+
+def test_search_page_lists_cases_created_after_caching(client, case_id, cache):
+    url = f'/search?case_id={case_id}'
+    client.get(url)
+
+    client.post('/case/new', data={'case_name': 'Later Case', 'bates_prefix': 'LATER'})
+    assert 'Later Case' in client.get(url).get_data(as_text=True)
+
+
+def test_case_page_is_cached_until_the_case_changes(client, case_id, upload, cache):
+    upload('one', filename='first.pdf')
+    # The first view shows the upload's flash message, so it is not cached
+    client.get(f'/case/{case_id}')
+    assert client.get(f'/case/{case_id}').headers['X-Cache'] == 'MISS'
+    assert client.get(f'/case/{case_id}').headers['X-Cache'] == 'HIT'
+
+    upload('two', filename='second.pdf')
+    client.get(f'/case/{case_id}')
+    response = client.get(f'/case/{case_id}')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert 'second.pdf' in response.get_data(as_text=True)
+
+
+def test_cached_search_skips_the_prefix_lookup(app, case_id, upload, cache):
+    from app.utils.bates import BatesManager
+    from tests.test_query_plans import captured_selects
+
+    upload('one', filename='first.pdf')
+    manager = BatesManager()
+    with app.test_request_context():
+        manager.search_documents(case_id=case_id, term='TEST-000001')
+        with captured_selects() as statements:
+            documents = list(manager.search_documents(case_id=case_id, term='TEST-000001'))
+
+    assert [document.original_filename for document in documents] == ['first.pdf']
+    assert not any('bates_prefixes' in statement for statement, _ in statements)
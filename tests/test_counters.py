@@ -0,0 +1,57 @@
+from datetime import datetime
+from app import db
+from app.models.case import Case
+from app.models.document import Document
+
+
+def test_upload_updates_case_counters(app, case_id, upload):
+    upload('one', 'two')
+    upload('three')
+
+    with app.app_context():
+        case = Case.query.get(case_id)
+        assert (case.document_count, case.page_count) == (2, 3)
+        assert case.total_bytes == sum(d.file_size for d in Document.query.filter_by(case_id=case_id))
+        assert case.last_activity_at is not None
+
+
+def test_updates_that_are_not_activity_leave_counters_alone(app, case_id, upload):
+    upload('one')
+
+    with app.app_context():
+        before = Case.query.get(case_id)
+        counters = (before.document_count, before.page_count, before.total_bytes, before.last_activity_at)
+
+        document = Document.query.filter_by(case_id=case_id).one()
+        document.entities_extracted_at = datetime.utcnow()
+        document.document_type = 'Correspondence'
+        db.session.commit()
+
+        after = Case.query.get(case_id)
+        assert (after.document_count, after.page_count, after.total_bytes, after.last_activity_at) == counters
+
+
+def test_page_count_change_adjusts_counters(app, case_id, upload):
+    upload('one')
+
+    with app.app_context():
+        document = Document.query.filter_by(case_id=case_id).one()
+        document.page_count = 5
+        db.session.commit()
+
+        assert Case.query.get(case_id).page_count == 5
+
+
+def test_bookkeeping_updates_keep_the_cache_version(app, case_id, upload):
+    upload('one')
+
+    with app.app_context():
+        version = Case.query.get(case_id).cache_version
+        document = Document.query.filter_by(case_id=case_id).one()
+        document.entities_extracted_at = datetime.utcnow()
+        db.session.commit()
+        assert Case.query.get(case_id).cache_version == version
+
+        document.document_type = 'Correspondence'
+        db.session.commit()
+        assert Case.query.get(case_id).cache_version == version + 1
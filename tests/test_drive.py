@@ -0,0 +1,131 @@
+import threading
+from app.utils.drive import GoogleDriveManager, get_drive_manager
+from app.utils.drive_fake import FakeDriveService
+
+
+def test_fake_backend_is_shared_by_every_thread(app, drive):
+    assert isinstance(drive, FakeDriveService)
+
+    services = []
+
+    def client():
+        with app.app_context():
+            services.append(get_drive_manager().service)
+
+    threads = [threading.Thread(target=client) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with app.app_context():
+        services.append(get_drive_manager().service)
+
+    assert all(service is drive for service in services)
+
+
+def test_folder_listing_reads_every_page(app, drive, monkeypatch):
+    monkeypatch.setattr(GoogleDriveManager, 'LIST_PAGE_SIZE', 2)
+    folder = drive.add_folder('Bates Labeled')
+    for name in ('c.pdf', 'a.pdf', 'b.pdf', 'd.pdf'):
+        drive.add_file(name, parents=[folder['id']])
+    drive.add_folder('Exhibits', parents=[folder['id']])
+    trashed = drive.add_file('old.pdf', parents=[folder['id']])
+    drive.update(trashed['id'], trashed=True)
+
+    with app.app_context():
+        contents = get_drive_manager().list_folder_contents(folder['id'])
+
+    assert [(item['type'], item['name']) for item in contents] == [
+        ('folder', 'Exhibits'), ('file', 'a.pdf'), ('file', 'b.pdf'), ('file', 'c.pdf'), ('file', 'd.pdf')
+    ]
+    assert drive.list_calls == 3
+
+
+def test_download_streams_in_chunks(app, drive, tmp_path, monkeypatch):
+    monkeypatch.setattr(GoogleDriveManager, 'DOWNLOAD_CHUNK_SIZE', 1024)
+    content = bytes(range(256)) * 20
+    f = drive.add_file('exhibit.pdf', content=content)
+
+    with app.app_context():
+        path = get_drive_manager().download_file(f['id'], str(tmp_path / 'exhibit.pdf'))
+
+    with open(path, 'rb') as downloaded:
+        assert downloaded.read() == content
+
+
+def test_browse_view_lists_every_page_from_the_folder_cache(app, client, case_id, drive, monkeypatch):
+    from app import db
+    from app.models.case import Case
+
+    monkeypatch.setattr(GoogleDriveManager, 'LIST_PAGE_SIZE', 2)
+    root = drive.add_folder('Original')
+    exhibits = drive.add_folder('Exhibits', parents=[root['id']])
+    for name in ('a.pdf', 'b.pdf', 'c.pdf'):
+        drive.add_file(name, parents=[root['id']])
+    drive.add_file('exhibit_1.pdf', parents=[exhibits['id']])
+    with app.app_context():
+        case = db.session.get(Case, case_id)
+        case.google_drive_enabled = True
+        case.drive_original_folder_id = root['id']
+        db.session.commit()
+
+    page = client.get(f'/case/{case_id}/browse-google-drive').get_data(as_text=True)
+    assert all(name in page for name in ('Exhibits', 'a.pdf', 'b.pdf', 'c.pdf'))
+
+    list_calls = drive.list_calls
+    client.get(f'/case/{case_id}/browse-google-drive')
+    assert drive.list_calls == list_calls
+
+    page = client.get(f'/case/{case_id}/browse-google-drive', query_string={'folder_id': exhibits['id']}).get_data(as_text=True)
+    assert 'exhibit_1.pdf' in page and 'a.pdf' not in page
+    assert 'Exhibits' in page
+
+
+def test_browse_view_needs_drive_enabled(client, case_id):
+    response = client.get(f'/case/{case_id}/browse-google-drive')
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith(f'/case/{case_id}')
+
+
+def test_browse_view_starts_an_import_and_reports_progress(app, client, case_id, drive, make_pdf):
+    import time
+    from urllib.parse import urlparse, parse_qs
+    from app import db
+    from app.models.case import Case
+    from app.models.document import Document
+
+    root = drive.add_folder('Original')
+    first = drive.add_file('first.pdf', content=make_pdf('One'), parents=[root['id']])
+    second = drive.add_file('second.pdf', content=make_pdf('Two', 'Three'), parents=[root['id']])
+    with app.app_context():
+        case = db.session.get(Case, case_id)
+        case.google_drive_enabled = True
+        case.drive_original_folder_id = root['id']
+        db.session.commit()
+
+    response = client.post(f'/case/{case_id}/browse-google-drive',
+                           data={'selected_files': [first['id'], second['id']], 'document_type': 'Exhibit'})
+    assert response.status_code == 302
+    job_id = parse_qs(urlparse(response.headers['Location']).query)['import_job'][0]
+
+    page = client.get(response.headers['Location']).get_data(as_text=True)
+    progress_url = f'/case/{case_id}/drive-imports/{job_id}'
+    assert progress_url in page
+
+    deadline = time.time() + 10
+    progress = client.get(progress_url).get_json()
+    while progress['status'] != 'finished' and time.time() < deadline:
+        time.sleep(0.05)
+        progress = client.get(progress_url).get_json()
+
+    assert (progress['status'], progress['done'], progress['failed']) == ('finished', 2, 0)
+    assert [(f['name'], f['bates_start'], f['bates_end']) for f in progress['files']] == [
+        ('first.pdf', 'TEST-000001', 'TEST-000001'),
+        ('second.pdf', 'TEST-000002', 'TEST-000003'),
+    ]
+    with app.app_context():
+        assert {d.document_type for d in Document.query.filter_by(case_id=case_id)} == {'Exhibit'}
+
+    other_case = client.get(f'/case/{case_id + 1}/drive-imports/{job_id}')
+    assert other_case.status_code == 404
+    assert client.get(f'/case/{case_id}/drive-imports/unknown').status_code == 404
@@ -0,0 +1,82 @@
+import os
+import time
+import tempfile
+import pytest
+from app.models.document import Document
+from app.utils.bates import BatesManager
+from app.utils.drive_import import DriveImporter, DriveImportJob
+
+
+@pytest.fixture
+def importer(app):
+    return app.extensions['drive_import']
+
+
+@pytest.fixture
+def import_files(app, case_id, importer):
+    """Run an import of Drive file ids into the case in the calling thread."""
+    def import_files(file_ids, document_type=None):
+        job = DriveImportJob(case_id, file_ids, document_type)
+        with app.app_context():
+            importer.run(job)
+        return job
+    return import_files
+
+
+def test_files_are_stamped_in_selection_order(app, drive, make_pdf, import_files, monkeypatch):
+    first = drive.add_file('first.pdf', content=make_pdf('One'))
+    second = drive.add_file('second.pdf', content=make_pdf('Two', 'Three'))
+    third = drive.add_file('third.pdf', content=make_pdf('Four'))
+
+    download = DriveImporter._download
+
+    def slow_first(self, job, index, directory):
+        # The first selected file finishes downloading last
+        if index == 0:
+            time.sleep(0.2)
+        return download(self, job, index, directory)
+
+    monkeypatch.setattr(DriveImporter, '_download', slow_first)
+    job = import_files([third['id'], first['id'], second['id']], document_type='Exhibit')
+
+    assert [(f['name'], f['status'], f['bates_start'], f['bates_end']) for f in job.files] == [
+        ('third.pdf', 'done', 'TEST-000001', 'TEST-000001'),
+        ('first.pdf', 'done', 'TEST-000002', 'TEST-000002'),
+        ('second.pdf', 'done', 'TEST-000003', 'TEST-000004'),
+    ]
+    with app.app_context():
+        assert {document.document_type for document in Document.query} == {'Exhibit'}
+
+
+def test_failed_files_do_not_stop_the_import(app, case_id, drive, make_pdf, import_files, monkeypatch):
+    directories = []
+    mkdtemp = tempfile.mkdtemp
+
+    def recorded_mkdtemp(*args, **kwargs):
+        directories.append(mkdtemp(*args, **kwargs))
+        return directories[-1]
+
+    process_document = BatesManager.process_document
+
+    def failing_stamp(self, case_id, file, upload_folder):
+        if file.filename == 'broken.pdf':
+            raise RuntimeError("Stamping failed")
+        return process_document(self, case_id, file, upload_folder)
+
+    monkeypatch.setattr(tempfile, 'mkdtemp', recorded_mkdtemp)
+    monkeypatch.setattr(BatesManager, 'process_document', failing_stamp)
+    good = drive.add_file('good.pdf', content=make_pdf('One'))
+    broken = drive.add_file('broken.pdf', content=make_pdf('Broken'))
+    later = drive.add_file('later.pdf', content=make_pdf('Two'))
+
+    job = import_files([good['id'], 'missing', broken['id'], later['id']])
+
+    summary = job.to_dict()
+    assert (summary['status'], summary['done'], summary['failed']) == ('finished', 2, 2)
+    assert [f['status'] for f in job.files] == ['done', 'failed', 'failed', 'done']
+    assert job.files[2]['error'] == 'Stamping failed'
+    assert all(f['error'] for f in job.files if f['status'] == 'failed')
+    assert job.files[3]['bates_start'] == 'TEST-000002'
+    with app.app_context():
+        assert Document.query.filter_by(case_id=case_id).count() == 2
+    assert directories and not any(os.path.exists(directory) for directory in directories)
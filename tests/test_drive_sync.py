@@ -0,0 +1,117 @@
+import pytest
+from app import db
+from app.models.bates_prefix import BatesPrefix
+from app.models.case import Case
+from app.models.document import Document
+from app.utils.drive import get_drive_manager
+from app.utils.drive_sync import DriveSyncConflict, sync_case
+
+
+@pytest.fixture
+def bates_folder(app, case_id, drive):
+    """The case's Bates labeled folder in Drive, with one stamped file in a subfolder."""
+    folder = drive.add_folder('Bates Labeled')
+    exhibits = drive.add_folder('Exhibits', parents=[folder['id']])
+    drive.add_file('TEST-000001.pdf', parents=[folder['id']])
+    drive.add_file('exhibit_TEST-000002_to_TEST-000004.pdf', parents=[exhibits['id']])
+    drive.add_file('TEST-000050.pdf', parents=[drive.add_folder('Elsewhere')['id']])
+    with app.app_context():
+        case = db.session.get(Case, case_id)
+        case.google_drive_enabled = True
+        case.drive_bates_folder_id = folder['id']
+        db.session.commit()
+    return exhibits['id']
+
+
+def sync(case_id, **kwargs):
+    return sync_case(db.session.get(Case, case_id), get_drive_manager(), **kwargs)
+
+
+def stored(case_id):
+    return [
+        (document.bates_start, document.bates_end)
+        for document in Document.query.filter_by(case_id=case_id).order_by(Document.start_seq)
+    ]
+
+
+def test_first_sync_lists_the_folder_tree(app, case_id, bates_folder):
+    with app.app_context():
+        result = sync(case_id)
+
+        assert result['full']
+        assert (result['imported'], result['examined'], result['errors']) == (2, 2, [])
+        assert stored(case_id) == [('TEST-000001', 'TEST-000001'), ('TEST-000002', 'TEST-000004')]
+        # Numbers issued outside the app are not issued again
+        assert BatesPrefix.query.filter_by(case_id=case_id).one().current_sequence == 5
+
+
+def test_later_syncs_read_only_the_changes_feed(app, case_id, bates_folder, drive):
+    with app.app_context():
+        sync(case_id)
+        list_calls = drive.list_calls
+
+        drive.add_file('TEST-000005.pdf', parents=[bates_folder])
+        drive.add_file('TEST-000060.pdf', parents=[drive.add_folder('Unrelated')['id']])
+        drive.add_file('notes.pdf', parents=[bates_folder])
+        result = sync(case_id)
+
+        assert not result['full']
+        assert drive.list_calls == list_calls
+        assert (result['imported'], result['examined']) == (1, 2)
+        assert result['errors'] == ["Could not extract Bates number from notes.pdf"]
+        assert stored(case_id)[-1] == ('TEST-000005', 'TEST-000005')
+
+        result = sync(case_id)
+        assert (result['imported'], result['examined']) == (0, 0)
+
+
+def test_full_sync_skips_files_already_synced(app, case_id, bates_folder):
+    with app.app_context():
+        sync(case_id)
+        result = sync(case_id, full=True)
+
+        assert (result['imported'], result['skipped']) == (0, 2)
+        assert len(stored(case_id)) == 2
+
+
+def test_concurrent_sync_rolls_back(app, case_id, bates_folder, monkeypatch):
+    from app.utils.drive import GoogleDriveManager
+
+    list_files_recursive = GoogleDriveManager.list_files_recursive
+
+    def finished_elsewhere(self, folder_id):
+        # Another sync of the case commits while this one is listing
+        Case.query.filter_by(id=case_id).update({Case.drive_changes_token: 'elsewhere'})
+        db.session.commit()
+        return list_files_recursive(self, folder_id)
+
+    monkeypatch.setattr(GoogleDriveManager, 'list_files_recursive', finished_elsewhere)
+    with app.app_context():
+        with pytest.raises(DriveSyncConflict):
+            sync(case_id)
+
+        assert stored(case_id) == []
+        assert db.session.get(Case, case_id).drive_changes_token == 'elsewhere'
+        assert BatesPrefix.query.filter_by(case_id=case_id).one().current_sequence == 1
+
+
+def test_sync_button_imports_inline(app, client, case_id, bates_folder):
+    response = client.post(f'/case/{case_id}/sync-with-drive')
+    assert response.status_code == 302
+
+    with app.app_context():
+        assert len(stored(case_id)) == 2
+    assert 'Successfully imported 2 files' in client.get(f'/case/{case_id}').get_data(as_text=True)
+
+
+def test_sync_button_queues_a_background_sync(app, client, case_id, bates_folder, monkeypatch):
+    queued = []
+    worker = app.extensions['drive_sync']
+    monkeypatch.setattr(worker, 'submit', queued.append)
+    app.config['DRIVE_SYNC'] = 'background'
+
+    client.post(f'/case/{case_id}/sync-with-drive')
+
+    assert queued == [case_id]
+    with app.app_context():
+        assert stored(case_id) == []
@@ -0,0 +1,23 @@
+import logging
+from app.models.document import Document
+
+
+def test_missing_spacy_model_disables_extraction_once(app, case_id, upload, caplog):
+    upload('Fred Pollard wrote to Acme Corp.')
+    worker = app.extensions['entity_worker']
+    worker.extractor.model = 'no_such_spacy_model'
+    app.config['ENTITY_EXTRACTION'] = 'background'
+
+    with app.app_context():
+        document_id = Document.query.one().id
+    with caplog.at_level(logging.ERROR, logger='app.utils.entities'):
+        worker.submit(document_id)
+        worker.thread.join(timeout=30)
+        # Later documents are not queued at all
+        worker.submit(document_id)
+
+    assert app.config['ENTITY_EXTRACTION'] == 'off'
+    assert worker.queue.empty()
+    errors = [record for record in caplog.records if record.levelno >= logging.ERROR]
+    assert len(errors) == 1
+    assert 'no_such_spacy_model' in errors[0].getMessage()
@@ -0,0 +1,64 @@
+import os
+import re
+import subprocess
+import sys
+import pytest
+from app.config import Config
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that only specific code paths need; importing the app must not load them
+DEFERRED_MODULES = (
+    'PyPDF2',
+    'reportlab',
+    'pdfplumber',
+    'numpy',
+    'spacy',
+    'openai',
+    'googleapiclient',
+    'google_auth_oauthlib',
+    'google.cloud.secretmanager',
+)
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+
+
+def measure_import(modules=('app', 'app.routes')):
+    """
+    Import modules in a fresh interpreter with -X importtime.
+
+    Returns:
+        tuple: (total_ms, modules) where total_ms is the cumulative time of
+            the top-level app imports and modules is every module imported
+    """
+    statement = '; '.join(f'import {module}' for module in modules)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    total_us, loaded = 0, set()
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            _, cumulative_us, indent, module = match.groups()
+            loaded.add(module)
+            if not indent and (module == 'app' or module.startswith('app.')):
+                total_us += int(cumulative_us)
+    return total_us / 1000, loaded
+
+
+@pytest.fixture(scope='module')
+def fastest_import():
+    # The fastest run is the least disturbed by other load on the machine
+    return min((measure_import() for _ in range(3)), key=lambda run: run[0])
+
+
+def test_import_within_budget(fastest_import):
+    total_ms, _ = fastest_import
+    assert total_ms <= Config.IMPORT_BUDGET_MS, f"import took {total_ms:.0f} ms"
+
+
+@pytest.mark.parametrize('name', DEFERRED_MODULES)
+def test_heavy_module_not_imported_at_startup(fastest_import, name):
+    _, loaded = fastest_import
+    assert not any(module == name or module.startswith(name + '.') for module in loaded)
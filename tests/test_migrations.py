@@ -0,0 +1,88 @@
+import os
+import sqlite3
+import pytest
+import flask_migrate
+from alembic import command
+from app import create_app, db
+from app.config import TestingConfig
+
+BASELINE_REVISION = '5ff3f881417b'
+BASELINE_SCHEMA = os.path.join(os.path.dirname(__file__), 'data', 'baseline_schema.sql')
+
+
+@pytest.fixture
+def baseline_app(tmp_path, monkeypatch):
+    """An app on a database with the schema of the first migration and one case."""
+    path = tmp_path / 'baseline.db'
+    with sqlite3.connect(path) as conn, open(BASELINE_SCHEMA) as schema:
+        conn.executescript(schema.read())
+        conn.execute("INSERT INTO cases (id, case_name, current_sequence) VALUES (1, 'Jones v. Smith', 1)")
+        conn.execute("INSERT INTO bates_prefixes (case_id, prefix, is_default, current_sequence) VALUES (1, 'JONES', 1, 12)")
+
+    monkeypatch.setenv('DATABASE_URL', f'sqlite:///{path}')
+    monkeypatch.setattr(TestingConfig, 'AUTO_INIT_DB', False, raising=False)
+    monkeypatch.setattr(TestingConfig, 'UPLOAD_FOLDER', str(tmp_path / 'uploads'), raising=False)
+    app = create_app('testing')
+    with app.app_context():
+        flask_migrate.stamp(directory=migrations_directory(app), revision=BASELINE_REVISION)
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+def migrations_directory(app):
+    return os.path.join(os.path.dirname(app.root_path), 'migrations')
+
+
+def columns(table):
+    return {column['name'] for column in db.inspect(db.engine).get_columns(table)}
+
+
+def test_upgrade_matches_the_models(baseline_app):
+    from app.models.case import Case
+
+    directory = migrations_directory(baseline_app)
+    flask_migrate.upgrade(directory=directory)
+
+    # Raises AutoGenerateDiffsDetected if the migrated schema and the models differ
+    command.check(baseline_app.extensions['migrate'].migrate.get_config(directory))
+
+    case = Case.query.one()
+    assert case.bates_prefix == 'JONES'
+    assert case.next_bates_number == 'JONES-000012'
+
+
+def test_downgrade_restores_the_baseline_schema(baseline_app):
+    before = {table: columns(table) for table in db.inspect(db.engine).get_table_names() if table != 'alembic_version'}
+
+    directory = migrations_directory(baseline_app)
+    flask_migrate.upgrade(directory=directory)
+    flask_migrate.downgrade(directory=directory, revision=BASELINE_REVISION)
+
+    tables = set(db.inspect(db.engine).get_table_names()) - {'alembic_version'}
+    assert tables == set(before)
+    assert all(columns(table) == before[table] for table in tables)
+
+
+def test_auto_init_leaves_nothing_to_upgrade(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'new.db'}")
+    monkeypatch.setattr(TestingConfig, 'AUTO_INIT_DB', True, raising=False)
+    monkeypatch.setattr(TestingConfig, 'UPLOAD_FOLDER', str(tmp_path / 'uploads'), raising=False)
+    app = create_app('testing')
+    with app.app_context():
+        directory = migrations_directory(app)
+        # Would fail with "table already exists" if the created tables were not stamped
+        flask_migrate.upgrade(directory=directory)
+        command.check(app.extensions['migrate'].migrate.get_config(directory))
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_init_db_migrates_an_existing_database(baseline_app):
+    from app import init_database
+
+    init_database(baseline_app, stamp=True)
+
+    directory = migrations_directory(baseline_app)
+    command.check(baseline_app.extensions['migrate'].migrate.get_config(directory))
+    assert 'bates_prefix' not in columns('cases')
@@ -0,0 +1,46 @@
+import re
+import html
+
+
+def test_case_listing_pages_by_cursor(app, client, case_id, upload):
+    app.config['DOCUMENTS_PER_PAGE'] = 2
+    for name in ('a.pdf', 'b.pdf', 'c.pdf'):
+        upload(name, filename=name)
+
+    first = client.get(f'/case/{case_id}').get_data(as_text=True)
+    assert 'a.pdf' in first and 'b.pdf' in first and 'c.pdf' not in first
+
+    next_url = html.unescape(re.search(r'href="([^"]*after=[^"]*)"', first).group(1))
+    second = client.get(next_url).get_data(as_text=True)
+    assert 'c.pdf' in second and 'a.pdf' not in second
+    assert re.search(r'href="[^"]*before=', second)
+
+
+def test_search_documents_returns_one_page(app, case_id, upload):
+    from app.utils.bates import BatesManager
+
+    for name in ('a.pdf', 'b.pdf', 'c.pdf'):
+        upload(name, filename=name)
+
+    manager = BatesManager()
+    with app.test_request_context():
+        first = manager.search_documents(case_id=case_id, filename='.pdf', per_page=2)
+        second = manager.search_documents(case_id=case_id, filename='.pdf', per_page=2, after=first.next_cursor)
+
+        assert [document.original_filename for document in first] == ['a.pdf', 'b.pdf']
+        assert [document.original_filename for document in second] == ['c.pdf']
+        assert first.total == 3 and not second.has_next
+
+
+def test_count_cache_is_bounded(app, monkeypatch):
+    from app.models.case import Case
+    from app.utils import pagination
+
+    monkeypatch.setattr(pagination, 'COUNT_CACHE_SIZE', 3)
+    with app.app_context():
+        for term in ('a', 'b', 'c', 'd', 'e'):
+            pagination.cached_count(Case.query, ('search', term))
+        pagination.cached_count(Case.query, ('search', 'c'))
+        pagination.cached_count(Case.query, ('search', 'f'))
+
+    assert list(pagination._count_cache) == [('search', 'e'), ('search', 'c'), ('search', 'f')]
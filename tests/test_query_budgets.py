@@ -0,0 +1,59 @@
+import pytest
+from app.models.document import Document
+from app.models.tag import Tag
+
+# Every budgeted view, through each of its query paths
+BUDGETED_URLS = [
+    '/cases',
+    '/case/{case_id}',
+    '/document/{document_id}',
+    '/document/{document_id}/similar.json',
+    '/tags',
+    '/search',
+    '/search?q=contract',
+    '/search?q=TEST-000002',
+    '/search?case_id={case_id}',
+    '/search?tag_ids={tag_id}',
+    '/search?case_id={case_id}&tag_ids={tag_id}&tag_ids={other_tag_id}',
+    '/search?text=indemnity',
+    '/search?text=indemnity&case_id={case_id}',
+    '/search?text=indemnity&case_id={case_id}&tag_ids={tag_id}',
+    '/search?q=contract&mentions=Acme&case_id={case_id}&tag_ids={tag_id}',
+]
+
+
+@pytest.fixture
+def sample(app, client, case_id, upload):
+    """A case with several tagged documents, and a second case, so per-row queries would show."""
+    client.post('/case/new', data={'case_name': 'Other Case', 'bates_prefix': 'OTHER'})
+    for index in range(4):
+        upload(f'Contract {index} with an indemnity clause', 'Second page', filename=f'contract_{index}.pdf')
+
+    with app.app_context():
+        tag_id, other_tag_id = [tag.id for tag in Tag.query.filter_by(is_default=True).order_by(Tag.id).limit(2)]
+        document_ids = [document.id for document in Document.query.filter_by(case_id=case_id)]
+    for document_id in document_ids:
+        client.post(f'/document/{document_id}/tags', data={'tag_ids': [tag_id, other_tag_id]})
+
+    return {'case_id': case_id, 'document_id': document_ids[0], 'tag_id': tag_id, 'other_tag_id': other_tag_id}
+
+
+def endpoint(app, url):
+    return app.url_map.bind('localhost').match(url.split('?')[0])[0]
+
+
+@pytest.mark.parametrize('url', BUDGETED_URLS)
+def test_view_stays_within_its_query_budget(app, client, sample, url):
+    # Under TESTING the profiler raises QueryBudgetExceeded out of the client
+    url = url.format(**sample)
+    response = client.get(url)
+    assert response.status_code == 200
+
+    view = app.view_functions[endpoint(app, url)]
+    assert int(response.headers['X-Query-Count']) <= view.query_budget
+
+
+def test_every_budgeted_view_is_covered(app):
+    covered = {endpoint(app, url.format(case_id=1, document_id=1, tag_id=1, other_tag_id=2)) for url in BUDGETED_URLS}
+    budgeted = {rule.endpoint for rule in app.url_map.iter_rules() if hasattr(app.view_functions[rule.endpoint], 'query_budget')}
+    assert budgeted <= covered
@@ -0,0 +1,114 @@
+import contextlib
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app import db
+from app.models.bates_prefix import BatesPrefix
+from app.models.case import Case
+from app.models.document import Document
+from app.models.tag import Tag
+from app.utils.bates import BatesManager
+from app.utils.similarity import SimilarityIndexRegistry
+
+
+@contextlib.contextmanager
+def captured_selects():
+    """Collect the SELECT statements (with parameters) the code under test runs."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(Engine, 'before_cursor_execute', capture)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, 'before_cursor_execute', capture)
+
+
+def query_plan(statement, parameters):
+    rows = db.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    return ' | '.join(str(row[-1]) for row in rows)
+
+
+def assert_uses_index(statements, marker, index):
+    """At least one captured statement containing marker is answered from index."""
+    plans = [query_plan(statement, parameters) for statement, parameters in statements if marker in statement]
+    assert plans, f"no statement containing {marker!r} was run"
+    assert any(index in plan for plan in plans), plans
+
+
+@pytest.fixture
+def sample(app, client, case_id, upload):
+    for index in range(3):
+        upload(f'Page {index} about water damage', 'Second page', filename=f'doc_{index}.pdf')
+    with app.app_context():
+        tag_ids = [tag.id for tag in Tag.query.filter_by(is_default=True).order_by(Tag.id).limit(2)]
+        document_ids = [document.id for document in Document.query.order_by(Document.id)]
+    for document_id in document_ids:
+        client.post(f'/document/{document_id}/tags', data={'tag_ids': tag_ids})
+    return {'case_id': case_id, 'tag_ids': tag_ids}
+
+
+@pytest.fixture
+def ctx(app):
+    with app.test_request_context():
+        yield
+        db.session.rollback()
+
+
+def test_case_view_seeks_on_the_case_sequence_index(client, sample):
+    with captured_selects() as statements:
+        client.get(f"/case/{sample['case_id']}")
+    with client.application.app_context():
+        assert_uses_index(statements, 'ORDER BY documents.bates_sequence', 'ix_documents_case_sequence')
+
+
+def test_bates_range_search_uses_the_prefix_range_index(client, sample):
+    with captured_selects() as statements:
+        client.get('/search', query_string={'case_id': sample['case_id'], 'q': 'TEST-000002 - TEST-000004'})
+    with client.application.app_context():
+        assert_uses_index(statements, 'documents.start_seq', 'ix_documents_prefix_range')
+
+
+def test_tag_search_uses_the_tag_document_index(client, sample):
+    with captured_selects() as statements:
+        client.get('/search', query_string={'case_id': sample['case_id'], 'tag_ids': sample['tag_ids']})
+    with client.application.app_context():
+        assert_uses_index(statements, 'FROM document_tags', 'ix_document_tags_tag_document')
+
+
+def test_case_tags_use_the_case_index(client, sample):
+    with client.application.app_context():
+        document_id = Document.query.first().id
+    with captured_selects() as statements:
+        client.get(f'/document/{document_id}/tags')
+    with client.application.app_context():
+        assert_uses_index(statements, 'tags.case_id = ?', 'ix_tags_case_id')
+
+
+def test_overlap_check_uses_the_prefix_range_index(sample, ctx):
+    prefix = BatesPrefix.query.filter_by(case_id=sample['case_id']).one()
+    with captured_selects() as statements:
+        BatesManager().find_overlapping_document(prefix.id, 2, 3)
+    assert_uses_index(statements, 'FROM documents', 'ix_documents_prefix_range')
+
+
+def test_page_lookup_uses_the_page_index(sample, ctx):
+    with captured_selects() as statements:
+        BatesManager().get_document_by_bates_number('TEST-000002')
+    assert_uses_index(statements, 'FROM document_pages', 'ix_document_pages_prefix_sequence')
+
+
+def test_default_prefix_uses_the_case_default_index(sample, ctx):
+    case = Case.query.get(sample['case_id'])
+    with captured_selects() as statements:
+        case.default_prefix
+    assert_uses_index(statements, 'FROM bates_prefixes', 'ix_bates_prefixes_case_default')
+
+
+def test_similarity_build_reads_pages_by_case(sample, ctx):
+    with captured_selects() as statements:
+        SimilarityIndexRegistry().get(sample['case_id'])
+    assert_uses_index(statements, 'FROM document_pages', 'ix_document_pages_case_document')
@@ -0,0 +1,57 @@
+import shutil
+import sqlite3
+import pytest
+from flask import jsonify
+from app import db
+from app.config import TestingConfig
+from app.models.tag import Tag
+from app.utils.replica import read_replica
+
+
+@pytest.fixture(autouse=True)
+def replica_path(tmp_path, monkeypatch):
+    """A second SQLite file registered as the read replica (REPLICA_DATABASE_URL)."""
+    path = tmp_path / 'replica.db'
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_REPLICA_URI', f'sqlite:///{path}', raising=False)
+    return path
+
+
+@pytest.fixture
+def replica(app, case_id, replica_path):
+    """Copy the primary to the replica, then let the copy drift so reads show where they went."""
+    with app.app_context():
+        db.session.remove()
+        for bind in (None, 'replica'):
+            db.get_engine(app, bind=bind).dispose()
+        primary = db.engine.url.database
+    shutil.copyfile(primary, replica_path)
+    with sqlite3.connect(replica_path) as conn:
+        conn.execute("UPDATE cases SET case_name = 'Replica Case' WHERE id = ?", (case_id,))
+    return replica_path
+
+
+def test_read_only_view_reads_from_the_replica(client, case_id, replica):
+    page = client.get(f'/case/{case_id}').get_data(as_text=True)
+    assert 'Replica Case' in page
+
+
+def test_views_not_marked_read_from_the_primary(client, case_id, replica):
+    page = client.get(f'/case/{case_id}/upload').get_data(as_text=True)
+    assert 'Test Case' in page and 'Replica Case' not in page
+
+
+def test_writes_in_a_replica_request_go_to_the_primary(app, case_id, replica):
+    @app.route('/probe')
+    @read_replica
+    def probe():
+        from app.models.case import Case
+        name = Case.query.get(case_id).case_name
+        db.session.add(Tag(name='Written', color='#000000', is_default=True))
+        db.session.commit()
+        return jsonify(name=name)
+
+    assert app.test_client().get('/probe').get_json() == {'name': 'Replica Case'}
+    with app.app_context():
+        assert Tag.query.filter_by(name='Written').count() == 1
+    with sqlite3.connect(replica) as conn:
+        assert conn.execute("SELECT count(*) FROM tags WHERE name = 'Written'").fetchone() == (0,)
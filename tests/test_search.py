@@ -0,0 +1,52 @@
+def test_bates_reference_finds_the_document_covering_it(client, case_id, upload):
+    upload('one', 'two', filename='first.pdf')
+    upload('three', 'four', filename='second.pdf')
+
+    page = client.get('/search', query_string={'q': 'test 4'}).get_data(as_text=True)
+    assert 'second.pdf' in page
+    assert 'first.pdf' not in page
+
+
+def test_bates_range_finds_every_document_it_touches(client, case_id, upload):
+    upload('one', 'two', filename='first.pdf')
+    upload('three', 'four', filename='second.pdf')
+    upload('five', filename='third.pdf')
+
+    page = client.get('/search', query_string={'q': 'TEST-000002 - TEST-000003'}).get_data(as_text=True)
+    assert 'first.pdf' in page and 'second.pdf' in page
+    assert 'third.pdf' not in page
+
+
+def test_bates_lookup_is_scoped_to_the_case(app, client, case_id, upload, make_pdf):
+    import io
+    from app.models.case import Case
+    from app.models.document import Document
+
+    upload('one')
+    client.post('/case/new', data={'case_name': 'Other Case', 'bates_prefix': 'TEST'})
+    with app.app_context():
+        other_id = Case.query.filter_by(case_name='Other Case').one().id
+    client.post(f'/case/{other_id}/upload', data={'file': (io.BytesIO(make_pdf('one')), 'other.pdf')},
+                content_type='multipart/form-data')
+
+    for case in (case_id, other_id):
+        with app.app_context():
+            document = Document.query.filter_by(case_id=case).one()
+        page = client.get('/bates/TEST-000001', query_string={'case_id': case}).get_data(as_text=True)
+        assert f'/document/{document.id}' in page
+
+
+def test_bates_reference_across_cases_matches_the_prefix_exactly(app, client, make_pdf):
+    import io
+    from app.models.case import Case
+
+    for name, prefix in (('Jones', 'Jones-Pltf'), ('Jones Exhibits', 'Jones-PltfX')):
+        client.post('/case/new', data={'case_name': name, 'bates_prefix': prefix})
+        with app.app_context():
+            case = Case.query.filter_by(case_name=name).one()
+        client.post(f'/case/{case.id}/upload', data={'file': (io.BytesIO(make_pdf('one')), f'{prefix}.pdf')},
+                    content_type='multipart/form-data')
+
+    page = client.get('/search', query_string={'q': 'jones_pltf 1'}).get_data(as_text=True)
+    assert 'Jones-Pltf.pdf' in page
+    assert 'Jones-PltfX.pdf' not in page
@@ -0,0 +1,59 @@
+import pytest
+from app.models.case import Case
+from app.models.document import Document
+from app.utils.similarity import SimilarityIndexRegistry, similarity_indexes
+
+
+@pytest.fixture
+def text_page_scans(monkeypatch):
+    """Count the per-case document scans the registry makes."""
+    scans = []
+    original = similarity_indexes._text_pages
+    monkeypatch.setattr(similarity_indexes, '_text_pages', lambda case_id: scans.append(case_id) or original(case_id))
+    return scans
+
+
+def similar_names(client, document_id):
+    response = client.get(f'/document/{document_id}/similar.json')
+    return [match['original_filename'] for match in response.get_json()['similar']]
+
+
+def test_similar_documents_rank_shared_vocabulary_first(app, client, case_id, upload):
+    upload('Roof inspection found water damage in the attic', filename='inspection.pdf')
+    upload('Estimate to repair water damage in the attic roof', filename='estimate.pdf')
+    upload('Quarterly payroll summary for warehouse staff', filename='payroll.pdf')
+
+    with app.app_context():
+        inspection = Document.query.filter_by(original_filename='inspection.pdf').one().id
+    assert similar_names(client, inspection)[0] == 'estimate.pdf'
+
+
+def test_unchanged_case_is_not_rescanned(app, client, case_id, upload, text_page_scans):
+    upload('Roof inspection found water damage', filename='inspection.pdf')
+    upload('Estimate to repair water damage', filename='estimate.pdf')
+    with app.app_context():
+        inspection = Document.query.filter_by(original_filename='inspection.pdf').one().id
+
+    similar_names(client, inspection)
+    similar_names(client, inspection)
+    assert text_page_scans == [case_id]
+
+    # A new document bumps the case's cache version, and is picked up
+    upload('Second estimate for the water damage repair', filename='second_estimate.pdf')
+    assert 'second_estimate.pdf' in similar_names(client, inspection)
+    assert text_page_scans == [case_id, case_id]
+
+
+def test_registry_keeps_the_most_recently_used_cases(app, client):
+    for name in ('A', 'B', 'C'):
+        client.post('/case/new', data={'case_name': f'Case {name}', 'bates_prefix': name})
+
+    registry = SimilarityIndexRegistry(max_indexes=2)
+    with app.app_context():
+        first, second, third = [case.id for case in Case.query.order_by(Case.id)]
+        registry.get(first)
+        registry.get(second)
+        registry.get(first)
+        registry.get(third)
+
+    assert list(registry._indexes) == [first, third]
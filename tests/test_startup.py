@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+import pytest
+from app import create_app
+from app.config import Config
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COLD_START = (
+    "import time; started = time.perf_counter(); "
+    "from app import create_app; create_app('testing'); "
+    "print((time.perf_counter() - started) * 1000)"
+)
+
+
+def test_cold_start_within_budget(tmp_path):
+    # Time the app without creating tables, as a deployed worker starts
+    env = dict(os.environ, AUTO_INIT_DB='0', DATABASE_URL=f"sqlite:///{tmp_path / 'startup.db'}")
+    timings = []
+    for _ in range(3):
+        output = subprocess.run(
+            [sys.executable, '-c', COLD_START], cwd=tmp_path, env=dict(env, PYTHONPATH=ROOT),
+            capture_output=True, text=True, check=True
+        ).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+
+    # The fastest run is the least disturbed by other load on the machine
+    assert min(timings) <= Config.STARTUP_BUDGET_MS, f"cold start took {min(timings):.0f} ms"
+
+
+def test_cold_start_leaves_the_database_alone(tmp_path):
+    path = tmp_path / 'startup.db'
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{path}', PYTHONPATH=ROOT)
+    env.pop('AUTO_INIT_DB', None)
+    subprocess.run([sys.executable, '-c', COLD_START], cwd=tmp_path, env=env, capture_output=True, check=True)
+
+    assert not path.exists() or path.stat().st_size == 0
+
+
+def test_production_requires_a_secret_key(monkeypatch):
+    monkeypatch.delenv('SECRET_KEY', raising=False)
+    with pytest.raises(RuntimeError, match='SECRET_KEY'):
+        create_app('production')
@@ -0,0 +1,36 @@
+import pytest
+from app.models.document import Document
+from app.models.tag import Tag
+
+
+@pytest.fixture
+def tagged(app, client, case_id, upload):
+    """Two documents: both tagged with the first default tag, one also with the second."""
+    upload('Inspection report on water damage', filename='both_tags.pdf')
+    upload('Invoice for water damage repairs', filename='one_tag.pdf')
+
+    with app.app_context():
+        first, second = [tag.id for tag in Tag.query.filter_by(is_default=True).order_by(Tag.id).limit(2)]
+        both, one = [document.id for document in Document.query.order_by(Document.id)]
+    client.post(f'/document/{both}/tags', data={'tag_ids': [first, second]})
+    client.post(f'/document/{one}/tags', data={'tag_ids': [first]})
+    return first, second
+
+
+def test_search_requires_every_selected_tag(client, case_id, tagged):
+    first, second = tagged
+
+    page = client.get('/search', query_string={'case_id': case_id, 'tag_ids': [first, second]}).get_data(as_text=True)
+    assert 'both_tags.pdf' in page and 'one_tag.pdf' not in page
+
+    page = client.get('/search', query_string={'case_id': case_id, 'tag_ids': [first]}).get_data(as_text=True)
+    assert 'both_tags.pdf' in page and 'one_tag.pdf' in page
+
+
+def test_page_text_search_requires_every_selected_tag(app, case_id, tagged):
+    from app.utils.bates import BatesManager
+    first, second = tagged
+
+    with app.app_context():
+        hits = BatesManager().search_pages('water damage', case_id=case_id, tag_ids=[first, second])
+        assert [hit['document'].original_filename for hit in hits] == ['both_tags.pdf']
@@ -3,5 +3,10 @@ import os
 
 app = create_app(os.getenv('FLASK_ENV', 'default'))
 
+# With preload_app (see gunicorn.conf.py) this module is imported once in the
+# gunicorn master; load the shared, read-only state before workers are forked
+if app.config['PRELOAD_WARM_UP']:
+    app.extensions['prefork'].warm_up()
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 8080)))